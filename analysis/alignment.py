@@ -0,0 +1,126 @@
+"""Time alignment of simulator tables on the step grid.
+
+The simulator's timestamps carry sub-second jitter (`13:00:00.752762`), so an
+exact join on `timestamp` drops rows. Here every timestamp is converted to
+integer epoch microseconds and snapped to the nearest point of a regular grid
+(the simulation step); rows of two tables then match when they land in the same
+grid bucket.
+
+The join itself is a lookup table: bucket numbers are offsets into a dense
+array holding each bucket's row position, built in one pass per table, so
+aligning n rows is O(n) with no sort. Sparse data (a span much wider than the
+row count) falls back to a sorted lookup.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STEP = timedelta(minutes=15)
+
+_US = timedelta(microseconds=1)
+
+
+def to_epoch_us(values) -> np.ndarray:
+	"""Timestamps (ISO strings or datetimes) as int64 microseconds since the epoch, UTC."""
+	if isinstance(values, pd.Series) and pd.api.types.is_datetime64_any_dtype(values):
+		ts = values.dt.tz_localize("UTC") if values.dt.tz is None else values
+	else:
+		ts = pd.to_datetime(values, utc=True, format="ISO8601")
+	return pd.DatetimeIndex(ts).as_unit("us").asi8
+
+
+def infer_step(epoch_us: np.ndarray, default: timedelta = DEFAULT_STEP) -> timedelta:
+	"""Median spacing of sorted timestamps, rounded to whole seconds (jitter is sub-second)."""
+	diffs = np.diff(epoch_us)
+	diffs = diffs[diffs > 0]
+	if len(diffs) == 0:
+		return default
+	seconds = int(round(float(np.median(diffs)) / 1e6))
+	return timedelta(seconds=seconds) if seconds > 0 else default
+
+
+def snap(epoch_us: np.ndarray, step: timedelta) -> Tuple[np.ndarray, np.ndarray]:
+	"""(grid bucket, offset from the bucket's grid point in µs) of each timestamp."""
+	step_us = step // _US
+	buckets = np.floor_divide(epoch_us + step_us // 2, step_us)
+	return buckets, epoch_us - buckets * step_us
+
+
+def bucket_index(buckets: np.ndarray) -> Tuple[int, np.ndarray]:
+	"""Dense lookup `(base, table)`: `table[b - base]` is the last row in bucket b, or -1."""
+	base = int(buckets.min())
+	table = np.full(int(buckets.max()) - base + 1, -1, dtype=np.int64)
+	# Positions ascend, so among duplicates the last row is the one kept
+	np.maximum.at(table, buckets - base, np.arange(len(buckets)))
+	return base, table
+
+
+def _dense(buckets: np.ndarray) -> bool:
+	return len(buckets) > 0 and int(buckets.max()) - int(buckets.min()) <= 4 * len(buckets) + 1024
+
+
+def join_positions(left: np.ndarray, right: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+	"""Row positions (left, right) and bucket of every bucket present in both, in bucket order.
+
+	Duplicate rows within a bucket resolve to the last one, as a re-written step
+	supersedes the earlier write.
+	"""
+	empty = np.empty(0, dtype=np.int64)
+	if len(left) == 0 or len(right) == 0:
+		return empty, empty, empty
+	if _dense(left) and _dense(right):
+		lbase, ltable = bucket_index(left)
+		rbase, rtable = bucket_index(right)
+		lo, hi = max(lbase, rbase), min(lbase + len(ltable), rbase + len(rtable))
+		if lo >= hi:
+			return empty, empty, empty
+		li = ltable[lo - lbase:hi - lbase]
+		ri = rtable[lo - rbase:hi - rbase]
+		both = (li >= 0) & (ri >= 0)
+		return li[both], ri[both], np.arange(lo, hi)[both]
+	# Sparse: last position per bucket via unique on the reversed arrays
+	lb, lrev = np.unique(left[::-1], return_index=True)
+	rb, rrev = np.unique(right[::-1], return_index=True)
+	common, lpos, rpos = np.intersect1d(lb, rb, assume_unique=True, return_indices=True)
+	return len(left) - 1 - lrev[lpos], len(right) - 1 - rrev[rpos], common
+
+
+def align_frames(
+	left: pd.DataFrame,
+	right: pd.DataFrame,
+	step: Optional[timedelta] = None,
+	tolerance: Optional[timedelta] = None,
+	on: str = "timestamp",
+	suffixes: Sequence[str] = ("_left", "_right"),
+) -> pd.DataFrame:
+	"""Inner-join two time series on the step grid.
+
+	`on` in the result is the grid timestamp (UTC). `step` defaults to the
+	spacing inferred from `left`. With `tolerance`, pairs whose original
+	timestamps differ by more than that are dropped. Other columns present in
+	both frames get `suffixes`.
+	"""
+	lus, rus = to_epoch_us(left[on]), to_epoch_us(right[on])
+	if step is None:
+		step = infer_step(lus if len(lus) > 1 else rus)
+	lb, loff = snap(lus, step)
+	rb, roff = snap(rus, step)
+	li, ri, buckets = join_positions(lb, rb)
+	if tolerance is not None:
+		close = np.abs(loff[li] - roff[ri]) <= tolerance // _US
+		li, ri, buckets = li[close], ri[close], buckets[close]
+
+	out = pd.DataFrame({on: pd.to_datetime(buckets * (step // _US), unit="us", utc=True)})
+	shared = (set(left.columns) & set(right.columns)) - {on}
+	for frame, positions, suffix in ((left, li, suffixes[0]), (right, ri, suffixes[1])):
+		for column in frame.columns:
+			if column == on:
+				continue
+			name = f"{column}{suffix}" if column in shared else column
+			out[name] = frame[column].to_numpy()[positions]
+	return out
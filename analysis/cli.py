@@ -7,19 +7,34 @@ import pandas as pd
 def main() -> None:
 	root = Path(__file__).resolve().parents[1]
 	sys.path.insert(0, str(root))
-	from analysis.data_access import fetch_supabase_table, read_csv_table
-	from analysis.metrics import summarize_co2, summarize_generation_mix, summarize_netzero
+	from analysis.data_access import TableRequest, fetch_tables, read_csv_table, read_parquet_table
+	from analysis.metrics import summarize_alignment, summarize_co2, summarize_generation_mix, summarize_netzero
 
 	parser = argparse.ArgumentParser(description="Analysis CLI")
-	parser.add_argument("source", choices=["supabase", "csv"], help="Data source")
+	parser.add_argument("source", choices=["supabase", "csv", "parquet"], help="Data source")
 	parser.add_argument("--limit", type=int, default=1000)
 	parser.add_argument("--csvdir", type=str, default="data")
+	parser.add_argument("--parquetdir", type=str, default="data/parquet")
+	parser.add_argument("--start", type=str, default=None, help="Supabase/Parquet: range start (inclusive)")
+	parser.add_argument("--end", type=str, default=None, help="Supabase/Parquet: range end (exclusive)")
+	parser.add_argument("--state", type=str, default=None, help="Summary state file: only rows newer than it are read, then it is updated")
 	args = parser.parse_args()
 
+	if args.state:
+		print(summarize_incremental(args.source, args.state, args.csvdir, args.parquetdir))
+		return
+
 	if args.source == "supabase":
-		df_co2 = fetch_supabase_table("co2_intensity", limit=args.limit, order="timestamp")
-		df_gen = fetch_supabase_table("generation_mix", limit=args.limit, order="timestamp")
-		df_nz = fetch_supabase_table("netzero_alignment", limit=100, order="year")
+		tables = fetch_tables([
+			TableRequest("co2_intensity", args.start, args.end, limit=args.limit),
+			TableRequest("generation_mix", args.start, args.end, limit=args.limit),
+			TableRequest("netzero_alignment", limit=100, order="year", tiebreak=None),
+		])
+		df_co2, df_gen, df_nz = tables["co2_intensity"], tables["generation_mix"], tables["netzero_alignment"]
+	elif args.source == "parquet":
+		df_co2 = read_parquet_table(args.parquetdir, "co2_intensity", args.start, args.end)
+		df_gen = read_parquet_table(args.parquetdir, "generation_mix", args.start, args.end)
+		df_nz = read_parquet_table(args.parquetdir, "netzero_alignment")
 	else:
 		csvdir = Path(args.csvdir)
 		df_co2 = read_csv_table(str(csvdir / "co2_intensity.csv")) if (csvdir / "co2_intensity.csv").exists() else pd.DataFrame()
@@ -30,10 +45,62 @@ def main() -> None:
 		"co2": summarize_co2(df_co2),
 		"generation_mix": summarize_generation_mix(df_gen),
 		"netzero_alignment": summarize_netzero(df_nz),
+		"aligned": summarize_alignment(df_co2, df_gen),
 	}
 	print(res)
 
 
+def summarize_incremental(source: str, state_path: str, csvdir: str = "data", parquetdir: str = "data/parquet") -> dict:
+	"""Fold rows written since the last run into the saved summaries.
+
+	Supabase rows are consumed page by page, so memory stays bounded by the page
+	size however much history the summaries cover. Rows are picked up by
+	timestamp, so rows written with timestamps before the saved mark are not
+	counted; delete the state file to rebuild from scratch.
+	"""
+	import json
+	import os
+
+	from analysis.data_access import fetch_range, fetch_supabase_table, iter_supabase_table
+	from analysis.metrics import Co2Summary, GenerationMixSummary, summarize_netzero
+
+	state = {}
+	if os.path.isfile(state_path):
+		with open(state_path, "r", encoding="utf-8") as f:
+			state = json.load(f)
+	summaries = {
+		"co2_intensity": Co2Summary.from_dict(state["co2_intensity"]) if "co2_intensity" in state else Co2Summary(),
+		"generation_mix": GenerationMixSummary.from_dict(state["generation_mix"]) if "generation_mix" in state else GenerationMixSummary(),
+	}
+	for table, summary in summaries.items():
+		since = summary.latest_timestamp
+		if source == "supabase":
+			chunks = iter_supabase_table(table, start=since)
+		else:
+			chunks = [fetch_range(table, start=since, source=source, csv_dir=csvdir, parquet_dir=parquetdir)]
+		for chunk in chunks:
+			if since is not None and not chunk.empty:
+				# `start` is inclusive; the row at the saved mark is already counted
+				chunk = chunk[pd.to_datetime(chunk["timestamp"], utc=True, format="ISO8601") > pd.Timestamp(since)]
+			summary.update(chunk)
+
+	# The yearly table is a few rows that change in place; always read it whole
+	if source == "supabase":
+		df_nz = fetch_supabase_table("netzero_alignment", limit=100, order="year", tiebreak=None)
+	else:
+		df_nz = fetch_range("netzero_alignment", source=source, csv_dir=csvdir, parquet_dir=parquetdir)
+
+	tmp = f"{state_path}.tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		json.dump({table: summary.to_dict() for table, summary in summaries.items()}, f)
+	os.replace(tmp, state_path)
+	return {
+		"co2": summaries["co2_intensity"].result(),
+		"generation_mix": summaries["generation_mix"].result(),
+		"netzero_alignment": summarize_netzero(df_nz),
+	}
+
+
 if __name__ == "__main__":
 	main()
 
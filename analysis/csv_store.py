@@ -0,0 +1,239 @@
+"""Typed CSV reads with a memory-mapped sidecar cache.
+
+Column dtypes come from the record dataclasses in `simulator.models`, so numbers
+are parsed straight into int/float columns and `datetime` fields into UTC
+timestamps (fixed ISO 8601 format) instead of strings parsed again downstream.
+The pyarrow engine is used when pyarrow is installed.
+
+The first read of a CSV also writes its parsed columns as `.npy` files into
+`<csv dir>/.cache/<table>-<size>-<mtime_ns>/`. Later reads of the unchanged
+file memory-map those arrays and copy out only the requested columns and rows
+(a binary search on `timestamp` when the file is in time order), so no text is
+parsed at all. Any write to the CSV changes its size or mtime and with it the
+cache directory name; stale directories are removed on the next rebuild.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, get_type_hints
+
+import numpy as np
+import pandas as pd
+
+try:
+	from analysis.instrumentation import span
+except ModuleNotFoundError:
+	from instrumentation import span  # type: ignore
+
+CACHE_DIRNAME = ".cache"
+
+
+def csv_schema(table: str) -> Dict[str, str]:
+	"""Column -> dtype (`int64`, `Int64` when optional, `float64`, `string`, `datetime`) for a canonical table."""
+	from simulator.models import TABLE_MODELS
+
+	model = TABLE_MODELS.get(table)
+	if model is None:
+		return {}
+	kinds = {int: "int64", float: "float64", str: "string", datetime: "datetime"}
+	schema = {}
+	for name, hint in get_type_hints(model).items():
+		args = getattr(hint, "__args__", (hint,))
+		base = next((t for t in args if t is not type(None)), hint)
+		kind = kinds[base]
+		schema[name] = "Int64" if kind == "int64" and type(None) in args else kind
+	return schema
+
+
+def default_engine() -> str:
+	try:
+		import pyarrow  # noqa: F401
+	except ImportError:
+		return "c"
+	return "pyarrow"
+
+
+def _table_name(path: str) -> str:
+	return os.path.splitext(os.path.basename(path))[0]
+
+
+def read_typed_csv(
+	path: str,
+	table: Optional[str] = None,
+	columns: Optional[Sequence[str]] = None,
+	engine: Optional[str] = None,
+) -> pd.DataFrame:
+	"""Parse a simulator CSV with the dtypes of `table` (default: the file name), keeping only `columns`."""
+	schema = csv_schema(table or _table_name(path))
+	header = list(pd.read_csv(path, nrows=0).columns)
+	_require_columns(path, header, columns)
+	usecols = header if columns is None else [c for c in header if c in set(columns)]
+	# Integers are read as nullable Int64, which also accepts "3.0" as written by float-typed frames
+	dtype = {c: ("Int64" if schema[c] == "int64" else schema[c]) for c in usecols if schema.get(c, "datetime") != "datetime"}
+	with span("csv.parse", table=table or _table_name(path)):
+		df = pd.read_csv(path, usecols=usecols, dtype=dtype, engine=engine or default_engine())
+		for column in usecols:
+			kind = schema.get(column, "datetime" if column == "timestamp" else None)
+			if kind == "datetime":
+				# Microseconds whatever the engine inferred, as written by the simulator
+				df[column] = pd.to_datetime(df[column], utc=True, format="ISO8601").dt.as_unit("us")
+			elif kind == "int64" and not df[column].hasnans:
+				df[column] = df[column].astype("int64")
+	return df[usecols]
+
+
+def _require_columns(path: str, available: Sequence[str], columns: Optional[Sequence[str]]) -> None:
+	missing = [] if columns is None else sorted(set(columns) - set(available))
+	if missing:
+		raise ValueError(f"{path} has no column(s) {missing}")
+
+
+def _cache_dir(path: str, stat: os.stat_result) -> str:
+	return os.path.join(os.path.dirname(path) or ".", CACHE_DIRNAME, f"{_table_name(path)}-{stat.st_size}-{stat.st_mtime_ns}")
+
+
+def write_sidecar(df: pd.DataFrame, target: str) -> None:
+	"""Write every column of `df` as `.npy` arrays plus `meta.json` into the directory `target`."""
+	tmp = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+	os.makedirs(tmp)
+	columns: List[Dict[str, Any]] = []
+	for i, name in enumerate(df.columns):
+		series = df[name]
+		entry: Dict[str, Any] = {"name": name, "file": f"{i}.npy"}
+		if pd.api.types.is_datetime64_any_dtype(series):
+			entry["kind"] = "datetime"
+			values = pd.DatetimeIndex(series).tz_convert("UTC").as_unit("us").tz_localize(None).to_numpy()
+		elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+			entry["kind"] = str(series.dtype)
+			if pd.api.types.is_extension_array_dtype(series):
+				# Nullable Int64 and friends: plain values plus a missing-value mask
+				entry["mask"] = f"{i}.mask.npy"
+				np.save(os.path.join(tmp, entry["mask"]), series.isna().to_numpy())
+				values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+			else:
+				values = series.to_numpy()
+		else:
+			# Text (region, technology, ...) as codes into a small category list; -1 is missing
+			entry["kind"] = "string"
+			codes, categories = pd.factorize(series.astype("string"))
+			entry["categories"] = [str(c) for c in categories]
+			values = codes.astype(np.int32)
+		np.save(os.path.join(tmp, entry["file"]), values)
+		columns.append(entry)
+	ts = df["timestamp"] if "timestamp" in df else None
+	meta = {"rows": len(df), "columns": columns, "sorted": bool(ts is not None and ts.is_monotonic_increasing)}
+	with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+		json.dump(meta, f)
+	try:
+		os.replace(tmp, target)
+	except OSError:
+		# Another reader built the same version first
+		shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _remove_stale(path: str, current: str) -> None:
+	cache_root = os.path.dirname(current)
+	stem = _table_name(path)
+	for name in os.listdir(cache_root):
+		full = os.path.join(cache_root, name)
+		if full != current and name.rsplit("-", 2)[0] == stem and not name.endswith(".tmp"):
+			shutil.rmtree(full, ignore_errors=True)
+
+
+def _column(entry: Dict[str, Any], directory: str, rows) -> Any:
+	values = np.load(os.path.join(directory, entry["file"]), mmap_mode="r")[rows]
+	kind = entry["kind"]
+	if kind == "datetime":
+		return pd.DatetimeIndex(values).tz_localize("UTC")
+	if kind == "string":
+		return pd.array(entry["categories"], dtype="string").take(np.asarray(values), allow_fill=True)
+	if "mask" in entry:
+		array = pd.array(np.array(values), dtype=kind)
+		array[np.load(os.path.join(directory, entry["mask"]), mmap_mode="r")[rows]] = pd.NA
+		return array
+	return np.array(values)
+
+
+def _datetime64(value: datetime) -> np.datetime64:
+	ts = pd.Timestamp(value)
+	ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+	return np.datetime64(ts.tz_localize(None).as_unit("us"))
+
+
+def load_sidecar(
+	directory: str,
+	columns: Optional[Sequence[str]] = None,
+	start: Optional[datetime] = None,
+	end: Optional[datetime] = None,
+) -> Optional[pd.DataFrame]:
+	"""Rows with `timestamp` in [start, end) from a sidecar, or None when there is none.
+
+	Raises ValueError for `columns` the sidecar does not have, as `read_typed_csv` does.
+	"""
+	try:
+		with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+			meta = json.load(f)
+	except (OSError, ValueError):
+		return None
+	entries = {entry["name"]: entry for entry in meta["columns"]}
+	_require_columns(directory, entries, columns)
+	rows: Any = slice(None)
+	if start is not None or end is not None:
+		ts = np.load(os.path.join(directory, entries["timestamp"]["file"]), mmap_mode="r")
+		lo_value = None if start is None else _datetime64(start)
+		hi_value = None if end is None else _datetime64(end)
+		if meta["sorted"]:
+			lo = 0 if lo_value is None else int(np.searchsorted(ts, lo_value, side="left"))
+			hi = len(ts) if hi_value is None else int(np.searchsorted(ts, hi_value, side="left"))
+			rows = slice(lo, max(lo, hi))
+		else:
+			mask = np.ones(len(ts), dtype=bool)
+			if lo_value is not None:
+				mask &= ts >= lo_value
+			if hi_value is not None:
+				mask &= ts < hi_value
+			rows = np.flatnonzero(mask)
+	names = list(entries) if columns is None else list(columns)
+	return pd.DataFrame({name: _column(entries[name], directory, rows) for name in names})
+
+
+def read_csv_cached(
+	path: str,
+	table: Optional[str] = None,
+	columns: Optional[Sequence[str]] = None,
+	start: Optional[datetime] = None,
+	end: Optional[datetime] = None,
+	engine: Optional[str] = None,
+) -> pd.DataFrame:
+	"""`read_typed_csv` through the sidecar cache, filtered to `timestamp` in [start, end).
+
+	On a miss the whole file is parsed once so any later column subset is a hit.
+	A cache directory that cannot be written (read-only checkout) only costs the
+	cache, not the read.
+	"""
+	target = _cache_dir(path, os.stat(path))
+	with span("csv.sidecar_read", table=table or _table_name(path)):
+		df = load_sidecar(target, columns, start, end)
+	if df is not None:
+		return df
+	full = read_typed_csv(path, table, engine=engine)
+	try:
+		os.makedirs(os.path.dirname(target), exist_ok=True)
+		write_sidecar(full, target)
+		_remove_stale(path, target)
+	except OSError:
+		pass
+	_require_columns(path, full.columns, columns)
+	if start is not None or end is not None:
+		mask = pd.Series(True, index=full.index)
+		if start is not None:
+			mask &= full["timestamp"] >= start
+		if end is not None:
+			mask &= full["timestamp"] < end
+		full = full.loc[mask].reset_index(drop=True)
+	return full if columns is None else full[list(columns)]
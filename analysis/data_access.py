@@ -1,12 +1,28 @@
 from __future__ import annotations
 
+import json
 import os
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
+try:
+	from analysis.csv_store import read_csv_cached, read_typed_csv
+	from analysis.instrumentation import span
+except ModuleNotFoundError:
+	from csv_store import read_csv_cached, read_typed_csv  # type: ignore
+	from instrumentation import span  # type: ignore
 
-def load_env():
+
+@lru_cache(maxsize=None)
+def load_env() -> None:
+	"""Load .env once per process; later calls are free."""
 	from dotenv import load_dotenv
 	load_dotenv(override=False)
 
@@ -16,23 +32,381 @@ def get_supabase_env() -> tuple[Optional[str], Optional[str]]:
 	return os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
 
 
-def fetch_supabase_table(table: str, limit: int = 1000, order: str = "timestamp") -> pd.DataFrame:
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def supabase_session() -> requests.Session:
+	"""Process-wide keep-alive session for PostgREST reads (safe to share across threads)."""
+	global _SESSION
+	with _SESSION_LOCK:
+		if _SESSION is None:
+			_SESSION = requests.Session()
+			adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+			_SESSION.mount("https://", adapter)
+			_SESSION.mount("http://", adapter)
+		return _SESSION
+
+
+def _keyset_params(
+	columns: Optional[Sequence[str]],
+	order: str,
+	descending: bool,
+	start: Optional[datetime | str | int],
+	end: Optional[datetime | str | int],
+	tiebreak: Optional[str] = "id",
+) -> List[Tuple[str, str]]:
+	# The sort key (order[, tiebreak]) is always selected: the next page starts after the last row's key
+	keys = [order] if tiebreak is None else [order, tiebreak]
+	select = "*" if columns is None else ",".join(dict.fromkeys([*columns, *keys]))
+	direction = "desc" if descending else "asc"
+	params = [("select", select), ("order", ",".join(f"{k}.{direction}" for k in keys))]
+	if start is not None:
+		params.append((order, f"gte.{_bound_value(start)}"))
+	if end is not None:
+		params.append((order, f"lt.{_bound_value(end)}"))
+	return params
+
+
+def _bound_value(value: datetime | str | int) -> str:
+	# Integer keys (e.g. `year`) are passed through; anything else is a timestamp
+	return str(value) if isinstance(value, int) else _as_utc(value).isoformat()
+
+
+def iter_supabase_table(
+	table: str,
+	columns: Optional[Sequence[str]] = None,
+	start: Optional[datetime | str | int] = None,
+	end: Optional[datetime | str | int] = None,
+	order: str = "timestamp",
+	descending: bool = False,
+	page_size: int = 1000,
+	limit: Optional[int] = None,
+	session: Optional[requests.Session] = None,
+	tiebreak: Optional[str] = "id",
+) -> Iterator[pd.DataFrame]:
+	"""Yield a table as DataFrame pages of at most `page_size` rows.
+
+	Pages use keyset pagination on (`order`, `tiebreak`) rather than offsets, so
+	each page is an index range scan and rows are never skipped or repeated. Pass
+	`tiebreak=None` when `order` alone is unique (e.g. `year`, the primary key of
+	`netzero_alignment`, which has no `id` column). A page shorter
+	than requested (e.g. PostgREST's max-rows cap) does not end the scan; only an
+	empty page does. The next page is requested while the caller consumes the
+	current one, so memory stays at about two pages regardless of history size.
+	`start`/`end` bound `order` to [start, end); `columns` projects via `select=`.
+	"""
 	url, key = get_supabase_env()
 	if not url or not key:
 		raise RuntimeError("Supabase URL/KEY not set in environment")
-	endpoint = f"{url}/rest/v1/{table}?select=*&order={order}.desc&limit={limit}"
-	headers = {
-		"apikey": key,
-		"Authorization": f"Bearer {key}",
+	session = session or supabase_session()
+	endpoint = f"{url}/rest/v1/{table}"
+	base = _keyset_params(columns, order, descending, start, end, tiebreak)
+	op = "lt" if descending else "gt"
+
+	def fetch_page(after: Optional[Tuple[Any, Any]], size: int) -> List[dict]:
+		params = list(base)
+		if after is not None:
+			value, tie = after
+			if tiebreak is None:
+				params.append((order, f"{op}.{value}"))
+			else:
+				params.append(("or", f'({order}.{op}."{value}",and({order}.eq."{value}",{tiebreak}.{op}.{tie}))'))
+		headers = {
+			"apikey": key,
+			"Authorization": f"Bearer {key}",
+			"Range-Unit": "items",
+			"Range": f"0-{size - 1}",
+		}
+		with span("supabase.get", table=table):
+			resp = session.get(endpoint, params=params, headers=headers, timeout=30)
+			resp.raise_for_status()
+			return resp.json()
+
+	remaining = limit
+	with ThreadPoolExecutor(max_workers=1) as prefetch:
+		pending = prefetch.submit(fetch_page, None, page_size if remaining is None else min(page_size, remaining))
+		while pending is not None:
+			rows = pending.result()
+			pending = None
+			if not rows:
+				return
+			if remaining is not None:
+				rows = rows[:remaining]
+				remaining -= len(rows)
+			if remaining is None or remaining > 0:
+				last = rows[-1]
+				size = page_size if remaining is None else min(page_size, remaining)
+				pending = prefetch.submit(fetch_page, (last[order], None if tiebreak is None else last.get(tiebreak)), size)
+			with span("supabase.parse", table=table):
+				df = pd.DataFrame(rows)
+			yield df if columns is None else df[list(columns)]
+
+
+def _split_range(start: datetime, end: datetime, parts: int) -> List[Tuple[datetime, datetime]]:
+	step = (end - start) / parts
+	edges = [start + step * i for i in range(parts)] + [end]
+	return list(zip(edges[:-1], edges[1:]))
+
+
+def fetch_supabase_table(
+	table: str,
+	limit: Optional[int] = 1000,
+	order: str = "timestamp",
+	columns: Optional[Sequence[str]] = None,
+	start: Optional[datetime | str] = None,
+	end: Optional[datetime | str] = None,
+	page_size: int = 1000,
+	workers: int = 1,
+	tiebreak: Optional[str] = "id",
+) -> pd.DataFrame:
+	"""Newest-first rows of `table` (at most `limit`; `None` for all rows in range).
+
+	Rows are read page by page (see `iter_supabase_table`, also for `tiebreak`). With `workers > 1` and
+	both `start` and `end` given, the range is split into slices fetched
+	concurrently over the shared session.
+	"""
+	with span("fetch_supabase_table", table=table):
+		if workers > 1 and limit is None and start is not None and end is not None:
+			slices = _split_range(_as_utc(start), _as_utc(end), workers)
+
+			def fetch_slice(bounds: Tuple[datetime, datetime]) -> List[pd.DataFrame]:
+				return list(iter_supabase_table(table, columns, bounds[0], bounds[1], order, True, page_size, tiebreak=tiebreak))
+
+			with ThreadPoolExecutor(max_workers=workers) as pool:
+				pages = [page for chunk in reversed(list(pool.map(fetch_slice, slices))) for page in chunk]
+		else:
+			pages = list(iter_supabase_table(table, columns, start, end, order, True, page_size, limit, tiebreak=tiebreak))
+		if not pages:
+			return pd.DataFrame(columns=list(columns) if columns is not None else None)
+		return pd.concat(pages, ignore_index=True)
+
+
+def read_csv_table(
+	path: str,
+	start: Optional[datetime | str] = None,
+	end: Optional[datetime | str] = None,
+	columns: Optional[Sequence[str]] = None,
+	table: Optional[str] = None,
+	engine: Optional[str] = None,
+	cache: bool = True,
+) -> pd.DataFrame:
+	"""Read a simulator CSV, optionally keeping only `columns` and `timestamp` in [start, end).
+
+	Columns are typed from `simulator.models` (`table` defaults to the file
+	name) and `timestamp` is returned as UTC datetimes. With `cache`, repeat
+	reads of an unchanged file come from its memory-mapped sidecar (see
+	`analysis.csv_store`).
+	"""
+	if cache:
+		return read_csv_cached(path, table, columns, _as_utc(start), _as_utc(end), engine)
+	if start is None and end is None:
+		return read_typed_csv(path, table, columns, engine)
+	usecols = None if columns is None else list(dict.fromkeys([*columns, "timestamp"]))
+	df = read_typed_csv(path, table, usecols, engine)
+	mask = pd.Series(True, index=df.index)
+	if start is not None:
+		mask &= df["timestamp"] >= _as_utc(start)
+	if end is not None:
+		mask &= df["timestamp"] < _as_utc(end)
+	df = df.loc[mask].reset_index(drop=True)
+	return df if columns is None else df[list(columns)]
+
+
+def fetch_range(
+	table: str,
+	start: Optional[datetime | str] = None,
+	end: Optional[datetime | str] = None,
+	columns: Optional[Sequence[str]] = None,
+	source: str = "supabase",
+	csv_dir: str = "data",
+	parquet_dir: str = "data/parquet",
+) -> pd.DataFrame:
+	"""Rows of a time-series table with `timestamp` in [start, end), oldest first.
+
+	The window is pushed down to the source: `timestamp=gte./lt.` filters for
+	Supabase (served by the `idx_*_ts` indexes), partition pruning for Parquet,
+	and a row filter for CSV. Open-ended bounds may be `None`.
+	"""
+	if source == "supabase":
+		pages = list(iter_supabase_table(table, columns, start, end))
+		if not pages:
+			return pd.DataFrame(columns=list(columns) if columns is not None else None)
+		return pd.concat(pages, ignore_index=True)
+	if source == "parquet":
+		df = read_parquet_table(parquet_dir, table, start, end, list(columns) if columns is not None else None)
+	elif source == "csv":
+		path = os.path.join(csv_dir, f"{table}.csv")
+		if not os.path.isfile(path):
+			return pd.DataFrame(columns=list(columns) if columns is not None else None)
+		df = read_csv_table(path, start, end, columns)
+	else:
+		raise ValueError(f"Unknown source: {source!r} (expected supabase, csv or parquet)")
+	return df.sort_values("timestamp", kind="stable", ignore_index=True) if "timestamp" in df else df
+
+
+def latest_timestamp(
+	table: str,
+	source: str = "supabase",
+	csv_dir: str = "data",
+	parquet_dir: str = "data/parquet",
+) -> Optional[datetime]:
+	"""Newest `timestamp` in a table, or None when it is empty."""
+	if source == "supabase":
+		df = fetch_supabase_table(table, limit=1, columns=["timestamp"])
+	else:
+		df = fetch_range(table, columns=["timestamp"], source=source, csv_dir=csv_dir, parquet_dir=parquet_dir)
+	if df.empty:
+		return None
+	return _as_utc(pd.to_datetime(df["timestamp"], utc=True, format="ISO8601").max())
+
+
+def fetch_rollup(
+	grain: str,
+	start: Optional[datetime | str] = None,
+	end: Optional[datetime | str] = None,
+	source: str = "supabase",
+	csv_dir: str = "data",
+	parquet_dir: str = "data/parquet",
+) -> pd.DataFrame:
+	"""Hourly or daily rollup rows with bucket start in [start, end), one row per bucket.
+
+	The simulator may write a bucket in several partial rows; they are merged here.
+	"""
+	from simulator.rollups import ROLLUP_TABLES, merge_rollup_frame
+
+	df = fetch_range(ROLLUP_TABLES[grain], start, end, source=source, csv_dir=csv_dir, parquet_dir=parquet_dir)
+	if df.empty:
+		return df
+	for column in ("timestamp", "first_sample", "last_sample"):
+		df[column] = pd.to_datetime(df[column], utc=True, format="ISO8601")
+	return merge_rollup_frame(df.drop(columns="id", errors="ignore"))
+
+
+@dataclass(frozen=True)
+class TableRequest:
+	"""One table for `fetch_tables`: a time window (`limit=None`) or the newest `limit` rows."""
+	table: str
+	start: Optional[datetime] = None
+	end: Optional[datetime] = None
+	columns: Optional[Tuple[str, ...]] = None
+	limit: Optional[int] = None
+	order: str = "timestamp"
+	# None when `order` is unique on its own (see `iter_supabase_table`)
+	tiebreak: Optional[str] = "id"
+
+
+def fetch_request(req: TableRequest) -> pd.DataFrame:
+	if req.limit is None:
+		return fetch_range(req.table, req.start, req.end, req.columns)
+	return fetch_supabase_table(
+		req.table, limit=req.limit, order=req.order, columns=req.columns, start=req.start, end=req.end, tiebreak=req.tiebreak
+	)
+
+
+def fetch_tables(
+	table_requests: Sequence[TableRequest],
+	fetch: Callable[[TableRequest], pd.DataFrame] = fetch_request,
+) -> Dict[str, pd.DataFrame]:
+	"""Fetch several tables concurrently; returns frames keyed by table name.
+
+	All requests share the pooled session, so total latency is that of the
+	slowest table rather than the sum.
+	"""
+	if not table_requests:
+		return {}
+	with ThreadPoolExecutor(max_workers=len(table_requests)) as pool:
+		frames = list(pool.map(fetch, table_requests))
+	return {req.table: frame for req, frame in zip(table_requests, frames)}
+
+
+def _as_utc(value: Optional[datetime | str]) -> Optional[datetime]:
+	if value is None:
+		return None
+	ts = pd.Timestamp(value)
+	return (ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")).to_pydatetime()
+
+
+def _load_segment_bounds(table_dir: str) -> dict:
+	"""Per-segment (min, max) from a compaction manifest, keyed by relative path."""
+	from simulator.compaction import MANIFEST_NAME
+
+	path = os.path.join(table_dir, MANIFEST_NAME)
+	if not os.path.isfile(path):
+		return {}
+	with open(path, encoding="utf-8") as f:
+		manifest = json.load(f)
+	if manifest.get("key") != "timestamp":
+		return {}
+	return {
+		seg["path"]: (_as_utc(seg["min"]), _as_utc(seg["max"]))
+		for seg in manifest.get("segments", [])
+		if seg.get("min") is not None
 	}
-	resp = requests.get(endpoint, headers=headers, timeout=30)
-	resp.raise_for_status()
-	data = resp.json()
-	return pd.DataFrame(data)
 
 
-def read_csv_table(path: str) -> pd.DataFrame:
-	return pd.read_csv(path)
+def list_parquet_files(base_dir: str, table: str, start=None, end=None) -> List[str]:
+	"""Parquet files of `table` whose partition intersects [start, end).
+
+	Partitions are pruned by directory name; within a partition, segments listed
+	in the compaction manifest are further skipped by their min/max timestamp.
+	"""
+	from simulator.parquet_storage import partition_bounds
+
+	start, end = _as_utc(start), _as_utc(end)
+	table_dir = os.path.join(base_dir, table)
+	if not os.path.isdir(table_dir):
+		return []
+	segment_bounds = _load_segment_bounds(table_dir) if (start or end) else {}
+	files = []
+	for name in sorted(os.listdir(table_dir)):
+		bounds = partition_bounds(name)
+		if bounds is None:
+			continue
+		# Partition pruning: skip directories entirely outside the range
+		if (start is not None and bounds[1] <= start) or (end is not None and bounds[0] >= end):
+			continue
+		part_dir = os.path.join(table_dir, name)
+		for f in sorted(os.listdir(part_dir)):
+			if not f.endswith(".parquet"):
+				continue
+			seg = segment_bounds.get(f"{name}/{f}")
+			if seg is not None and ((start is not None and seg[1] < start) or (end is not None and seg[0] >= end)):
+				continue
+			files.append(os.path.join(part_dir, f))
+	return files
+
+
+def read_parquet_table(
+	base_dir: str,
+	table: str,
+	start: Optional[datetime | str] = None,
+	end: Optional[datetime | str] = None,
+	columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+	"""Read a partitioned Parquet table written by the simulator (output_mode=parquet).
+
+	Only partitions intersecting [start, end) are opened, only `columns` are
+	decoded, and row groups are filtered on `timestamp` using Parquet statistics.
+	"""
+	from simulator.parquet_storage import partition_column, require_pyarrow
+
+	require_pyarrow()
+	import pyarrow.dataset as ds
+
+	files = list_parquet_files(base_dir, table, start, end)
+	if not files:
+		return pd.DataFrame(columns=columns)
+	dataset = ds.dataset(files, format="parquet")
+	expr = None
+	if partition_column(table) == "timestamp":
+		start, end = _as_utc(start), _as_utc(end)
+		if start is not None:
+			expr = ds.field("timestamp") >= start
+		if end is not None:
+			upper = ds.field("timestamp") < end
+			expr = upper if expr is None else expr & upper
+	return dataset.to_table(columns=columns, filter=expr).to_pandas()
 
 
 
@@ -0,0 +1,97 @@
+"""Downsampling of time series for plotting.
+
+- `lttb_indices`: Largest-Triangle-Three-Buckets, which keeps the visual shape of
+  a line (peaks and dips) with a fixed number of points.
+- `bucket_aggregate`: per-bucket mean/min/max of several columns at shared x
+  positions, which keeps stacked areas consistent (every series is reduced over
+  the same buckets).
+
+Buckets hold equal numbers of consecutive points. Bucket statistics are computed
+with `np.*.reduceat`; LTTB's only sequential step (each bucket's choice depends on
+the previous one) is a loop over buckets with a vectorized argmax inside.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+AGGREGATES = ("mean", "min", "max")
+
+
+def _bucket_edges(n: int, n_buckets: int) -> np.ndarray:
+	"""Start offsets of `n_buckets` near-equal buckets over `n` points, plus `n`."""
+	return np.linspace(0, n, n_buckets + 1).astype(np.int64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+	"""Indices of the `n_out` points LTTB keeps (first and last are always kept)."""
+	x = np.asarray(x, dtype=np.float64)
+	y = np.asarray(y, dtype=np.float64)
+	n = len(x)
+	if n_out >= n or n_out < 3:
+		return np.arange(n)
+	# Interior points 1..n-2 split into n_out-2 buckets
+	edges = 1 + _bucket_edges(n - 2, n_out - 2)
+	counts = np.diff(edges)
+	avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+	avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+	# Third vertex of each bucket's triangle: the next bucket's average (last point for the final bucket)
+	next_x = np.append(avg_x[1:], x[-1])
+	next_y = np.append(avg_y[1:], y[-1])
+
+	out = np.empty(n_out, dtype=np.int64)
+	out[0], out[-1] = 0, n - 1
+	a = 0
+	for i in range(n_out - 2):
+		lo, hi = edges[i], edges[i + 1]
+		ax, ay = x[a], y[a]
+		# Twice the triangle area; the constant factor does not change the argmax
+		area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+		a = lo + int(np.argmax(area))
+		out[i + 1] = a
+	return out
+
+
+def bucket_aggregate(values: np.ndarray, n_buckets: int, how: str = "mean") -> np.ndarray:
+	"""Reduce each column of `values` (n, k) to `n_buckets` rows with `how`."""
+	if how not in AGGREGATES:
+		raise ValueError(f"Unknown aggregate: {how!r} (expected one of {AGGREGATES})")
+	values = np.asarray(values, dtype=np.float64)
+	edges = _bucket_edges(len(values), min(n_buckets, len(values)))
+	starts = edges[:-1]
+	if how == "mean":
+		return np.add.reduceat(values, starts, axis=0) / np.diff(edges).reshape((-1,) + (1,) * (values.ndim - 1))
+	return (np.minimum if how == "min" else np.maximum).reduceat(values, starts, axis=0)
+
+
+def _time_axis(values: pd.Series) -> np.ndarray:
+	if pd.api.types.is_numeric_dtype(values):
+		return values.to_numpy(dtype=np.float64)
+	ts = pd.to_datetime(values, utc=True, format="ISO8601")
+	return ts.astype("int64").to_numpy(dtype=np.float64)
+
+
+def downsample_lttb(df: pd.DataFrame, x: str, y: str, n_out: int) -> pd.DataFrame:
+	"""Rows of `df` (sorted by `x`) selected by LTTB on column `y`."""
+	df = df.dropna(subset=[y])
+	if len(df) <= n_out:
+		return df
+	return df.iloc[lttb_indices(_time_axis(df[x]), df[y].to_numpy(), n_out)]
+
+
+def downsample_buckets(df: pd.DataFrame, x: str, columns: Sequence[str], n_buckets: int, how: str = "mean") -> pd.DataFrame:
+	"""One row per bucket: the bucket's first `x` and the `how` of each column.
+
+	Meant for stacked charts, where every series has to share the same x values.
+	"""
+	if len(df) <= n_buckets:
+		return df
+	columns = list(columns)
+	edges = _bucket_edges(len(df), n_buckets)
+	reduced = bucket_aggregate(df[columns].to_numpy(dtype=np.float64), n_buckets, how)
+	out = pd.DataFrame(reduced, columns=columns)
+	out.insert(0, x, df[x].iloc[edges[:-1]].to_numpy())
+	return out
@@ -1,41 +1,282 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Dict
+import json
+import os
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
 import numpy as np
 import pandas as pd
 
+try:
+	from analysis.alignment import align_frames, infer_step, to_epoch_us
+	from analysis.instrumentation import timed
+	from analysis.regression import SlidingWindowSlope, least_squares_slope
+except ModuleNotFoundError:
+	from alignment import align_frames, infer_step, to_epoch_us  # type: ignore
+	from instrumentation import timed  # type: ignore
+	from regression import SlidingWindowSlope, least_squares_slope  # type: ignore
+
+# Generation and CO2 rows on the same grid step are paired when no further apart than this
+MATCH_TOLERANCE = pd.Timedelta("20min")
+
 
 def _to_utc(dt: pd.Series) -> pd.Series:
-	if np.issubdtype(dt.dtype, np.datetime64):
+	if pd.api.types.is_datetime64_any_dtype(dt):
 		return pd.to_datetime(dt, utc=True)
 	return pd.to_datetime(dt, utc=True, errors="coerce")
 
 
+def _first_after(df: pd.DataFrame, ts: pd.Timestamp, inclusive: bool = False) -> int:
+	"""Position of the first row of `df` (sorted by timestamp) later than `ts`.
+
+	Binary search that parses only the O(log n) timestamps it probes, so the
+	new tail of a long frame is found without converting the whole column.
+	"""
+	values = df["timestamp"]
+	lo, hi = 0, len(df)
+	while lo < hi:
+		mid = (lo + hi) // 2
+		probe = pd.Timestamp(values.iloc[mid])
+		probe = probe.tz_localize("UTC") if probe.tzinfo is None else probe
+		if probe > ts or (inclusive and probe == ts):
+			hi = mid
+		else:
+			lo = mid + 1
+	return lo
+
+
+def _timestamp_at(df: pd.DataFrame, i: int) -> pd.Timestamp:
+	return _to_utc(df["timestamp"].iloc[[i]]).iloc[0]
+
+
+def _rows_since(df: pd.DataFrame, start: pd.Timestamp, end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+	"""Rows of `df` (sorted by timestamp) in [start, end), parsing only their timestamps."""
+	rows = df.iloc[_first_after(df, start, inclusive=True):len(df) if end is None else _first_after(df, end, inclusive=True)]
+	return rows.assign(timestamp=_to_utc(rows["timestamp"]))
+
+
+class YtdBudgetTracker:
+	"""Running year-to-date emissions integral for the carbon budget.
+
+	Same arithmetic as the batch computation in `compute_goal_tracker`: both
+	series are aligned on the step grid (`analysis.alignment`), each matched
+	step is weighted by the time since the previous one, and the first step of
+	the year gets the median step. The grid step is inferred from the first
+	rows and kept with the state. Only
+	rows newer than `checkpoint` are processed, and the state round-trips through
+	`save()` / `load()` so a restart resumes where it left off.
+
+	A generation row is integrated once CO2 data reaches its timestamp; rows
+	arriving later can then never be a closer match.
+	"""
+
+	def __init__(self, year: Optional[int] = None):
+		self.year = year
+		# Timestamp of the newest generation row consumed
+		self.checkpoint: Optional[pd.Timestamp] = None
+		self.last_matched: Optional[pd.Timestamp] = None
+		self.step: Optional[timedelta] = None
+		self.rows = 0
+		# Tons from rows with a known step, and sum(MW * g/kWh) of rows awaiting the median step
+		self.tons_stepped = 0.0
+		self.unstepped_weight = 0.0
+		# Step length (seconds) -> count, for the median
+		self.steps: Counter = Counter()
+
+	def _reset(self, year: int) -> None:
+		self.__init__(year)
+
+	def median_step_hours(self) -> float:
+		total = sum(self.steps.values())
+		if total == 0:
+			return 0.25
+		ordered = sorted(self.steps.items())
+		cum = np.cumsum([n for _, n in ordered])
+		lo = ordered[int(np.searchsorted(cum, (total + 1) // 2))][0]
+		hi = ordered[int(np.searchsorted(cum, total // 2 + 1))][0]
+		return (lo + hi) / 2.0 / 3600.0
+
+	@property
+	def ytd_tons(self) -> float:
+		return self.tons_stepped + self.unstepped_weight * self.median_step_hours() * 1e-3
+
+	def pending_since(self) -> pd.Timestamp:
+		"""Generation rows after this instant have not been integrated yet."""
+		if self.checkpoint is not None:
+			return self.checkpoint
+		return pd.Timestamp(year=self.year, month=1, day=1, tz="UTC") - pd.Timedelta(microseconds=1)
+
+	@timed("goal_tracker.budget_update")
+	def update(self, df_co2: pd.DataFrame, df_gen: pd.DataFrame, now: Optional[datetime] = None) -> int:
+		"""Integrate generation rows newer than the checkpoint. Returns rows consumed.
+
+		Both frames must be sorted by timestamp; they may hold older rows (e.g. a
+		whole chart window), which are skipped without being parsed.
+		"""
+		year = (now or datetime.now(timezone.utc)).year
+		if self.year != year:
+			self._reset(year)
+		if df_co2.empty or df_gen.empty:
+			return 0
+		year_end = pd.Timestamp(year=year + 1, month=1, day=1, tz="UTC")
+		gen = df_gen.iloc[_first_after(df_gen, self.pending_since()):_first_after(df_gen, year_end, inclusive=True)]
+		if gen.empty:
+			return 0
+		gen = gen[["timestamp", "total_mw"]].assign(timestamp=_to_utc(gen["timestamp"]))
+		co2 = df_co2.iloc[_first_after(df_co2, gen["timestamp"].iloc[0] - MATCH_TOLERANCE, inclusive=True):]
+		co2 = co2[["timestamp", "co2_intensity_g_per_kwh"]].assign(timestamp=_to_utc(co2["timestamp"]))
+		if co2.empty:
+			return 0
+		# Only rows the CO2 series has caught up with are final
+		gen = gen[gen["timestamp"] <= co2["timestamp"].iloc[-1]]
+		if gen.empty:
+			return 0
+		if self.step is None:
+			self.step = infer_step(to_epoch_us(gen["timestamp"] if len(gen) > 1 else co2["timestamp"]))
+		merged = align_frames(gen, co2, step=self.step, tolerance=MATCH_TOLERANCE.to_pytimedelta())
+		merged = merged.dropna(subset=["co2_intensity_g_per_kwh", "total_mw"])
+		if self.last_matched is not None:
+			# A late re-write of a step already integrated
+			merged = merged[merged["timestamp"] > self.last_matched]
+		if not merged.empty:
+			ts = merged["timestamp"]
+			previous = ts.shift(1)
+			if self.last_matched is not None:
+				previous.iloc[0] = self.last_matched
+			dt_seconds = (ts - previous).dt.total_seconds().fillna(0).to_numpy()
+			weight = (merged["total_mw"] * merged["co2_intensity_g_per_kwh"]).to_numpy(dtype=np.float64)
+			stepped = dt_seconds > 0
+			self.tons_stepped += float((weight[stepped] * dt_seconds[stepped]).sum()) / 3600.0 * 1e-3
+			self.unstepped_weight += float(weight[~stepped].sum())
+			self.steps.update(dt_seconds[stepped].tolist())
+			self.rows += len(merged)
+			self.last_matched = ts.iloc[-1]
+		self.checkpoint = gen["timestamp"].iloc[-1]
+		return len(gen)
+
+	def catch_up(self, fetch: Callable[[str, Any, Any], pd.DataFrame], until: datetime, now: Optional[datetime] = None) -> int:
+		"""Integrate everything before `until` via `fetch(table, start, end)` (e.g. `data_access.fetch_range`).
+
+		Used when the checkpoint is older than the frames at hand: after the
+		first start of the year, or after a long downtime.
+		"""
+		year = (now or datetime.now(timezone.utc)).year
+		if self.year != year:
+			self._reset(year)
+		since = self.pending_since()
+		if pd.Timestamp(until) <= since:
+			return 0
+		df_gen = fetch("generation_mix", since.to_pydatetime(), until)
+		df_co2 = fetch("co2_intensity", (since - MATCH_TOLERANCE).to_pydatetime(), until + MATCH_TOLERANCE.to_pytimedelta())
+		return self.update(df_co2, df_gen, now=now)
+
+	def budget(self, annual_target_tons: float, now: Optional[datetime] = None) -> Optional[Dict[str, float]]:
+		"""The `budget` block of `compute_goal_tracker`, or None before two rows are integrated."""
+		if self.rows < 2 or not annual_target_tons:
+			return None
+		now_ts = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz="UTC")
+		start_year = pd.Timestamp(year=self.year, month=1, day=1, tz="UTC")
+		co2_ytd_tons = self.ytd_tons
+		days_elapsed = max(1.0, (now_ts - start_year).total_seconds() / 86400.0)
+		ytd_budget_tons = float(annual_target_tons * (days_elapsed / 365.0))
+		daily_avg_tons = co2_ytd_tons / days_elapsed
+		days_ahead = (ytd_budget_tons - co2_ytd_tons) / daily_avg_tons if daily_avg_tons > 0 else 0.0
+		return {
+			"ytd_tons": round(co2_ytd_tons, 0),
+			"ytd_budget_tons": round(ytd_budget_tons, 0),
+			"days_ahead": round(days_ahead, 1),
+		}
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			"year": self.year,
+			"checkpoint": None if self.checkpoint is None else self.checkpoint.isoformat(),
+			"last_matched": None if self.last_matched is None else self.last_matched.isoformat(),
+			"step_seconds": None if self.step is None else self.step.total_seconds(),
+			"rows": self.rows,
+			"tons_stepped": self.tons_stepped,
+			"unstepped_weight": self.unstepped_weight,
+			"steps": {str(k): v for k, v in self.steps.items()},
+		}
+
+	@classmethod
+	def from_dict(cls, state: Dict[str, Any]) -> "YtdBudgetTracker":
+		tracker = cls(state.get("year"))
+		tracker.checkpoint = pd.Timestamp(state["checkpoint"]) if state.get("checkpoint") else None
+		tracker.last_matched = pd.Timestamp(state["last_matched"]) if state.get("last_matched") else None
+		tracker.step = timedelta(seconds=state["step_seconds"]) if state.get("step_seconds") else None
+		tracker.rows = int(state.get("rows", 0))
+		tracker.tons_stepped = float(state.get("tons_stepped", 0.0))
+		tracker.unstepped_weight = float(state.get("unstepped_weight", 0.0))
+		tracker.steps = Counter({float(k): int(v) for k, v in state.get("steps", {}).items()})
+		return tracker
+
+	def save(self, path: str) -> None:
+		if os.path.dirname(path):
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+		tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(self.to_dict(), f)
+		os.replace(tmp, path)
+
+	@classmethod
+	def load(cls, path: str) -> "YtdBudgetTracker":
+		"""The saved tracker, or an empty one when `path` does not exist yet."""
+		if not os.path.isfile(path):
+			return cls()
+		with open(path, "r", encoding="utf-8") as f:
+			return cls.from_dict(json.load(f))
+
+
+@timed("compute_goal_tracker")
 def compute_goal_tracker(
 	df_co2: pd.DataFrame,
 	df_gen: pd.DataFrame,
 	df_nz: pd.DataFrame,
 	base_year_from_data: bool = True,
+	budget_tracker: Optional[YtdBudgetTracker] = None,
+	velocity_estimator: Optional[SlidingWindowSlope] = None,
+	now: Optional[datetime] = None,
 ) -> Dict[str, object]:
 	"""
 	Returns a dict with:
 	- rai_pct: Real-time Alignment Index (%)
 	- budget: { ytd_tons, ytd_budget_tons, days_ahead }
 	- velocity: { v_actual_g_per_kwh_per_yr, v_required_g_per_kwh_per_yr, on_track }
+
+	With `budget_tracker`, the budget comes from its running integral (after
+	feeding it the new rows of these frames) instead of integrating the frames.
+	Likewise `velocity_estimator` (a 7-day `SlidingWindowSlope`) replaces the fit
+	over the frames' last 7 days with its incrementally maintained slope.
+	`now` (default: the current time) fixes the current year and the budget
+	date, e.g. for reproducible benchmarks.
+
+	The tracker needs both frames sorted by timestamp, so with it they are
+	used as given: only the rows read (the base year, the last 7 days, the
+	ends) are parsed, instead of copying and converting both frames per call.
 	"""
 	res: Dict[str, object] = {}
 	if df_co2.empty or df_gen.empty:
 		return {"error": "insufficient_data"}
 
 	# Timestamps
-	df_co2 = df_co2.copy()
-	df_gen = df_gen.copy()
-	df_co2["timestamp"] = _to_utc(df_co2["timestamp"])  # type: ignore[index]
-	df_gen["timestamp"] = _to_utc(df_gen["timestamp"])  # type: ignore[index]
+	if budget_tracker is None:
+		df_co2 = df_co2.copy()
+		df_gen = df_gen.copy()
+		df_co2["timestamp"] = _to_utc(df_co2["timestamp"])  # type: ignore[index]
+		df_gen["timestamp"] = _to_utc(df_gen["timestamp"])  # type: ignore[index]
+		co2_sorted = df_co2.sort_values("timestamp")
+		first_time = min(df_co2["timestamp"].min(), df_gen["timestamp"].min())
+		end_time = co2_sorted["timestamp"].max()
+	else:
+		co2_sorted = df_co2
+		first_time = min(_timestamp_at(df_co2, 0), _timestamp_at(df_gen, 0))
+		end_time = _timestamp_at(df_co2, -1)
 
 	# Current context
-	now = datetime.now(timezone.utc)
+	now = now or datetime.now(timezone.utc)
 	current_year = now.year
 
 	# Base year
@@ -43,7 +284,7 @@ def compute_goal_tracker(
 		if not df_nz.empty and "year" in df_nz:
 			base_year = int(df_nz["year"].min())
 		else:
-			base_year = int(min(df_co2["timestamp"].min(), df_gen["timestamp"].min()).year)
+			base_year = int(first_time.year)
 	else:
 		base_year = current_year
 
@@ -55,14 +296,17 @@ def compute_goal_tracker(
 			annual_target_tons = float(row.iloc[0]["target_emissions_mt"]) * 1_000_000.0
 
 	# Compute trailing intensity stats
-	co2_sorted = df_co2.sort_values("timestamp")
 	I_latest = float(co2_sorted.iloc[-1]["co2_intensity_g_per_kwh"])  # g/kWh
 
 	# Estimate base intensity from base_year window
 	I_base = I_latest
-	mask_base = co2_sorted["timestamp"].dt.year == base_year
-	if mask_base.any():
-		I_base = float(co2_sorted.loc[mask_base, "co2_intensity_g_per_kwh"].median())
+	if budget_tracker is None:
+		base_values = co2_sorted.loc[co2_sorted["timestamp"].dt.year == base_year, "co2_intensity_g_per_kwh"]
+	else:
+		base_start = pd.Timestamp(year=base_year, month=1, day=1, tz="UTC")
+		base_values = _rows_since(co2_sorted, base_start, base_start.replace(year=base_year + 1))["co2_intensity_g_per_kwh"]
+	if not base_values.empty:
+		I_base = float(base_values.median())
 
 	# Estimate target intensity for current year from annual targets (proportional assumption)
 	I_target = None
@@ -84,61 +328,67 @@ def compute_goal_tracker(
 	res["rai_pct"] = None if rai_pct is None else round(rai_pct, 1)
 
 	# YTD Carbon Budget Tracker
-	this_year_mask = df_gen["timestamp"].dt.year == current_year
-	df_gen_y = df_gen.loc[this_year_mask].sort_values("timestamp")
-	if len(df_gen_y) >= 2 and annual_target_tons:
-		# Integrate emissions using pairwise time deltas
-		merged = pd.merge_asof(
-			left=df_gen_y[["timestamp", "total_mw"]].sort_values("timestamp"),
-			right=co2_sorted[["timestamp", "co2_intensity_g_per_kwh"]].sort_values("timestamp"),
-			on="timestamp",
-			direction="nearest",
-			tolerance=pd.Timedelta("20min"),
-		)
-		merged = merged.dropna(subset=["co2_intensity_g_per_kwh", "total_mw"]).copy()
-		if len(merged) >= 2:
-			merged["dt_hours"] = merged["timestamp"].diff().dt.total_seconds().fillna(0) / 3600.0
-			# Replace first 0 with median step if present
-			if (merged["dt_hours"] == 0).any():
-				step = merged["dt_hours"].replace(0, np.nan).median()
-				merged.loc[merged["dt_hours"] == 0, "dt_hours"] = step if pd.notnull(step) else 0.25
-			merged["mwh"] = merged["total_mw"] * merged["dt_hours"]
-			merged["tons"] = merged["mwh"] * merged["co2_intensity_g_per_kwh"] * 1e-3
-			co2_ytd_tons = float(merged["tons"].sum())
-			# Linear budget allocation over year
-			start_year = pd.Timestamp(year=current_year, month=1, day=1, tz="UTC")
-			days_elapsed = max(1.0, (pd.Timestamp.now(tz="UTC") - start_year).total_seconds() / 86400.0)
-			ytd_budget_tons = float(annual_target_tons * (days_elapsed / 365.0))
-			daily_avg_tons = co2_ytd_tons / days_elapsed
-			days_ahead = (ytd_budget_tons - co2_ytd_tons) / daily_avg_tons if daily_avg_tons > 0 else 0.0
-			res["budget"] = {
-				"ytd_tons": round(co2_ytd_tons, 0),
-				"ytd_budget_tons": round(ytd_budget_tons, 0),
-				"days_ahead": round(days_ahead, 1),
-			}
+	if budget_tracker is not None:
+		budget_tracker.update(co2_sorted, df_gen, now=now)
+		budget = budget_tracker.budget(annual_target_tons, now=now) if annual_target_tons else None
+		if budget is not None:
+			res["budget"] = budget
+	elif annual_target_tons:
+		df_gen_y = df_gen.loc[df_gen["timestamp"].dt.year == current_year].sort_values("timestamp")
+		if len(df_gen_y) >= 2:
+			# Integrate emissions using pairwise time deltas between grid-aligned steps
+			merged = align_frames(
+				df_gen_y[["timestamp", "total_mw"]],
+				co2_sorted[["timestamp", "co2_intensity_g_per_kwh"]],
+				tolerance=MATCH_TOLERANCE.to_pytimedelta(),
+			)
+			merged = merged.dropna(subset=["co2_intensity_g_per_kwh", "total_mw"]).copy()
+			if len(merged) >= 2:
+				merged["dt_hours"] = merged["timestamp"].diff().dt.total_seconds().fillna(0) / 3600.0
+				# Replace first 0 with median step if present
+				if (merged["dt_hours"] == 0).any():
+					step = merged["dt_hours"].replace(0, np.nan).median()
+					merged.loc[merged["dt_hours"] == 0, "dt_hours"] = step if pd.notnull(step) else 0.25
+				merged["mwh"] = merged["total_mw"] * merged["dt_hours"]
+				merged["tons"] = merged["mwh"] * merged["co2_intensity_g_per_kwh"] * 1e-3
+				co2_ytd_tons = float(merged["tons"].sum())
+				# Linear budget allocation over year
+				start_year = pd.Timestamp(year=current_year, month=1, day=1, tz="UTC")
+				days_elapsed = max(1.0, (pd.Timestamp(now) - start_year).total_seconds() / 86400.0)
+				ytd_budget_tons = float(annual_target_tons * (days_elapsed / 365.0))
+				daily_avg_tons = co2_ytd_tons / days_elapsed
+				days_ahead = (ytd_budget_tons - co2_ytd_tons) / daily_avg_tons if daily_avg_tons > 0 else 0.0
+				res["budget"] = {
+					"ytd_tons": round(co2_ytd_tons, 0),
+					"ytd_budget_tons": round(ytd_budget_tons, 0),
+					"days_ahead": round(days_ahead, 1),
+				}
 
 	# Decarbonization velocity vs required (to hit this year's target by year-end)
 	vel = {}
-	if len(co2_sorted) >= 10 and I_target:
+	slope_per_day = None
+	if velocity_estimator is not None:
+		velocity_estimator.update(co2_sorted, "co2_intensity_g_per_kwh")
+		slope_per_day = velocity_estimator.slope()
+	elif len(co2_sorted) >= 10:
 		# Fit slope over trailing window (last 7 days or all if shorter)
-		end_time = co2_sorted["timestamp"].max()
 		start_time = end_time - pd.Timedelta("7D")
-		w = co2_sorted[co2_sorted["timestamp"] >= start_time]
+		w = co2_sorted[co2_sorted["timestamp"] >= start_time] if budget_tracker is None else _rows_since(co2_sorted, start_time)
 		if len(w) >= 10:
 			# Convert time to days since start
 			t_days = (w["timestamp"] - w["timestamp"].min()).dt.total_seconds() / 86400.0
-			y = w["co2_intensity_g_per_kwh"].astype(float)
-			slope_per_day = float(np.polyfit(t_days, y, 1)[0])  # g/kWh per day
-			v_actual = -slope_per_day * 365.0  # g/kWh per year (positive means decreasing)
-			# Required drop to reach I_target by year-end
-			days_left = max(1.0, (pd.Timestamp(year=current_year + 1, month=1, day=1, tz="UTC") - end_time).total_seconds() / 86400.0)
-			v_required = max(0.0, (I_latest - I_target) * (365.0 / days_left))
-			vel = {
-				"v_actual_g_per_kwh_per_yr": round(v_actual, 1),
-				"v_required_g_per_kwh_per_yr": round(v_required, 1),
-				"on_track": bool(v_actual >= v_required),
-			}
-			res["velocity"] = vel
+			slope_per_day = least_squares_slope(t_days.to_numpy(), w["co2_intensity_g_per_kwh"].to_numpy())  # g/kWh per day
+	if slope_per_day is not None and I_target:
+		v_actual = -slope_per_day * 365.0  # g/kWh per year (positive means decreasing)
+		# Required drop to reach I_target by year-end
+		days_left = max(1.0, (pd.Timestamp(year=current_year + 1, month=1, day=1, tz="UTC") - end_time).total_seconds() / 86400.0)
+		v_required = max(0.0, (I_latest - I_target) * (365.0 / days_left))
+		vel = {
+			"v_actual_g_per_kwh_per_yr": round(v_actual, 1),
+			"v_required_g_per_kwh_per_yr": round(v_required, 1),
+			"on_track": bool(v_actual >= v_required),
+		}
+		res["velocity"] = vel
 
 	# 2050 pathway ETA and series for UI
 	pathway: Dict[str, object] = {}
@@ -0,0 +1,22 @@
+"""Timing spans for the analysis modules.
+
+`span` and `timed` are those of `simulator.telemetry` when the repo root is
+importable. When `analysis/` is on sys.path on its own there is no registry to
+record into, so they become no-ops and the analysis code runs unchanged.
+"""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import Any, Callable
+
+try:
+	from simulator.telemetry import span, timed
+except ModuleNotFoundError:
+	def span(name: str, **labels: Any):  # type: ignore[no-redef]
+		return nullcontext()
+
+	def timed(name: str) -> Callable:  # type: ignore[no-redef]
+		return lambda fn: fn
+
+__all__ = ["span", "timed"]
@@ -1,38 +1,207 @@
 from __future__ import annotations
 
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
 import pandas as pd
 
+try:
+	from analysis.alignment import align_frames
+	from analysis.sketches import KllSketch, RunningStats
+except ModuleNotFoundError:
+	from alignment import align_frames  # type: ignore
+	from sketches import KllSketch, RunningStats  # type: ignore
+
+QUANTILES = {"p50": 0.5, "p95": 0.95}
+
+_RENEWABLES = ["hydro_mw", "wind_mw", "solar_mw"]
+
+
+def _newest(current: Optional[str], timestamps: pd.Series) -> Optional[str]:
+	"""Latest timestamp seen so far, kept as an ISO string so states stay JSON."""
+	if timestamps.empty:
+		return current
+	latest = pd.to_datetime(timestamps, utc=True, format="ISO8601").max()
+	if current is not None and pd.Timestamp(current) >= latest:
+		return current
+	return latest.isoformat()
+
+
+class Co2Summary:
+	"""Streaming version of `summarize_co2`.
+
+	Feed it frames (`update`) or row dicts (`update_rows`) as they arrive, merge
+	summaries built by different workers, and persist it with `to_dict()`.
+	`latest_timestamp` is the newest row seen, from which to resume reading.
+	"""
+
+	def __init__(self, k: int = 200):
+		self.stats = RunningStats()
+		self.sketch = KllSketch(k)
+		self.latest_timestamp: Optional[str] = None
+
+	def update(self, df: pd.DataFrame) -> "Co2Summary":
+		if df.empty:
+			return self
+		values = df["co2_intensity_g_per_kwh"].to_numpy(dtype=np.float64)
+		self.stats.update_many(values)
+		self.sketch.update_many(values)
+		if "timestamp" in df:
+			self.latest_timestamp = _newest(self.latest_timestamp, df["timestamp"])
+		return self
+
+	def update_rows(self, rows: Iterable[Dict[str, Any]]) -> "Co2Summary":
+		return self.update(pd.DataFrame(list(rows)))
+
+	def merge(self, other: "Co2Summary") -> "Co2Summary":
+		self.stats.merge(other.stats)
+		self.sketch.merge(other.sketch)
+		if other.latest_timestamp is not None:
+			self.latest_timestamp = _newest(self.latest_timestamp, pd.Series([other.latest_timestamp]))
+		return self
+
+	def result(self) -> dict:
+		if self.stats.count == 0:
+			return {"count": 0}
+		out = {
+			"count": self.stats.count,
+			"min_gco2_kwh": self.stats.min,
+			"max_gco2_kwh": self.stats.max,
+			"avg_gco2_kwh": self.stats.mean,
+			"std_gco2_kwh": self.stats.std,
+		}
+		for name, q in zip(QUANTILES, self.sketch.quantiles(list(QUANTILES.values()))):
+			out[f"{name}_gco2_kwh"] = q
+		return out
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {"stats": self.stats.to_dict(), "sketch": self.sketch.to_dict(), "latest_timestamp": self.latest_timestamp}
+
+	@classmethod
+	def from_dict(cls, state: Dict[str, Any]) -> "Co2Summary":
+		summary = cls()
+		summary.stats = RunningStats.from_dict(state["stats"])
+		summary.sketch = KllSketch.from_dict(state["sketch"])
+		summary.latest_timestamp = state.get("latest_timestamp")
+		return summary
+
+
+class GenerationMixSummary:
+	"""Streaming version of `summarize_generation_mix` (see `Co2Summary`)."""
+
+	def __init__(self):
+		self.total_mw = RunningStats()
+		self.renewable_share = RunningStats()
+		self.latest_timestamp: Optional[str] = None
+
+	def update(self, df: pd.DataFrame) -> "GenerationMixSummary":
+		if df.empty:
+			return self
+		total = df["total_mw"].to_numpy(dtype=np.float64)
+		renewable = df[_RENEWABLES].to_numpy(dtype=np.float64).sum(axis=1)
+		share = np.divide(100.0 * renewable, total, out=np.full_like(total, np.nan), where=total != 0)
+		self.total_mw.update_many(total)
+		self.renewable_share.update_many(share)
+		if "timestamp" in df:
+			self.latest_timestamp = _newest(self.latest_timestamp, df["timestamp"])
+		return self
+
+	def update_rows(self, rows: Iterable[Dict[str, Any]]) -> "GenerationMixSummary":
+		return self.update(pd.DataFrame(list(rows)))
+
+	def merge(self, other: "GenerationMixSummary") -> "GenerationMixSummary":
+		self.total_mw.merge(other.total_mw)
+		self.renewable_share.merge(other.renewable_share)
+		if other.latest_timestamp is not None:
+			self.latest_timestamp = _newest(self.latest_timestamp, pd.Series([other.latest_timestamp]))
+		return self
+
+	def result(self) -> dict:
+		if self.total_mw.count == 0:
+			return {"count": 0}
+		return {
+			"count": self.total_mw.count,
+			"avg_total_mw": self.total_mw.mean,
+			"avg_renewable_share_pct": self.renewable_share.mean if self.renewable_share.count else float("nan"),
+		}
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {"total_mw": self.total_mw.to_dict(), "renewable_share": self.renewable_share.to_dict(), "latest_timestamp": self.latest_timestamp}
+
+	@classmethod
+	def from_dict(cls, state: Dict[str, Any]) -> "GenerationMixSummary":
+		summary = cls()
+		summary.total_mw = RunningStats.from_dict(state["total_mw"])
+		summary.renewable_share = RunningStats.from_dict(state["renewable_share"])
+		summary.latest_timestamp = state.get("latest_timestamp")
+		return summary
+
+
+class NetZeroSummary:
+	"""Streaming version of `summarize_netzero`: row count and the newest year's alignment."""
+
+	def __init__(self):
+		self.count = 0
+		self.latest_year: Optional[int] = None
+		self.latest_alignment_pct: Optional[float] = None
+
+	def update(self, df: pd.DataFrame) -> "NetZeroSummary":
+		if df.empty:
+			return self
+		self.count += len(df)
+		# Last row of the newest year, by position: the index may repeat labels
+		row = df.iloc[len(df) - 1 - df["year"].to_numpy()[::-1].argmax()]
+		self._offer(int(row["year"]), float(row["alignment_pct"]))
+		return self
+
+	def update_rows(self, rows: Iterable[Dict[str, Any]]) -> "NetZeroSummary":
+		return self.update(pd.DataFrame(list(rows)))
+
+	def _offer(self, year: Optional[int], alignment_pct: Optional[float]) -> None:
+		# Ties go to the newer row, across calls as within a frame
+		if year is not None and (self.latest_year is None or year >= self.latest_year):
+			self.latest_year, self.latest_alignment_pct = year, alignment_pct
+
+	def merge(self, other: "NetZeroSummary") -> "NetZeroSummary":
+		self.count += other.count
+		self._offer(other.latest_year, other.latest_alignment_pct)
+		return self
+
+	def result(self) -> dict:
+		if self.count == 0:
+			return {"count": 0}
+		return {"count": self.count, "latest_alignment_pct": self.latest_alignment_pct}
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {"count": self.count, "latest_year": self.latest_year, "latest_alignment_pct": self.latest_alignment_pct}
+
+	@classmethod
+	def from_dict(cls, state: Dict[str, Any]) -> "NetZeroSummary":
+		summary = cls()
+		summary.count = int(state["count"])
+		summary.latest_year = state.get("latest_year")
+		summary.latest_alignment_pct = state.get("latest_alignment_pct")
+		return summary
+
 
 def summarize_co2(df: pd.DataFrame) -> dict:
-	if df.empty:
-		return {"count": 0}
-	return {
-		"count": int(len(df)),
-		"min_gco2_kwh": float(df["co2_intensity_g_per_kwh"].min()),
-		"max_gco2_kwh": float(df["co2_intensity_g_per_kwh"].max()),
-		"avg_gco2_kwh": float(df["co2_intensity_g_per_kwh"].mean()),
-	}
+	return Co2Summary().update(df).result()
 
 
 def summarize_generation_mix(df: pd.DataFrame) -> dict:
-	if df.empty:
-		return {"count": 0}
-	renewable = df[["hydro_mw", "wind_mw", "solar_mw"]].sum(axis=1)
-	share = 100.0 * renewable / df["total_mw"].replace(0, pd.NA)
-	return {
-		"count": int(len(df)),
-		"avg_total_mw": float(df["total_mw"].mean()),
-		"avg_renewable_share_pct": float(share.mean(skipna=True)),
-	}
+	return GenerationMixSummary().update(df).result()
 
 
 def summarize_netzero(df: pd.DataFrame) -> dict:
-	if df.empty:
-		return {"count": 0}
-	return {
-		"count": int(len(df)),
-		"latest_alignment_pct": float(df.sort_values("year")["alignment_pct"].iloc[-1]),
-	}
-
+	return NetZeroSummary().update(df).result()
 
 
+def summarize_alignment(df_co2: pd.DataFrame, df_gen: pd.DataFrame) -> dict:
+	"""Steps present in both tables and the correlation of renewable share with CO2 intensity."""
+	if df_co2.empty or df_gen.empty:
+		return {"count": 0}
+	df = align_frames(df_gen[["timestamp", "renewable_share_pct"]], df_co2[["timestamp", "co2_intensity_g_per_kwh"]])
+	out = {"count": len(df)}
+	if len(df) >= 2:
+		out["corr_renewable_share_co2"] = float(df["renewable_share_pct"].astype(float).corr(df["co2_intensity_g_per_kwh"].astype(float)))
+	return out
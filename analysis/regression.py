@@ -0,0 +1,199 @@
+"""Least-squares slopes over sliding time windows.
+
+The slope of y against t over n points is
+
+	(n * Sty - St * Sy) / (n * Stt - St**2)
+
+with St, Sy, Stt, Sty the sums of t, y, t*t and t*y, the same fit `np.polyfit(t,
+y, 1)` returns. `SlidingWindowSlope` maintains those sums as points arrive and
+leave a trailing window (O(1) per point), and `rolling_slope` computes them for
+every point of a series at once from cumulative sums.
+
+Times are measured in days, so slopes are per day. Sums are taken relative to
+an origin near the data to keep t*t small and avoid cancellation.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_DAY_SECONDS = 86400.0
+
+
+def _slope(n: float, st: float, sy: float, stt: float, sty: float):
+	denominator = n * stt - st * st
+	with np.errstate(divide="ignore", invalid="ignore"):
+		return np.where(denominator > 0, (n * sty - st * sy) / np.where(denominator > 0, denominator, 1.0), np.nan)
+
+
+def least_squares_slope(t: np.ndarray, y: np.ndarray) -> Optional[float]:
+	"""Slope of one fit, as `np.polyfit(t, y, 1)[0]`; None when t does not vary."""
+	t = np.asarray(t, dtype=np.float64)
+	y = np.asarray(y, dtype=np.float64)
+	t = t - t[0] if len(t) else t
+	value = float(_slope(len(t), t.sum(), y.sum(), (t * t).sum(), (t * y).sum()))
+	return None if np.isnan(value) else value
+
+
+class SlidingWindowSlope:
+	"""Incremental least-squares slope over points no older than `window` before the newest one.
+
+	Points must be added in time order.
+	"""
+
+	def __init__(self, window: timedelta = timedelta(days=7), min_points: int = 10):
+		self.window = window
+		self.min_points = min_points
+		# (datetime, days since origin, value)
+		self._points: Deque[Tuple[datetime, float, float]] = deque()
+		self._origin: Optional[datetime] = None
+		self._sums = np.zeros(4)  # St, Sy, Stt, Sty
+		self.latest: Optional[datetime] = None
+
+	def __len__(self) -> int:
+		return len(self._points)
+
+	def _rebase(self, origin: datetime) -> None:
+		"""Move the origin to `origin` and rebuild the sums (once per window length)."""
+		shift = (origin - self._origin).total_seconds() / _DAY_SECONDS
+		self._points = deque((ts, t - shift, y) for ts, t, y in self._points)
+		self._origin = origin
+		t = np.array([p[1] for p in self._points])
+		y = np.array([p[2] for p in self._points])
+		self._sums = np.array([t.sum(), y.sum(), (t * t).sum(), (t * y).sum()])
+
+	def add(self, ts: datetime, y: float) -> None:
+		if self._origin is None:
+			self._origin = ts
+		elif ts - self._origin > 2 * self.window:
+			self._rebase(ts - self.window)
+		t = (ts - self._origin).total_seconds() / _DAY_SECONDS
+		self._points.append((ts, t, y))
+		self._sums += (t, y, t * t, t * y)
+		self.latest = ts
+		# Same bound as filtering `timestamp >= newest - window`; compared exactly, not in float days
+		oldest = ts - self.window
+		while self._points[0][0] < oldest:
+			_, t0, y0 = self._points.popleft()
+			self._sums -= (t0, y0, t0 * t0, t0 * y0)
+
+	def update(self, df: pd.DataFrame, column: str) -> int:
+		"""Add the rows of `df` (sorted by timestamp) newer than the newest point. Returns rows added.
+
+		Only a tail of the frame is parsed, doubled until it reaches back to the
+		newest point, and older rows are skipped with a binary search, so a frame
+		that grows by a few rows per call costs O(new rows).
+		"""
+		n = len(df)
+		if n == 0:
+			return 0
+		k = n if self.latest is None else min(n, 64)
+		while True:
+			ts = pd.DatetimeIndex(pd.to_datetime(df["timestamp"].iloc[n - k:], utc=True, format="ISO8601"))
+			if k == n or ts[0] <= self.latest:
+				break
+			k = min(n, 2 * k)
+		first = 0 if self.latest is None else int(ts.searchsorted(pd.Timestamp(self.latest), side="right"))
+		values = df[column].to_numpy(dtype=np.float64)[n - k + first:]
+		for t, y in zip(ts[first:], values):
+			self.add(t.to_pydatetime(), float(y))
+		return len(values)
+
+	def catch_up(
+		self,
+		fetch: Callable[..., pd.DataFrame],
+		until: datetime,
+		table: str = "co2_intensity",
+		column: str = "co2_intensity_g_per_kwh",
+	) -> int:
+		"""Add the rows in [until - window, until) not seen yet via `fetch(table, start, end, columns)` (e.g. `data_access.fetch_range`).
+
+		`update` only takes rows newer than the newest point, so a window first
+		filled from a short frame (a 24h chart) would never see the older days.
+		Call this with the first timestamp of the frame before `update`: the
+		first time it reads the whole window once, later only gaps after idle
+		periods.
+		"""
+		start = until - self.window
+		if self.latest is not None:
+			if self.latest >= until:
+				return 0
+			start = max(start, self.latest)
+		return self.update(fetch(table, start, until, ["timestamp", column]), column)
+
+	def slope(self) -> Optional[float]:
+		"""Slope per day over the current window, or None with fewer than `min_points` points."""
+		if len(self._points) < self.min_points:
+			return None
+		value = float(_slope(len(self._points), *self._sums))
+		return None if np.isnan(value) else value
+
+
+def rolling_slope(timestamps: pd.Series, values: np.ndarray, window: timedelta = timedelta(days=7), min_points: int = 10) -> np.ndarray:
+	"""Slope per day at every point over the trailing `window` (NaN below `min_points`).
+
+	`timestamps` must be sorted. Each point's window is [t - window, t], found
+	with one `searchsorted`. Window sums are differences of cumulative sums that
+	restart every `block` points (the longest window), each block relative to its
+	first point, so a window spans at most two blocks and no sum grows with the
+	length of the series.
+	"""
+	ts = pd.to_datetime(timestamps, utc=True, format="ISO8601")
+	ns = ts.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+	y = np.asarray(values, dtype=np.float64)
+	n = len(ns)
+	if n == 0:
+		return np.empty(0)
+	ends = np.arange(n)
+	starts = np.searchsorted(ns, ns - int(window.total_seconds() * 1e9), side="left")
+	counts = ends + 1 - starts
+	block = int(counts.max())
+	origins = ends // block * block
+	# Days since the first point of each block; exact from the integer nanoseconds
+	d = (ns - ns[origins]) / 1e9 / _DAY_SECONDS
+	parts = np.stack([d, y, d * d, d * y])
+
+	def block_cumsum(x: np.ndarray) -> np.ndarray:
+		padded = np.zeros((x.shape[0], -(-n // block) * block))
+		padded[:, :n] = x
+		return np.cumsum(padded.reshape(x.shape[0], -1, block), axis=2).reshape(x.shape[0], -1)[:, :n]
+
+	inclusive = block_cumsum(parts)
+	# Window [s, i] = [s, end of s's block] + [start of i's block, i] when it spans two blocks
+	split = origins[starts] != origins
+	head_end = np.where(split, origins[starts] + block - 1, ends)
+	head = inclusive[:, head_end] - inclusive[:, starts] + parts[:, starts]
+	tail = np.where(split, inclusive, 0.0)
+	head_n = head_end + 1 - starts
+	tail_n = counts - head_n
+
+	# Re-center both parts on the window's first point: t - t0 = d + (origin - t0)
+	def centered(sums: np.ndarray, m: np.ndarray, shift: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+		sd, sy, sdd, sdy = sums
+		return sd + m * shift, sy, sdd + 2 * shift * sd + m * shift * shift, sdy + shift * sy
+
+	t0 = ns[starts]
+	h = centered(head, head_n, (ns[origins[starts]] - t0) / 1e9 / _DAY_SECONDS)
+	t = centered(tail, tail_n, (ns[origins] - t0) / 1e9 / _DAY_SECONDS)
+	out = _slope(counts, *(hp + tp for hp, tp in zip(h, t)))
+	out[counts < min_points] = np.nan
+	return out
+
+
+def rolling_velocity(df: pd.DataFrame, window: timedelta = timedelta(days=7), min_points: int = 10) -> pd.DataFrame:
+	"""Decarbonization velocity history from a co2_intensity frame sorted by timestamp.
+
+	`v_actual_g_per_kwh_per_yr` is the negated rolling slope scaled to a year, as
+	in the goal tracker (positive means intensity is falling).
+	"""
+	slope = rolling_slope(df["timestamp"], df["co2_intensity_g_per_kwh"].to_numpy(), window, min_points)
+	return pd.DataFrame({
+		"timestamp": df["timestamp"].to_numpy(),
+		"slope_g_per_kwh_per_day": slope,
+		"v_actual_g_per_kwh_per_yr": -slope * 365.0,
+	})
@@ -0,0 +1,183 @@
+"""Mergeable streaming summaries.
+
+- `RunningStats`: count, sum, min, max, mean and variance (Welford updates,
+  Chan et al. for combining chunks and workers).
+- `KllSketch`: approximate quantiles (KLL) in O(k) memory regardless of how
+  many values were added; rank error is roughly 1.7/k.
+
+Both can be updated value by value or a chunk (NumPy array) at a time, merged
+with another instance built on a different slice of the data, and serialized
+with `to_dict()` / `from_dict()` (plain JSON types). NaN values are ignored.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+def _finite(values: Iterable[float] | np.ndarray) -> np.ndarray:
+	values = np.asarray(values, dtype=np.float64).ravel()
+	return values[~np.isnan(values)]
+
+
+class RunningStats:
+	def __init__(self):
+		self.count = 0
+		self.sum = 0.0
+		self.min = math.inf
+		self.max = -math.inf
+		self.mean = 0.0
+		# Sum of squared deviations from the mean
+		self.m2 = 0.0
+
+	def update(self, value: float) -> "RunningStats":
+		if value is None or math.isnan(value):
+			return self
+		self.count += 1
+		self.sum += value
+		self.min = min(self.min, value)
+		self.max = max(self.max, value)
+		delta = value - self.mean
+		self.mean += delta / self.count
+		self.m2 += delta * (value - self.mean)
+		return self
+
+	def update_many(self, values: Iterable[float] | np.ndarray) -> "RunningStats":
+		values = _finite(values)
+		if len(values):
+			chunk = RunningStats()
+			chunk.count = len(values)
+			chunk.sum = float(values.sum())
+			chunk.min = float(values.min())
+			chunk.max = float(values.max())
+			chunk.mean = chunk.sum / chunk.count
+			chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+			self.merge(chunk)
+		return self
+
+	def merge(self, other: "RunningStats") -> "RunningStats":
+		if other.count == 0:
+			return self
+		if self.count == 0:
+			self.count, self.sum, self.min, self.max, self.mean, self.m2 = other.count, other.sum, other.min, other.max, other.mean, other.m2
+			return self
+		n = self.count + other.count
+		delta = other.mean - self.mean
+		self.m2 += other.m2 + delta * delta * self.count * other.count / n
+		self.mean += delta * other.count / n
+		self.count = n
+		self.sum += other.sum
+		self.min = min(self.min, other.min)
+		self.max = max(self.max, other.max)
+		return self
+
+	@property
+	def variance(self) -> float:
+		"""Sample variance (n - 1 denominator, as pandas)."""
+		return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+	@property
+	def std(self) -> float:
+		return math.sqrt(self.variance) if self.count > 1 else math.nan
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {"count": self.count, "sum": self.sum, "min": self.min if self.count else None,
+			"max": self.max if self.count else None, "mean": self.mean, "m2": self.m2}
+
+	@classmethod
+	def from_dict(cls, state: Dict[str, Any]) -> "RunningStats":
+		stats = cls()
+		stats.count = int(state["count"])
+		stats.sum = float(state["sum"])
+		stats.min = math.inf if state["min"] is None else float(state["min"])
+		stats.max = -math.inf if state["max"] is None else float(state["max"])
+		stats.mean = float(state["mean"])
+		stats.m2 = float(state["m2"])
+		return stats
+
+
+class KllSketch:
+	"""KLL quantile sketch.
+
+	Values live in a stack of compactors; an item at level h stands for 2**h
+	inputs. When a level outgrows its capacity it is sorted and every other
+	item (random offset) is promoted to the level above. Capacities shrink
+	geometrically (factor 2/3) going down from the top level.
+	"""
+
+	def __init__(self, k: int = 200, seed: Optional[int] = None):
+		if k < 8:
+			raise ValueError("k must be at least 8")
+		self.k = k
+		self.n = 0
+		self._levels: List[np.ndarray] = [np.empty(0)]
+		self._rng = np.random.default_rng(seed)
+
+	def _capacity(self, level: int) -> int:
+		depth = len(self._levels) - 1 - level
+		return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+	def _compress(self) -> None:
+		h = 0
+		while h < len(self._levels):
+			items = self._levels[h]
+			if len(items) <= self._capacity(h):
+				h += 1
+				continue
+			if h + 1 == len(self._levels):
+				self._levels.append(np.empty(0))
+			items = np.sort(items)
+			# An odd item out stays behind so the total weight is unchanged
+			keep, items = items[: len(items) % 2], items[len(items) % 2:]
+			promoted = items[int(self._rng.integers(2))::2]
+			self._levels[h] = keep
+			self._levels[h + 1] = np.concatenate([self._levels[h + 1], promoted])
+			# Adding a level lowers the capacities below it, so start over
+			h = 0
+
+	def update(self, value: float) -> "KllSketch":
+		return self.update_many([value])
+
+	def update_many(self, values: Iterable[float] | np.ndarray) -> "KllSketch":
+		values = _finite(values)
+		if len(values):
+			self.n += len(values)
+			self._levels[0] = np.concatenate([self._levels[0], values])
+			self._compress()
+		return self
+
+	def merge(self, other: "KllSketch") -> "KllSketch":
+		while len(self._levels) < len(other._levels):
+			self._levels.append(np.empty(0))
+		for h, items in enumerate(other._levels):
+			self._levels[h] = np.concatenate([self._levels[h], items])
+		self.n += other.n
+		self._compress()
+		return self
+
+	def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+		"""Approximate values at quantiles `qs` (each in [0, 1]); None when empty."""
+		if self.n == 0:
+			return [None for _ in qs]
+		items = np.concatenate(self._levels)
+		weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self._levels)])
+		order = np.argsort(items, kind="stable")
+		items, cum = items[order], np.cumsum(weights[order])
+		idx = np.searchsorted(cum, np.asarray(qs, dtype=np.float64) * cum[-1], side="left")
+		return [float(items[min(i, len(items) - 1)]) for i in idx]
+
+	def quantile(self, q: float) -> Optional[float]:
+		return self.quantiles([q])[0]
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {"k": self.k, "n": self.n, "levels": [items.tolist() for items in self._levels]}
+
+	@classmethod
+	def from_dict(cls, state: Dict[str, Any], seed: Optional[int] = None) -> "KllSketch":
+		sketch = cls(int(state["k"]), seed=seed)
+		sketch.n = int(state["n"])
+		sketch._levels = [np.asarray(items, dtype=np.float64) for items in state["levels"]] or [np.empty(0)]
+		return sketch
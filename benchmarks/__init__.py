@@ -0,0 +1,6 @@
+"""Benchmarks for the simulator, storage, goal tracker and metrics hot paths.
+
+	python -m benchmarks.run --sizes 1k,100k,1M --baseline benchmarks/baseline.json
+
+See `benchmarks.run` for the options and `benchmarks.cases` for what is measured.
+"""
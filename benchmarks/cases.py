@@ -0,0 +1,101 @@
+"""The measured hot paths.
+
+Each case prepares its inputs from a `Dataset` outside the timed region and
+returns a zero-argument callable; only that call is timed. `max_rows` keeps
+the scalar paths (one Python call per step or per row) out of the largest
+sizes, where a single run would take minutes; `--no-caps` lifts it.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from analysis.goal_tracker import compute_goal_tracker
+from analysis.metrics import summarize_alignment, summarize_co2, summarize_generation_mix
+from simulator.config import load_config_from_env
+from simulator.rng import seed_default_rng
+from simulator.rollups import RollupAccumulator
+from simulator.simulate import run_once
+from simulator.storage import BufferedCsvWriter, append_csv
+from simulator.supabase_client import SupabaseClient
+
+from .datasets import STEP_MINUTES, Dataset
+
+# Rows per `append_csv` call, like a backfill chunk
+APPEND_BATCH_ROWS = 1000
+
+
+@dataclass(frozen=True)
+class Case:
+	name: str
+	# (dataset, scratch directory) -> timed callable
+	prepare: Callable[[Dataset, str], Callable[[], None]]
+	max_rows: Optional[int] = None
+
+
+def _run_once(ds: Dataset, workdir: str) -> Callable[[], None]:
+	cfg = replace(load_config_from_env(), output_mode="csv", csv_output_dir=workdir, step_minutes=STEP_MINUTES)
+	sb = SupabaseClient(None, None)
+	anchor = ds.df_gen["timestamp"].iloc[0].to_pydatetime()
+	step = timedelta(minutes=STEP_MINUTES)
+
+	def run() -> None:
+		seed_default_rng(0)
+		rollups = RollupAccumulator(cfg.step_minutes, cfg.rollup_grains)
+		with BufferedCsvWriter() as writer:
+			for i in range(ds.rows):
+				run_once(cfg, anchor + i * step, csv_writer=writer, sb=sb, rollups=rollups)
+
+	return run
+
+
+def _append_csv(ds: Dataset, workdir: str) -> Callable[[], None]:
+	rows = ds.gen_rows(ds.rows)
+	path = os.path.join(workdir, "generation_mix.csv")
+
+	def run() -> None:
+		for i in range(0, len(rows), APPEND_BATCH_ROWS):
+			append_csv(path, rows[i:i + APPEND_BATCH_ROWS])
+
+	return run
+
+
+def _append_columns(ds: Dataset, workdir: str) -> Callable[[], None]:
+	columns = {name: ds.df_gen[name].to_numpy() for name in ds.df_gen.columns}
+	columns["timestamp"] = ds.df_gen["timestamp"].dt.to_pydatetime()
+	fieldnames = ["id", *columns]
+	path = os.path.join(workdir, "generation_mix.csv")
+
+	def run() -> None:
+		with BufferedCsvWriter() as writer:
+			writer.append_columns(path, columns, fieldnames)
+
+	return run
+
+
+def _goal_tracker(ds: Dataset, workdir: str) -> Callable[[], None]:
+	return lambda: compute_goal_tracker(ds.df_co2, ds.df_gen, ds.df_nz, now=ds.end)
+
+
+def _summarize(fn: Callable, *frames: str) -> Callable[[Dataset, str], Callable[[], None]]:
+	def prepare(ds: Dataset, workdir: str) -> Callable[[], None]:
+		args = [getattr(ds, frame) for frame in frames]
+		return lambda: fn(*args)
+
+	return prepare
+
+
+CASES: List[Case] = [
+	Case("simulate.run_once", _run_once, max_rows=100_000),
+	Case("storage.append_csv", _append_csv, max_rows=1_000_000),
+	Case("storage.BufferedCsvWriter.append_columns", _append_columns, max_rows=1_000_000),
+	Case("goal_tracker.compute_goal_tracker", _goal_tracker),
+	Case("metrics.summarize_co2", _summarize(summarize_co2, "df_co2")),
+	Case("metrics.summarize_generation_mix", _summarize(summarize_generation_mix, "df_gen")),
+	Case("metrics.summarize_alignment", _summarize(summarize_alignment, "df_co2", "df_gen")),
+]
+
+CASES_BY_NAME: Dict[str, Case] = {case.name: case for case in CASES}
@@ -0,0 +1,96 @@
+"""Reproducible synthetic datasets for the benchmarks.
+
+Rows come from the vectorized simulator (`simulator.batch`) with a fixed seed,
+at the default 5-minute step and ending at the fixed instant `DATASET_END`, so
+a dataset (and the share of it in the goal tracker's current year, pinned to
+the same instant) does not depend on the day the benchmark runs. Datasets are
+built once per size and shared by every case in a run.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from simulator.batch import simulate_co2_intensity_batch, simulate_generation_mix_batch
+
+STEP_MINUTES = 5
+# Newest row of every dataset, and "now" for the goal tracker; mid-year so its YTD budget has work to do
+DATASET_END = datetime(2025, 7, 1, tzinfo=timezone.utc)
+
+_SIZE = re.compile(r"^(\d+(?:\.\d+)?)([kKmM]?)$")
+
+
+def parse_size(text: str) -> int:
+	"""`1000`, `1k`, `100k`, `1M`, `2.5M` -> row count."""
+	match = _SIZE.match(text.strip())
+	if not match:
+		raise ValueError(f"Bad size {text!r} (expected e.g. 1k, 100k, 1M)")
+	value, unit = match.groups()
+	return int(float(value) * {"": 1, "k": 1_000, "m": 1_000_000}[unit.lower()])
+
+
+def format_size(rows: int) -> str:
+	for unit, factor in (("M", 1_000_000), ("k", 1_000)):
+		if rows >= factor and rows % factor == 0:
+			return f"{rows // factor}{unit}"
+	return str(rows)
+
+
+@dataclass
+class Dataset:
+	"""`rows` steps of generation mix, CO2 intensity and the yearly net-zero table, ending at `end`."""
+	rows: int
+	end: datetime
+	df_gen: pd.DataFrame
+	df_co2: pd.DataFrame
+	df_nz: pd.DataFrame
+
+	def gen_rows(self, limit: int) -> List[dict]:
+		"""The first `limit` generation rows as row dicts, as the simulator writes them."""
+		df = self.df_gen.iloc[:limit]
+		rows = df.to_dict("records")
+		for row in rows:
+			row["timestamp"] = row["timestamp"].to_pydatetime()
+		return [{"id": None, **row} for row in rows]
+
+
+def build_dataset(rows: int, seed: int = 0, end: datetime = DATASET_END) -> Dataset:
+	start = end - (rows - 1) * timedelta(minutes=STEP_MINUTES)
+	timestamps = np.datetime64(start.replace(tzinfo=None), "us") + np.arange(rows, dtype=np.int64) * np.timedelta64(STEP_MINUTES, "m")
+	rng = np.random.default_rng(seed)
+	gen = simulate_generation_mix_batch(timestamps, rng=rng)
+	co2 = simulate_co2_intensity_batch(gen, rng=rng)
+	ts = pd.DatetimeIndex(timestamps).tz_localize("UTC")
+	df_gen = pd.DataFrame({**gen.columns(), "timestamp": ts})
+	df_co2 = pd.DataFrame({**co2.columns(), "timestamp": ts})
+
+	years = np.arange(start.year, end.year + 1)
+	target = np.maximum(10.0, 30.0 - (years - 2020))
+	actual = np.round(target * 1.02, 1)
+	df_nz = pd.DataFrame({
+		"year": years,
+		"actual_emissions_mt": actual,
+		"target_emissions_mt": target,
+		"alignment_pct": np.round(100.0 * target / actual, 0),
+	})
+	return Dataset(rows=rows, end=end, df_gen=df_gen, df_co2=df_co2, df_nz=df_nz)
+
+
+class DatasetCache:
+	"""Builds each size once per run; holds at most the most recent size."""
+
+	def __init__(self, seed: int = 0):
+		self.seed = seed
+		self._datasets: Dict[int, Dataset] = {}
+
+	def get(self, rows: int) -> Dataset:
+		if rows not in self._datasets:
+			self._datasets.clear()
+			self._datasets[rows] = build_dataset(rows, self.seed)
+		return self._datasets[rows]
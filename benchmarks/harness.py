@@ -0,0 +1,183 @@
+"""Timing, memory measurement, result files and baseline comparison."""
+
+from __future__ import annotations
+
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .cases import Case
+from .datasets import DatasetCache, format_size
+
+# Runs faster than this are dominated by timer and scheduler noise and never count as regressions
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+@dataclass
+class Result:
+	case: str
+	rows: int
+	repeat: int
+	wall_s_min: float
+	wall_s_median: float
+	rows_per_s: float
+	# Peak bytes allocated through Python/NumPy during one run (tracemalloc); None with --no-memory
+	peak_mem_mb: Optional[float]
+
+	@property
+	def key(self) -> str:
+		return f"{self.case}@{format_size(self.rows)}"
+
+
+def _timed_run(case: Case, dataset, trace_memory: bool) -> tuple:
+	"""(seconds, peak MB or None) of one run in a fresh scratch directory."""
+	workdir = tempfile.mkdtemp(prefix="bench-")
+	try:
+		run = case.prepare(dataset, workdir)
+		gc.collect()
+		if trace_memory:
+			tracemalloc.start()
+		t0 = time.perf_counter()
+		run()
+		seconds = time.perf_counter() - t0
+		peak = None
+		if trace_memory:
+			peak = tracemalloc.get_traced_memory()[1] / 1e6
+			tracemalloc.stop()
+		return seconds, peak
+	finally:
+		shutil.rmtree(workdir, ignore_errors=True)
+
+
+def measure(case: Case, dataset, repeat: int = 3, memory: bool = True) -> Result:
+	"""Time `repeat` runs, then one more under tracemalloc for peak memory.
+
+	Memory is measured separately because tracing slows allocation-heavy code
+	several-fold and would distort the timings.
+	"""
+	times = [_timed_run(case, dataset, False)[0] for _ in range(repeat)]
+	peak = _timed_run(case, dataset, True)[1] if memory else None
+	best = min(times)
+	return Result(
+		case=case.name,
+		rows=dataset.rows,
+		repeat=repeat,
+		wall_s_min=best,
+		wall_s_median=statistics.median(times),
+		rows_per_s=dataset.rows / best if best > 0 else float("inf"),
+		peak_mem_mb=peak,
+	)
+
+
+def run_suite(
+	cases: Sequence[Case],
+	sizes: Sequence[int],
+	repeat: int = 3,
+	memory: bool = True,
+	caps: bool = True,
+	seed: int = 0,
+	progress=print,
+) -> List[Result]:
+	datasets = DatasetCache(seed)
+	results = []
+	for rows in sizes:
+		for case in cases:
+			if caps and case.max_rows is not None and rows > case.max_rows:
+				progress(f"{case.name}@{format_size(rows)}: skipped (above {format_size(case.max_rows)} rows; --no-caps to run)")
+				continue
+			result = measure(case, datasets.get(rows), repeat, memory)
+			results.append(result)
+			progress(_format_result(result))
+	return results
+
+
+def _format_result(result: Result) -> str:
+	memory = "" if result.peak_mem_mb is None else f"  peak {result.peak_mem_mb:9.1f} MB"
+	return f"{result.key:<50} {result.wall_s_min:9.4f} s  {result.rows_per_s:14,.0f} rows/s{memory}"
+
+
+def environment() -> Dict[str, Any]:
+	return {
+		"python": platform.python_version(),
+		"numpy": np.__version__,
+		"pandas": pd.__version__,
+		"platform": platform.platform(),
+		"machine": platform.machine(),
+		"cpu_count": os.cpu_count(),
+	}
+
+
+def save_results(results: Sequence[Result], path: str, meta: Optional[Dict[str, Any]] = None) -> None:
+	if os.path.dirname(path):
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+	doc = {
+		"created": datetime.now(timezone.utc).isoformat(),
+		"environment": environment(),
+		**(meta or {}),
+		"results": [asdict(r) for r in results],
+	}
+	tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		json.dump(doc, f, indent=2)
+	os.replace(tmp, path)
+
+
+def load_results(path: str) -> List[Result]:
+	with open(path, "r", encoding="utf-8") as f:
+		return [Result(**r) for r in json.load(f)["results"]]
+
+
+@dataclass
+class Comparison:
+	key: str
+	baseline_s: float
+	current_s: float
+	ratio: float
+	baseline_mem_mb: Optional[float]
+	current_mem_mb: Optional[float]
+	regressed: bool
+
+
+def compare(
+	current: Sequence[Result],
+	baseline: Sequence[Result],
+	threshold: float = 0.10,
+	memory_threshold: Optional[float] = None,
+) -> List[Comparison]:
+	"""Pair results by case and size; a run slower than baseline by more than `threshold` (0.10 = 10%) regresses.
+
+	With `memory_threshold`, a peak memory increase beyond it also counts.
+	"""
+	base = {r.key: r for r in baseline}
+	out = []
+	for r in current:
+		b = base.get(r.key)
+		if b is None:
+			continue
+		ratio = r.wall_s_min / b.wall_s_min if b.wall_s_min > 0 else float("inf")
+		regressed = ratio > 1.0 + threshold and r.wall_s_min >= MIN_COMPARABLE_SECONDS
+		if memory_threshold is not None and r.peak_mem_mb is not None and b.peak_mem_mb:
+			regressed |= r.peak_mem_mb > b.peak_mem_mb * (1.0 + memory_threshold)
+		out.append(Comparison(r.key, b.wall_s_min, r.wall_s_min, ratio, b.peak_mem_mb, r.peak_mem_mb, regressed))
+	return out
+
+
+def format_comparison(rows: Sequence[Comparison]) -> str:
+	lines = [f"{'case':<50} {'baseline s':>10} {'current s':>10} {'ratio':>7}"]
+	for c in rows:
+		flag = "  REGRESSION" if c.regressed else ""
+		lines.append(f"{c.key:<50} {c.baseline_s:10.4f} {c.current_s:10.4f} {c.ratio:7.2f}{flag}")
+	return "\n".join(lines)
@@ -0,0 +1,75 @@
+"""Benchmark CLI.
+
+	python -m benchmarks.run                                   # 1k, 100k, 1M rows
+	python -m benchmarks.run --sizes 1k,100k,1M,10M --repeat 1
+	python -m benchmarks.run --cases metrics. --save-baseline benchmarks/baseline.json
+	python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.15
+
+Results are written as JSON (`--out`, default `benchmarks/results/<UTC time>.json`).
+With `--baseline`, each case/size is compared with the saved run and the
+process exits with status 1 when any regressed beyond `--threshold`, so the
+command can gate CI. Baselines are only comparable on the same machine.
+"""
+
+import argparse
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def main() -> None:
+	root = Path(__file__).resolve().parents[1]
+	sys.path.insert(0, str(root))
+	from benchmarks.cases import CASES  # type: ignore
+	from benchmarks.datasets import DATASET_END, format_size, parse_size  # type: ignore
+	from benchmarks.harness import compare, format_comparison, load_results, run_suite, save_results  # type: ignore
+
+	parser = argparse.ArgumentParser(description="Benchmark the simulator, storage, goal tracker and metrics")
+	parser.add_argument("--sizes", type=str, default="1k,100k,1M", help="Comma-separated dataset sizes (e.g. 1k,100k,1M,10M)")
+	parser.add_argument("--cases", type=str, default=None, help="Comma-separated case name prefixes (default: all)")
+	parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the fastest is reported")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run for peak memory")
+	parser.add_argument("--no-caps", action="store_true", help="Run scalar cases at every size")
+	parser.add_argument("--out", type=str, default=None, help="Results JSON path")
+	parser.add_argument("--baseline", type=str, default=None, help="Baseline results JSON to compare against")
+	parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown vs baseline (0.10 = 10%%)")
+	parser.add_argument("--memory-threshold", type=float, default=None, help="Allowed peak memory growth vs baseline")
+	parser.add_argument("--save-baseline", type=str, default=None, help="Also write the results to this baseline path")
+	parser.add_argument("--list", action="store_true", help="List the cases and exit")
+	args = parser.parse_args()
+
+	if args.list:
+		for case in CASES:
+			cap = "" if case.max_rows is None else f" (up to {format_size(case.max_rows)} rows)"
+			print(f"{case.name}{cap}")
+		return
+
+	cases = CASES
+	if args.cases:
+		prefixes = [p.strip() for p in args.cases.split(",") if p.strip()]
+		cases = [c for c in CASES if any(c.name.startswith(p) for p in prefixes)]
+		if not cases:
+			parser.error(f"No case matches {args.cases!r} (see --list)")
+	sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+
+	results = run_suite(cases, sizes, repeat=args.repeat, memory=not args.no_memory, caps=not args.no_caps, seed=args.seed)
+	meta = {"sizes": sizes, "repeat": args.repeat, "seed": args.seed, "dataset_end": DATASET_END.isoformat()}
+	out = args.out or str(root / "benchmarks" / "results" / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json")
+	save_results(results, out, meta)
+	print(f"Wrote {out}")
+	if args.save_baseline:
+		save_results(results, args.save_baseline, meta)
+		print(f"Wrote baseline {args.save_baseline}")
+
+	if args.baseline:
+		comparison = compare(results, load_results(args.baseline), args.threshold, args.memory_threshold)
+		print(format_comparison(comparison))
+		regressed = [c.key for c in comparison if c.regressed]
+		if regressed:
+			print(f"{len(regressed)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressed)}")
+			sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,52 @@
+"""Micro-benchmark: per-sample cost of bounded normal sampling.
+
+Compares the scalar `bounded_normal` (one call per sample) with the vectorized
+`bounded_normal_array` in clip and truncate modes, and reports how much mass
+each method puts exactly on the bounds.
+
+	python scripts/bench_bounded_normal.py --samples 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+
+def main() -> None:
+	root = Path(__file__).resolve().parents[1]
+	sys.path.insert(0, str(root))
+	import numpy as np
+	from simulator.bias import bounded_normal, bounded_normal_array  # type: ignore
+
+	parser = argparse.ArgumentParser(description="Bounded normal sampling micro-benchmark")
+	parser.add_argument("--samples", type=int, default=1_000_000, help="Samples per vectorized call")
+	parser.add_argument("--scalar-samples", type=int, default=100_000, help="Samples for the scalar loop")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	# Wind base factor: mean 1.0, sigma 0.8, bounds [0.1, 3.0]
+	base, std_dev, lower, upper = 1.0, 0.8, 0.1, 3.0
+	rng = np.random.default_rng(args.seed)
+
+	def report(name: str, n: int, seconds: float, values) -> None:
+		values = np.asarray(values)
+		at_bounds = float(np.mean((values == lower) | (values == upper))) * 100.0
+		print(f"{name:<18} {seconds / n * 1e9:10.1f} ns/sample  mean={values.mean():.4f}  at_bounds={at_bounds:.2f}%")
+
+	t0 = time.perf_counter()
+	scalar = [bounded_normal(base, std_dev, lower, upper, rng=rng, method="clip") for _ in range(args.scalar_samples)]
+	report("scalar clip", args.scalar_samples, time.perf_counter() - t0, scalar)
+
+	t0 = time.perf_counter()
+	scalar = [bounded_normal(base, std_dev, lower, upper, rng=rng, method="truncate") for _ in range(args.scalar_samples)]
+	report("scalar truncate", args.scalar_samples, time.perf_counter() - t0, scalar)
+
+	for method in ("clip", "truncate"):
+		t0 = time.perf_counter()
+		values = bounded_normal_array(rng, base, std_dev, lower, upper, args.samples, method)
+		report(f"array {method}", args.samples, time.perf_counter() - t0, values)
+
+
+if __name__ == "__main__":
+	main()
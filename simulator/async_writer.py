@@ -0,0 +1,227 @@
+"""Background, batched delivery of simulator rows to Supabase.
+
+`BackgroundSupabaseWriter` exposes the same `enabled()` / `insert_rows()` interface
+as `SupabaseClient`, so it can be passed to `write_outputs` unchanged. Calls only
+enqueue; a worker thread coalesces queued rows per table into bulk POSTs.
+
+- Backpressure: the queue is bounded, so `insert_rows` blocks once it is full
+  instead of buffering without limit while the endpoint is slow.
+- Retries: transient failures (connection errors, timeouts, 408/429/5xx) are
+  retried with jittered exponential backoff.
+- Spill: batches that still fail are appended to an on-disk JSONL spool, which
+  is replayed before new rows once the endpoint recovers and on the next start,
+  so nothing is lost across restarts. A torn last line (crash mid-spill) is
+  logged and skipped.
+- Failures of the worker itself (e.g. spool I/O) are logged and the pending
+  batches spilled; the worker keeps running so `insert_rows` never blocks on a
+  dead thread.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from .storage import ensure_dir
+from .supabase_client import SupabaseClient
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+_RETRY_STATUS = {408, 429}
+
+# (table, on_conflict, resolution) identifies rows that can share one POST
+BatchKey = Tuple[str, Optional[str], Optional[str]]
+
+
+def _is_transient(exc: Exception) -> bool:
+	if isinstance(exc, requests.HTTPError) and exc.response is not None:
+		status = exc.response.status_code
+		return status >= 500 or status in _RETRY_STATUS
+	return isinstance(exc, requests.RequestException)
+
+
+def _jsonable(row: Dict[str, Any]) -> Dict[str, Any]:
+	return {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in row.items()}
+
+
+def _torn(path: str) -> bool:
+	"""Whether `path` ends mid-line, so the next record must start on a new one."""
+	if not os.path.isfile(path) or os.path.getsize(path) == 0:
+		return False
+	with open(path, "rb") as f:
+		f.seek(-1, os.SEEK_END)
+		return f.read(1) != b"\n"
+
+
+class BackgroundSupabaseWriter:
+	def __init__(
+		self,
+		client: SupabaseClient,
+		spool_path: Optional[str] = None,
+		max_queue: int = 1000,
+		max_batch_rows: int = 5000,
+		max_retries: int = 5,
+		base_backoff: float = 0.5,
+		max_backoff: float = 30.0,
+	):
+		self.client = client
+		self.spool_path = spool_path
+		self.max_batch_rows = max_batch_rows
+		self.max_retries = max_retries
+		self.base_backoff = base_backoff
+		self.max_backoff = max_backoff
+		self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+		self._jitter = random.Random()
+		self._thread: Optional[threading.Thread] = None
+		# While the endpoint is down, new batches go straight to the spool
+		self._down_until = 0.0
+
+	def enabled(self) -> bool:
+		return self.client.enabled()
+
+	def start(self) -> "BackgroundSupabaseWriter":
+		if self._thread is None:
+			self._thread = threading.Thread(target=self._run, name="supabase-writer", daemon=True)
+			self._thread.start()
+		return self
+
+	def __enter__(self) -> "BackgroundSupabaseWriter":
+		return self.start()
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def insert_rows(self, table: str, rows: Iterable[Dict[str, Any]], on_conflict: Optional[str] = None, resolution: Optional[str] = None) -> None:
+		"""Enqueue rows for delivery; blocks while the queue is full (backpressure)."""
+		rows = list(rows)
+		if rows and self.enabled():
+			self._queue.put(((table, on_conflict, resolution), rows))
+
+	def close(self, timeout: Optional[float] = None) -> None:
+		"""Deliver (or spill) everything queued, then stop the worker."""
+		if self._thread is None:
+			return
+		self._queue.put(_STOP)
+		self._thread.join(timeout)
+		self._thread = None
+
+	def _run(self) -> None:
+		try:
+			self._replay_spool()
+		except Exception:  # noqa: BLE001 - the spool is kept and retried with the next batch
+			log.exception("Replaying the Supabase spool failed")
+		stopping = False
+		while not stopping:
+			item = self._queue.get()
+			batches: Dict[BatchKey, List[Dict[str, Any]]] = {}
+			total = 0
+			# Coalesce whatever else is already queued, up to max_batch_rows
+			while True:
+				if item is _STOP:
+					stopping = True
+				else:
+					key, rows = item
+					batches.setdefault(key, []).extend(rows)
+					total += len(rows)
+				if stopping or total >= self.max_batch_rows:
+					break
+				try:
+					item = self._queue.get_nowait()
+				except queue.Empty:
+					break
+			try:
+				if batches and time.monotonic() >= self._down_until:
+					self._replay_spool()
+				while batches:
+					key, rows = next(iter(batches.items()))
+					self._deliver(key, rows)
+					del batches[key]
+			except Exception:  # noqa: BLE001 - the worker must outlive any one batch
+				log.exception("Supabase writer failed; spilling %d pending batches", len(batches))
+				for key, rows in batches.items():
+					try:
+						self._spill(key, rows)
+					except Exception:  # noqa: BLE001
+						log.exception("Dropping %d rows for %s", len(rows), key[0])
+
+	def _deliver(self, key: BatchKey, rows: List[Dict[str, Any]]) -> bool:
+		if time.monotonic() < self._down_until:
+			self._spill(key, rows)
+			return False
+		table, on_conflict, resolution = key
+		for attempt in range(self.max_retries + 1):
+			try:
+				self.client.insert_rows(table, rows, on_conflict=on_conflict, resolution=resolution)
+				return True
+			except Exception as e:  # noqa: BLE001 - delivery must never kill the worker
+				if not _is_transient(e):
+					log.error("Dropping %d rows for %s after non-retriable error: %s", len(rows), table, e)
+					return False
+				if attempt == self.max_retries:
+					log.warning("Supabase unavailable (%s); spilling %d rows for %s", e, len(rows), table)
+					break
+				time.sleep(self._backoff(attempt))
+		self._down_until = time.monotonic() + self.max_backoff
+		self._spill(key, rows)
+		return False
+
+	def _backoff(self, attempt: int) -> float:
+		# "Equal jitter": half fixed, half random, capped at max_backoff
+		delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+		return delay / 2 + self._jitter.uniform(0, delay / 2)
+
+	def _spill(self, key: BatchKey, rows: List[Dict[str, Any]]) -> None:
+		if not self.spool_path:
+			log.error("No spool configured; dropping %d rows for %s", len(rows), key[0])
+			return
+		ensure_dir(os.path.dirname(self.spool_path))
+		table, on_conflict, resolution = key
+		record = {"table": table, "on_conflict": on_conflict, "resolution": resolution, "rows": [_jsonable(r) for r in rows]}
+		line = json.dumps(record, separators=(",", ":")) + "\n"
+		with open(self.spool_path, "a", encoding="utf-8") as f:
+			f.write(("\n" if _torn(self.spool_path) else "") + line)
+			f.flush()
+			os.fsync(f.fileno())
+
+	def _replay_spool(self) -> None:
+		"""Deliver spooled batches in order; keep whatever still fails."""
+		if not self.spool_path:
+			return
+		replaying = f"{self.spool_path}.replaying"
+		if os.path.isfile(self.spool_path):
+			# Spill into a fresh spool so records that fail again are kept in order.
+			# A leftover .replaying file (crash mid-replay) goes first.
+			# A torn multi-byte character must not fail the read; its line is skipped below
+			with open(self.spool_path, "r", encoding="utf-8", errors="replace") as f:
+				text = f.read()
+			with open(replaying, "a", encoding="utf-8") as out:
+				out.write(("\n" if _torn(replaying) else "") + text)
+			os.remove(self.spool_path)
+		if not os.path.isfile(replaying):
+			return
+		records: List[Tuple[BatchKey, List[Dict[str, Any]]]] = []
+		with open(replaying, "r", encoding="utf-8", errors="replace") as f:
+			for n, line in enumerate(f, 1):
+				if not line.strip():
+					continue
+				try:
+					rec = json.loads(line)
+					records.append(((rec["table"], rec.get("on_conflict"), rec.get("resolution")), rec["rows"]))
+				except (ValueError, KeyError, TypeError) as e:
+					log.warning("Skipping unreadable spool line %d (%d bytes): %s", n, len(line), e)
+		for i, (key, rows) in enumerate(records):
+			if not self._deliver(key, rows):
+				for rest_key, rest_rows in records[i + 1:]:
+					self._spill(rest_key, rest_rows)
+				break
+		os.remove(replaying)
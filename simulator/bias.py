@@ -1,10 +1,53 @@
 import math
-import random
-from typing import Tuple
+from typing import Optional, Tuple
 
+import numpy as np
 
-def bounded_normal(base: float, std_dev: float, lower: float, upper: float) -> float:
-	value = random.gauss(mu=base, sigma=std_dev)
+from .rng import get_rng
+
+BOUNDED_METHODS = ("clip", "truncate")
+# "clip" clamps out-of-range draws onto the bounds (legacy behaviour, piles mass
+# on the bounds); "truncate" resamples them, giving a true truncated normal.
+_bounded_method = "clip"
+# Rejection rounds before giving up and clamping the (vanishingly few) leftovers
+_MAX_REJECTION_ROUNDS = 64
+
+# (base, std_dev, lower, upper) of the multiplicative weather factor per technology
+WEATHER_PARAMS = {
+	"wind": (1.0, 0.8, 0.1, 3.0),  # Very high wind variation
+	"solar": (1.0, 1.0, 0.05, 4.0),  # Very high solar variation
+	"hydro": (1.0, 0.3, 0.3, 2.0),  # High hydro variation
+}
+
+
+def set_bounded_method(method: str) -> None:
+	"""Select the process-wide default sampling method for bounded normals."""
+	global _bounded_method
+	if method not in BOUNDED_METHODS:
+		raise ValueError(f"Unknown bounded sampling method: {method!r} (expected one of {BOUNDED_METHODS})")
+	_bounded_method = method
+
+
+def get_bounded_method() -> str:
+	return _bounded_method
+
+
+def bounded_normal(
+	base: float,
+	std_dev: float,
+	lower: float,
+	upper: float,
+	rng: Optional[np.random.Generator] = None,
+	method: Optional[str] = None,
+) -> float:
+	if rng is None:
+		rng = get_rng()
+	value = float(rng.normal(loc=base, scale=std_dev))
+	if (method or _bounded_method) == "truncate":
+		for _ in range(_MAX_REJECTION_ROUNDS):
+			if lower <= value <= upper:
+				return value
+			value = float(rng.normal(loc=base, scale=std_dev))
 	return max(lower, min(upper, value))
 
 
@@ -18,30 +61,34 @@ def diurnal_profile(hour: int, min_factor: float = 0.7, max_factor: float = 1.3)
 	return min_factor + (max_factor - min_factor) * cos_val
 
 
-def weather_variation() -> Tuple[float, float, float]:
+def weather_variation(rng: Optional[np.random.Generator] = None) -> Tuple[float, float, float]:
 	"""Return multiplicative factors for wind, solar, hydro (simplified weather impacts)."""
 	# DRAMATIC variation for testing - much more extreme changes
-	wind = bounded_normal(1.0, 0.8, 0.1, 3.0)  # Very high wind variation
-	solar = bounded_normal(1.0, 1.0, 0.05, 4.0)  # Very high solar variation
-	hydro = bounded_normal(1.0, 0.3, 0.3, 2.0)  # High hydro variation
+	wind = bounded_normal(*WEATHER_PARAMS["wind"], rng=rng)
+	solar = bounded_normal(*WEATHER_PARAMS["solar"], rng=rng)
+	hydro = bounded_normal(*WEATHER_PARAMS["hydro"], rng=rng)
 	return wind, solar, hydro
 
 
-def planned_outage_factor() -> float:
+def planned_outage_factor(rng: Optional[np.random.Generator] = None) -> float:
 	"""Occasional reduction to simulate outages/maintenance (e.g., nuclear or fossil)."""
-	if random.random() < 0.15:  # Much higher chance for testing
+	if rng is None:
+		rng = get_rng()
+	if rng.random() < 0.15:  # Much higher chance for testing
 		return 0.3  # Very severe outage
 	return 1.0
 
 
-def fossil_price_shock_factor() -> float:
+def fossil_price_shock_factor(rng: Optional[np.random.Generator] = None) -> float:
 	"""Rare temporary reduction in fossil output due to price spikes or CO2 cost."""
-	if random.random() < 0.1:  # Much higher chance for testing
+	if rng is None:
+		rng = get_rng()
+	if rng.random() < 0.1:  # Much higher chance for testing
 		return 0.4  # Very severe price shock
 	return 1.0
 
 
-def compute_co2_intensity(renewable_share_pct: float, base_range=(50, 500)) -> float:
+def compute_co2_intensity(renewable_share_pct: float, base_range=(50, 500), rng: Optional[np.random.Generator] = None) -> float:
 	"""Map renewable share to CO2 intensity with noise. Higher renewables -> lower intensity."""
 	low, high = base_range
 	# DRAMATIC inverse relationship for testing
@@ -49,7 +96,76 @@ def compute_co2_intensity(renewable_share_pct: float, base_range=(50, 500)) -> f
 	norm = max(0.0, min(1.0, (80 - renewable_share_pct) / 70))
 	base = low + norm * (high - low)
 	# Add LOTS of noise for dramatic variation
-	return bounded_normal(base, std_dev=50, lower=low, upper=high)
+	return bounded_normal(base, std_dev=50, lower=low, upper=high, rng=rng)
+
+
+# ---------------------------------------------------------------------------
+# Vectorized counterparts used by the batch engine (simulator.batch).
+# Each mirrors the scalar helper above draw-for-draw in distribution.
+# ---------------------------------------------------------------------------
+
+def bounded_normal_array(
+	rng: np.random.Generator,
+	base,
+	std_dev: float,
+	lower,
+	upper,
+	size: int,
+	method: Optional[str] = None,
+) -> np.ndarray:
+	"""Vectorized `bounded_normal`; `base`, `lower` and `upper` may be arrays of `size`."""
+	values = rng.normal(loc=base, scale=std_dev, size=size)
+	if (method or _bounded_method) == "truncate":
+		return _truncate_in_bulk(rng, values, base, std_dev, lower, upper)
+	return np.clip(values, lower, upper)
 
 
+def _truncate_in_bulk(rng: np.random.Generator, values: np.ndarray, base, std_dev: float, lower, upper) -> np.ndarray:
+	"""Redraw out-of-range samples in bulk until all lie within [lower, upper].
 
+	Each round only touches the rejected indices, so total work is about
+	size / acceptance_rate draws.
+	"""
+	base, lower, upper = (np.broadcast_to(np.asarray(a, dtype=float), values.shape) for a in (base, lower, upper))
+	idx = np.flatnonzero((values < lower) | (values > upper))
+	for _ in range(_MAX_REJECTION_ROUNDS):
+		if idx.size == 0:
+			return values
+		redraw = rng.normal(loc=base[idx], scale=std_dev)
+		values[idx] = redraw
+		idx = idx[(redraw < lower[idx]) | (redraw > upper[idx])]
+	return np.clip(values, lower, upper)
+
+
+def diurnal_profile_array(hours: np.ndarray, min_factor: float = 0.7, max_factor: float = 1.3) -> np.ndarray:
+	"""Vectorized `diurnal_profile` over an array of hours (0-23)."""
+	phase = (np.asarray(hours) - 19) % 24
+	cos_val = (np.cos(phase / 24 * 2 * np.pi) + 1) / 2
+	return min_factor + (max_factor - min_factor) * cos_val
+
+
+def weather_factor_array(rng: np.random.Generator, technology: str, size: int, method: Optional[str] = None) -> np.ndarray:
+	base, std_dev, lower, upper = WEATHER_PARAMS[technology]
+	return bounded_normal_array(rng, base, std_dev, lower, upper, size, method)
+
+
+def weather_variation_array(rng: np.random.Generator, size: int, method: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+	wind = weather_factor_array(rng, "wind", size, method)
+	solar = weather_factor_array(rng, "solar", size, method)
+	hydro = weather_factor_array(rng, "hydro", size, method)
+	return wind, solar, hydro
+
+
+def planned_outage_factor_array(rng: np.random.Generator, size: int) -> np.ndarray:
+	return np.where(rng.random(size) < 0.15, 0.3, 1.0)
+
+
+def fossil_price_shock_factor_array(rng: np.random.Generator, size: int) -> np.ndarray:
+	return np.where(rng.random(size) < 0.1, 0.4, 1.0)
+
+
+def compute_co2_intensity_array(rng: np.random.Generator, renewable_share_pct: np.ndarray, base_range=(50, 500), method: Optional[str] = None) -> np.ndarray:
+	low, high = base_range
+	norm = np.clip((80 - np.asarray(renewable_share_pct, dtype=float)) / 70, 0.0, 1.0)
+	base = low + norm * (high - low)
+	return bounded_normal_array(rng, base, 50, low, high, len(base), method)
@@ -0,0 +1,222 @@
+"""Compaction of the simulator's append-only output directories.
+
+Continuous mode appends one row per step, so CSV files grow unsorted with
+repeated keys and Parquet partitions fill up with many tiny part files. This
+module rewrites them:
+
+- CSV: each table file is de-duplicated, sorted by timestamp and replaced
+  atomically; `manifest.json` in the CSV directory records its row count and
+  min/max timestamp.
+- Parquet: all part files of a partition (optionally regrouped into a coarser
+  partition such as month) are merged into one sorted, de-duplicated segment;
+  `<table>/_manifest.json` records per-segment min/max so readers can skip
+  segments outside a requested range.
+
+Time-series tables keep the last row per `timestamp` (per (`timestamp`, plant or
+region) for the fleet tables). Yearly tables keep the first row per `year`,
+matching the `ignore-duplicates` upsert used for Supabase.
+Rollup tables hold partial aggregates, so their rows per `timestamp` are merged
+(`simulator.rollups.merge_rollup_frame`) rather than de-duplicated.
+
+	python -m simulator.compaction --csvdir data --parquetdir data/parquet --partition month
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import uuid
+from typing import Dict, List, Optional
+
+from .config import load_config_from_env
+from .models import ENTITY_COLUMNS, TABLE_MODELS
+from .rollups import ROLLUP_TABLES, merge_rollup_frame
+
+MANIFEST_NAME = "_manifest.json"
+CSV_MANIFEST_NAME = "manifest.json"
+
+
+def _dedupe_key(table: str) -> tuple[str, str]:
+	"""(key column, which duplicate to keep) for a canonical table."""
+	from .parquet_storage import partition_column
+
+	column = partition_column(table)
+	return column, ("last" if column == "timestamp" else "first")
+
+
+def _bounds(df, column: str) -> Dict[str, object]:
+	if df.empty:
+		return {"min": None, "max": None}
+	lo, hi = df[column].min(), df[column].max()
+	if column == "timestamp":
+		return {"min": lo.isoformat(), "max": hi.isoformat()}
+	return {"min": int(lo), "max": int(hi)}
+
+
+def _write_json_atomic(path: str, payload: dict) -> None:
+	tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		json.dump(payload, f, indent=2)
+	os.replace(tmp, path)
+
+
+def _merge_rollups(df):
+	"""One row per bucket; the merged rows have no database id."""
+	# Partial rows written twice (journal replay) share `first_sample`; count them once
+	df = df.drop_duplicates(subset=["timestamp", "first_sample"], keep="last")
+	merged = merge_rollup_frame(df)
+	merged.insert(0, "id", None)
+	return merged
+
+
+def _compact_rollup_csv(path: str) -> Dict[str, object]:
+	import pandas as pd
+
+	df = pd.read_csv(path)
+	rows_before = len(df)
+	times = ["timestamp", "first_sample", "last_sample"]
+	for column in times:
+		df[column] = pd.to_datetime(df[column], utc=True, format="ISO8601")
+	df = _merge_rollups(df)
+	bounds = _bounds(df, "timestamp")
+	for column in times:
+		df[column] = df[column].map(lambda t: t.isoformat())
+	tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+	df.to_csv(tmp, index=False)
+	os.replace(tmp, path)
+	return {"path": os.path.basename(path), "rows": int(len(df)), "rows_before": int(rows_before), **bounds}
+
+
+def compact_csv(path: str, table: str) -> Dict[str, object]:
+	"""De-duplicate and sort one CSV table in place. Returns its manifest entry."""
+	import pandas as pd
+
+	if table in ROLLUP_TABLES.values():
+		return _compact_rollup_csv(path)
+	df = pd.read_csv(path, dtype=str, keep_default_na=False)
+	rows_before = len(df)
+	column, keep = _dedupe_key(table)
+	# Sort on parsed keys but write the original strings back unchanged
+	if column == "timestamp":
+		parsed = pd.to_datetime(df[column], utc=True, format="ISO8601")
+	else:
+		parsed = df[column].astype(int)
+	keys = pd.DataFrame({column: parsed})
+	subset = [column]
+	if table in ENTITY_COLUMNS:
+		entity = ENTITY_COLUMNS[table]
+		keys[entity] = df[entity].astype(int) if entity == "plant_id" else df[entity]
+		subset.append(entity)
+	order = keys.drop_duplicates(subset=subset, keep=keep).sort_values(subset, kind="stable").index
+	df = df.loc[order]
+	bounds = _bounds(keys.loc[order], column)
+	tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+	df.to_csv(tmp, index=False)
+	os.replace(tmp, path)
+	return {"path": os.path.basename(path), "rows": int(len(df)), "rows_before": int(rows_before), **bounds}
+
+
+def compact_csv_dir(csv_dir: str) -> Dict[str, object]:
+	manifest: Dict[str, object] = {"tables": {}}
+	for table in TABLE_MODELS:
+		path = os.path.join(csv_dir, f"{table}.csv")
+		if os.path.isfile(path) and os.path.getsize(path) > 0:
+			manifest["tables"][table] = {"segments": [compact_csv(path, table)]}
+	if manifest["tables"]:
+		_write_json_atomic(os.path.join(csv_dir, CSV_MANIFEST_NAME), manifest)
+	return manifest
+
+
+def compact_parquet_table(base_dir: str, table: str, partition: Optional[str] = None) -> Dict[str, object]:
+	"""Merge each partition of a Parquet table into a single sorted segment.
+
+	With `partition` (day | month) time-series partitions are regrouped into that
+	grain, e.g. thirty `day=` directories become one `month=` segment.
+	"""
+	from .parquet_storage import arrow_schema, partition_bounds, require_pyarrow, write_partitioned_table
+
+	pa = require_pyarrow()
+	import pandas as pd
+	import pyarrow.dataset as ds
+
+	table_dir = os.path.join(base_dir, table)
+	if not os.path.isdir(table_dir):
+		return {"segments": []}
+	column, keep = _dedupe_key(table)
+	if column != "timestamp":
+		partition = None
+
+	# Group existing part files by the partition they will be merged into
+	groups: Dict[str, List[str]] = {}
+	for name in sorted(os.listdir(table_dir)):
+		bounds = partition_bounds(name)
+		if bounds is None:
+			continue
+		target = name
+		if partition == "month":
+			target = f"month={bounds[0]:%Y-%m}"
+		elif partition == "day" and not name.startswith("day="):
+			# Never split coarser partitions; keep them as they are
+			target = name
+		part_dir = os.path.join(table_dir, name)
+		groups.setdefault(target, []).extend(
+			os.path.join(part_dir, f) for f in sorted(os.listdir(part_dir)) if f.endswith(".parquet")
+		)
+
+	segments = []
+	for target, files in sorted(groups.items()):
+		if not files:
+			continue
+		schema = arrow_schema(table)
+		# Arrow-backed dtypes keep nullable ints (e.g. id) intact through pandas
+		df = ds.dataset(files, format="parquet").to_table().to_pandas(types_mapper=pd.ArrowDtype)
+		if table in ROLLUP_TABLES.values():
+			df = _merge_rollups(df)
+		else:
+			subset = [column, ENTITY_COLUMNS[table]] if table in ENTITY_COLUMNS else [column]
+			df = df.drop_duplicates(subset=subset, keep=keep).sort_values(subset, kind="stable")
+		# Drop pandas metadata so readers get plain numpy dtypes, as for fresh files
+		merged = pa.Table.from_pandas(df, schema=schema, preserve_index=False).replace_schema_metadata(None)
+		grain = target.partition("=")[0]
+		written = write_partitioned_table(base_dir, table, merged, partition=grain if grain in ("day", "month") else "day")
+		# New segment is durable before the inputs are removed
+		for path in files:
+			os.remove(path)
+		for path in written:
+			segments.append({"path": os.path.relpath(path, table_dir), "rows": int(len(df)), **_bounds(df, column)})
+
+	for name in os.listdir(table_dir):
+		part_dir = os.path.join(table_dir, name)
+		if os.path.isdir(part_dir) and not os.listdir(part_dir):
+			os.rmdir(part_dir)
+	manifest = {"table": table, "key": column, "segments": segments}
+	_write_json_atomic(os.path.join(table_dir, MANIFEST_NAME), manifest)
+	return manifest
+
+
+def compact_parquet_dir(base_dir: str, partition: Optional[str] = None) -> Dict[str, object]:
+	return {table: compact_parquet_table(base_dir, table, partition) for table in TABLE_MODELS}
+
+
+def main() -> None:
+	cfg = load_config_from_env()
+	parser = argparse.ArgumentParser(description="Compact simulator CSV/Parquet outputs")
+	parser.add_argument("--csvdir", type=str, default=cfg.csv_output_dir, help="CSV output directory to compact")
+	parser.add_argument("--parquetdir", type=str, default=cfg.parquet_output_dir, help="Parquet output directory to compact")
+	parser.add_argument("--partition", choices=["day", "month"], default=None, help="Regroup Parquet partitions into this grain")
+	parser.add_argument("--skip-csv", action="store_true")
+	parser.add_argument("--skip-parquet", action="store_true")
+	args = parser.parse_args()
+
+	if not args.skip_csv and os.path.isdir(args.csvdir):
+		for table, entry in compact_csv_dir(args.csvdir)["tables"].items():
+			seg = entry["segments"][0]
+			print(f"csv {table}: {seg['rows_before']} -> {seg['rows']} rows")
+	if not args.skip_parquet and os.path.isdir(args.parquetdir):
+		for table, manifest in compact_parquet_dir(args.parquetdir, args.partition).items():
+			print(f"parquet {table}: {len(manifest['segments'])} segments")
+
+
+if __name__ == "__main__":
+	main()
@@ -11,19 +11,51 @@ class SimulatorConfig:
 	wall_interval_seconds: int = 5
 	step_minutes: int = 15
 	random_seed: Optional[int] = None
-	output_mode: str = "csv"  # csv | supabase | both
+	bounded_method: str = "clip"  # clip | truncate (see simulator.bias.bounded_normal)
+	output_mode: str = "csv"  # csv | supabase | both | parquet
 	csv_output_dir: str = "data"
+	# Parquet output (output_mode=parquet): typed files partitioned by day | month
+	parquet_output_dir: str = "data/parquet"
+	parquet_partition: str = "day"
+	# Buffered CSV writer thresholds (continuous mode); whichever is hit first flushes
+	csv_buffer_rows: int = 500
+	csv_buffer_bytes: int = 1 << 20
+	csv_flush_seconds: float = 10.0
 	# Supabase
 	supabase_url: Optional[str] = None
 	supabase_key: Optional[str] = None
+	supabase_chunk_size: int = 1000  # max rows per POST
+	supabase_gzip: bool = False  # gzip request bodies
+	# Continuous mode: deliver from a background thread with a bounded queue
+	supabase_async: bool = True
+	supabase_queue_size: int = 1000  # queued insert calls before the simulator blocks
+	supabase_spool_path: str = "data/.supabase_spool.jsonl"
+	# Hourly/daily rollups maintained by the write path (simulator.rollups); opt-in
+	# (SIM_ROLLUPS=hourly,daily) since Supabase outputs need supabase/sql/06_rollups.sql first
+	rollup_grains: tuple = ()
+	# Write-ahead journal (simulator.journal); when set, sinks consume from it
+	journal_path: Optional[str] = None
+	journal_max_bytes: int = 64 << 20  # truncated past this once every sink has caught up
+	# Fleet definition CSV for simulator.fleet (synthetic fleet when unset)
+	fleet_path: Optional[str] = None
+	# Timing spans (simulator.telemetry); a metrics port or snapshot path also enables them
+	telemetry: bool = False
+	metrics_port: Optional[int] = None  # Prometheus /metrics on localhost
+	telemetry_snapshot_path: Optional[str] = None
+	telemetry_snapshot_seconds: float = 60.0
+	profile: Optional[str] = None  # cprofile | sample, for the whole run
+	profile_path: str = "data/profile"
 	# Tables
 	table_co2_intensity: str = "co2_intensity"
 	table_generation_mix: str = "generation_mix"
 	table_netzero_alignment: str = "netzero_alignment"
+	table_rollup_hourly: str = "energy_rollup_hourly"
+	table_rollup_daily: str = "energy_rollup_daily"
 
 
 def load_config_from_env() -> SimulatorConfig:
 	from dotenv import load_dotenv
+	from .rollups import parse_grains
 	load_dotenv(override=False)
 
 	return SimulatorConfig(
@@ -32,12 +64,35 @@ def load_config_from_env() -> SimulatorConfig:
 		wall_interval_seconds=int(os.getenv("SIM_WALL_INTERVAL_SECONDS", os.getenv("WALL_INTERVAL_SECONDS", "5"))),
 		step_minutes=int(os.getenv("SIM_STEP_MINUTES", os.getenv("STEP_MINUTES", "15"))),
 		random_seed=int(os.getenv("SIM_RANDOM_SEED")) if os.getenv("SIM_RANDOM_SEED") else None,
+		bounded_method=os.getenv("SIM_BOUNDED_METHOD", "clip"),
 		output_mode=os.getenv("OUTPUT_MODE", "csv"),
 		csv_output_dir=os.getenv("CSV_OUTPUT_DIR", "data"),
+		parquet_output_dir=os.getenv("PARQUET_OUTPUT_DIR", "data/parquet"),
+		parquet_partition=os.getenv("PARQUET_PARTITION", "day"),
+		csv_buffer_rows=int(os.getenv("CSV_BUFFER_ROWS", "500")),
+		csv_buffer_bytes=int(os.getenv("CSV_BUFFER_BYTES", str(1 << 20))),
+		csv_flush_seconds=float(os.getenv("CSV_FLUSH_SECONDS", "10")),
 		supabase_url=os.getenv("SUPABASE_URL") or None,
 		supabase_key=os.getenv("SUPABASE_KEY") or None,
+		supabase_chunk_size=int(os.getenv("SUPABASE_CHUNK_SIZE", "1000")),
+		supabase_gzip=os.getenv("SUPABASE_GZIP", "0").lower() in ("1", "true", "yes"),
+		supabase_async=os.getenv("SUPABASE_ASYNC", "1").lower() in ("1", "true", "yes"),
+		supabase_queue_size=int(os.getenv("SUPABASE_QUEUE_SIZE", "1000")),
+		supabase_spool_path=os.getenv("SUPABASE_SPOOL_PATH", "data/.supabase_spool.jsonl"),
+		rollup_grains=parse_grains(os.getenv("SIM_ROLLUPS", "")),
+		journal_path=os.getenv("SIM_JOURNAL_PATH") or None,
+		journal_max_bytes=int(os.getenv("SIM_JOURNAL_MAX_BYTES", str(64 << 20))),
+		fleet_path=os.getenv("SIM_FLEET_PATH") or None,
+		telemetry=os.getenv("SIM_TELEMETRY", "0").lower() in ("1", "true", "yes"),
+		metrics_port=int(os.getenv("SIM_METRICS_PORT")) if os.getenv("SIM_METRICS_PORT") else None,
+		telemetry_snapshot_path=os.getenv("SIM_TELEMETRY_SNAPSHOT") or None,
+		telemetry_snapshot_seconds=float(os.getenv("SIM_TELEMETRY_SNAPSHOT_SECONDS", "60")),
+		profile=os.getenv("SIM_PROFILE") or None,
+		profile_path=os.getenv("SIM_PROFILE_PATH", "data/profile"),
 		table_co2_intensity=os.getenv("TABLE_CO2_INTENSITY", "co2_intensity"),
 		table_generation_mix=os.getenv("TABLE_GENERATION_MIX", "generation_mix"),
 		table_netzero_alignment=os.getenv("TABLE_NETZERO_ALIGNMENT", "netzero_alignment"),
+		table_rollup_hourly=os.getenv("TABLE_ROLLUP_HOURLY", "energy_rollup_hourly"),
+		table_rollup_daily=os.getenv("TABLE_ROLLUP_DAILY", "energy_rollup_daily"),
 	)
 
@@ -0,0 +1,373 @@
+"""Fleet-scale simulation: many plants across regions per step.
+
+`simulate_generation_mix` models a single system. A `Fleet` is a portfolio of
+plants (technology, capacity, region) held as parallel NumPy arrays, and
+`simulate_fleet_batch` draws the output of every plant at every step as one
+(steps x plants) matrix:
+
+- weather (wind, solar, hydro) and fossil price shocks are drawn per region and
+  step, so plants of a region move together;
+- each plant adds its own noise, and nuclear plants their own outages;
+- output is capacity x technology capacity factor x those factors, capped at
+  capacity.
+
+Region rows in `GenerationMixRecord` / `Co2IntensityRecord` shape are derived
+from the plant matrix with one `bincount` per quantity; intensity is the
+output-weighted mean of the plants' emission factors.
+
+	python -m simulator.fleet once --plants 10000 --regions 12
+	python -m simulator.fleet backfill --start 2025-01-01 --end 2026-01-01 --plants 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .batch import TECHNOLOGIES, _columns_to_rows, _hours_of, step_timestamps
+from .bias import bounded_normal_array, diurnal_profile_array, fossil_price_shock_factor_array, planned_outage_factor_array, weather_factor_array
+from .config import SimulatorConfig, load_config_from_env
+from .models import ENTITY_COLUMNS, PlantOutputRecord, RegionCo2IntensityRecord, RegionGenerationMixRecord
+from .rng import chunk_rng, get_rng, new_entropy, plant_rngs
+from .storage import BufferedCsvWriter
+from .supabase_client import SupabaseClient
+
+# Mean capacity factor per technology (solar: during daylight)
+CAPACITY_FACTORS = {"hydro": 0.45, "wind": 0.35, "solar": 0.6, "nuclear": 0.9, "fossil": 0.55}
+# Default emission factor per technology, g/kWh (fossil: gas/coal mix)
+EMISSION_FACTORS = {"hydro": 0.0, "wind": 0.0, "solar": 0.0, "nuclear": 0.0, "fossil": 650.0}
+# Installed-capacity shares of a synthetic fleet, after the single-system baselines
+_SYNTHETIC_MIX = {"hydro": 0.14, "wind": 0.30, "solar": 0.10, "nuclear": 0.22, "fossil": 0.24}
+_RENEWABLES = ("hydro", "wind", "solar")
+
+FLEET_TABLES = ("fleet_plant_output", "fleet_generation_mix", "fleet_co2_intensity")
+_FIELDS = {
+	"fleet_plant_output": [f.name for f in fields(PlantOutputRecord)],
+	"fleet_generation_mix": [f.name for f in fields(RegionGenerationMixRecord)],
+	"fleet_co2_intensity": [f.name for f in fields(RegionCo2IntensityRecord)],
+}
+
+
+@dataclass
+class Fleet:
+	"""Plants as parallel arrays; `technology` and `region` are indices into the name tuples."""
+	plant_id: np.ndarray
+	technology: np.ndarray
+	region: np.ndarray
+	capacity_mw: np.ndarray
+	emission_factor_g_per_kwh: np.ndarray
+	regions: tuple
+
+	def __len__(self) -> int:
+		return len(self.plant_id)
+
+	@classmethod
+	def from_rows(cls, rows: Sequence[Dict[str, object]]) -> "Fleet":
+		"""Build from dicts with plant_id, technology, capacity_mw, region and optionally emission_factor_g_per_kwh."""
+		regions = tuple(sorted({str(r["region"]) for r in rows}))
+		region_index = {name: i for i, name in enumerate(regions)}
+		unknown = sorted({str(r["technology"]) for r in rows} - set(TECHNOLOGIES))
+		if unknown:
+			raise ValueError(f"Unknown technologies in fleet: {unknown} (expected {TECHNOLOGIES})")
+		tech = np.array([TECHNOLOGIES.index(str(r["technology"])) for r in rows], dtype=np.int64)
+		default_ef = np.array([EMISSION_FACTORS[t] for t in TECHNOLOGIES])[tech]
+		ef = np.array([float(r["emission_factor_g_per_kwh"]) if r.get("emission_factor_g_per_kwh") not in (None, "") else np.nan for r in rows])
+		return cls(
+			plant_id=np.array([int(r["plant_id"]) for r in rows], dtype=np.int64),
+			technology=tech,
+			region=np.array([region_index[str(r["region"])] for r in rows], dtype=np.int64),
+			capacity_mw=np.array([float(r["capacity_mw"]) for r in rows]),
+			emission_factor_g_per_kwh=np.where(np.isnan(ef), default_ef, ef),
+			regions=regions,
+		)
+
+
+def load_fleet(path: str) -> Fleet:
+	"""Read a fleet definition CSV (one plant per row, columns as in `Fleet.from_rows`)."""
+	with open(path, "r", newline="", encoding="utf-8") as f:
+		return Fleet.from_rows(list(csv.DictReader(f)))
+
+
+def synthetic_fleet(n_plants: int, n_regions: int = 10, seed: Optional[int] = None) -> Fleet:
+	"""A random fleet with roughly the single-system technology mix.
+
+	Plant sizes are log-normal around a per-technology median (nuclear and fossil
+	units are large, wind and solar farms small); fossil emission factors span gas
+	(~400 g/kWh) to coal (~950 g/kWh).
+	"""
+	rng = np.random.default_rng(seed)
+	shares = np.array([_SYNTHETIC_MIX[t] for t in TECHNOLOGIES])
+	median_mw = np.array([120.0, 60.0, 30.0, 1000.0, 400.0])
+	# Plant counts in proportion to capacity share / unit size
+	weights = shares / median_mw
+	tech = rng.choice(len(TECHNOLOGIES), size=n_plants, p=weights / weights.sum())
+	capacity = np.round(median_mw[tech] * rng.lognormal(0.0, 0.4, n_plants), 1)
+	ef = np.array([EMISSION_FACTORS[t] for t in TECHNOLOGIES])[tech]
+	fossil = tech == TECHNOLOGIES.index("fossil")
+	ef[fossil] = np.round(rng.uniform(400.0, 950.0, int(fossil.sum())), 0)
+	return Fleet(
+		plant_id=np.arange(1, n_plants + 1, dtype=np.int64),
+		technology=tech.astype(np.int64),
+		region=rng.integers(0, n_regions, n_plants),
+		capacity_mw=capacity,
+		emission_factor_g_per_kwh=ef,
+		regions=tuple(f"R{i:02d}" for i in range(n_regions)),
+	)
+
+
+@dataclass
+class FleetBatch:
+	timestamp: np.ndarray
+	# (steps, plants) MW
+	output_mw: np.ndarray
+	fleet: Fleet
+
+	def __len__(self) -> int:
+		return len(self.timestamp)
+
+	def plant_columns(self) -> Dict[str, np.ndarray]:
+		"""One row per (step, plant), step-major."""
+		steps, plants = self.output_mw.shape
+		return {
+			"timestamp": np.repeat(self.timestamp, plants),
+			"plant_id": np.tile(self.fleet.plant_id, steps),
+			"region": np.tile(np.asarray(self.fleet.regions, dtype=object)[self.fleet.region], steps),
+			"technology": np.tile(np.asarray(TECHNOLOGIES, dtype=object)[self.fleet.technology], steps),
+			"output_mw": self.output_mw.ravel(),
+		}
+
+	def _by_region(self, weights: np.ndarray, per_technology: bool) -> np.ndarray:
+		"""Sum `weights` (steps, plants) into (steps, regions[, technologies])."""
+		steps, _ = weights.shape
+		n_regions, n_tech = len(self.fleet.regions), len(TECHNOLOGIES)
+		group = self.fleet.region * n_tech + self.fleet.technology if per_technology else self.fleet.region
+		width = n_regions * n_tech if per_technology else n_regions
+		index = (np.arange(steps)[:, None] * width + group[None, :]).ravel()
+		sums = np.bincount(index, weights=weights.ravel(), minlength=steps * width)
+		return sums.reshape((steps, n_regions, n_tech) if per_technology else (steps, n_regions))
+
+	def region_generation_columns(self) -> Dict[str, np.ndarray]:
+		"""One `RegionGenerationMixRecord`-shaped row per (step, region)."""
+		by_tech = self._by_region(self.output_mw, per_technology=True)
+		steps, n_regions, _ = by_tech.shape
+		columns: Dict[str, np.ndarray] = {"timestamp": np.repeat(self.timestamp, n_regions)}
+		for i, tech in enumerate(TECHNOLOGIES):
+			columns[f"{tech}_mw"] = np.round(by_tech[:, :, i].ravel(), 1)
+		total = by_tech.sum(axis=2).ravel()
+		renewables = by_tech[:, :, [TECHNOLOGIES.index(t) for t in _RENEWABLES]].sum(axis=2).ravel()
+		columns["total_mw"] = np.round(total, 1)
+		columns["renewable_share_pct"] = np.round(np.divide(100.0 * renewables, total, out=np.zeros_like(total), where=total > 0), 1)
+		columns["region"] = np.tile(np.asarray(self.fleet.regions, dtype=object), steps)
+		return columns
+
+	def region_co2_columns(self) -> Dict[str, np.ndarray]:
+		"""One `RegionCo2IntensityRecord`-shaped row per (step, region)."""
+		total = self._by_region(self.output_mw, per_technology=False)
+		emissions = self._by_region(self.output_mw * self.fleet.emission_factor_g_per_kwh, per_technology=False)
+		steps, n_regions = total.shape
+		intensity = np.divide(emissions, total, out=np.zeros_like(total), where=total > 0)
+		return {
+			"timestamp": np.repeat(self.timestamp, n_regions),
+			"co2_intensity_g_per_kwh": np.round(intensity.ravel(), 1),
+			"region": np.tile(np.asarray(self.fleet.regions, dtype=object), steps),
+		}
+
+	def tables(self, plant_rows: bool = True) -> Dict[str, Dict[str, np.ndarray]]:
+		"""Columns per fleet table; per-plant rows are optional since they dominate the volume."""
+		tables = {"fleet_generation_mix": self.region_generation_columns(), "fleet_co2_intensity": self.region_co2_columns()}
+		if plant_rows:
+			tables["fleet_plant_output"] = self.plant_columns()
+		return tables
+
+
+def simulate_fleet_batch(
+	fleet: Fleet,
+	timestamps: Sequence[datetime] | np.ndarray,
+	rng: Optional[np.random.Generator] = None,
+	method: Optional[str] = None,
+) -> FleetBatch:
+	"""Output of every plant of `fleet` at every timestamp.
+
+	Draws come from child streams of `rng` (regional weather, plant noise,
+	outages, price shocks), so the result is a pure function of the stream state.
+	"""
+	if rng is None:
+		rng = get_rng()
+	streams = plant_rngs(rng, (*_RENEWABLES, "fossil", "nuclear", "plants"))
+	ts = np.asarray(timestamps)
+	n_steps, n_plants, n_regions = len(ts), len(fleet), len(fleet.regions)
+	hours = _hours_of(ts)
+
+	# Regional factor per (step, region, technology)
+	regional = np.ones((n_steps, n_regions, len(TECHNOLOGIES)))
+	for tech in _RENEWABLES:
+		regional[:, :, TECHNOLOGIES.index(tech)] = weather_factor_array(streams[tech], tech, n_steps * n_regions, method).reshape(n_steps, n_regions)
+	daylight = (hours >= 8) & (hours <= 18)
+	regional[:, :, TECHNOLOGIES.index("solar")] *= np.where(daylight, 1.0, 0.02)[:, None]
+	load_factor = diurnal_profile_array(hours, 0.85, 1.15)
+	shock = fossil_price_shock_factor_array(streams["fossil"], n_steps * n_regions).reshape(n_steps, n_regions)
+	regional[:, :, TECHNOLOGIES.index("fossil")] = load_factor[:, None] * shock
+
+	base_cf = np.array([CAPACITY_FACTORS[t] for t in TECHNOLOGIES])[fleet.technology]
+	factor = regional[:, fleet.region, fleet.technology]
+	factor *= bounded_normal_array(streams["plants"], 1.0, 0.15, 0.5, 1.5, n_steps * n_plants, method).reshape(n_steps, n_plants)
+	nuclear = np.flatnonzero(fleet.technology == TECHNOLOGIES.index("nuclear"))
+	if len(nuclear):
+		factor[:, nuclear] *= planned_outage_factor_array(streams["nuclear"], n_steps * len(nuclear)).reshape(n_steps, len(nuclear))
+
+	output = np.minimum(fleet.capacity_mw * base_cf * factor, fleet.capacity_mw)
+	return FleetBatch(timestamp=ts, output_mw=np.round(np.maximum(output, 0.0), 1), fleet=fleet)
+
+
+@dataclass(frozen=True)
+class FleetChunk:
+	start: datetime
+	count: int
+	step_minutes: int
+	entropy: int
+	index: int
+	bounded_method: str = "clip"
+
+
+# Set in each worker by `_init_worker`, so the fleet is pickled once per process rather than per chunk
+_WORKER_FLEET: Optional[Fleet] = None
+
+
+def _init_worker(fleet: Fleet) -> None:
+	global _WORKER_FLEET
+	_WORKER_FLEET = fleet
+
+
+def _fleet_chunk(chunk: FleetChunk, fleet: Optional[Fleet] = None) -> FleetBatch:
+	"""Generate one chunk; its stream depends only on (entropy, chunk index)."""
+	rng = chunk_rng(chunk.entropy, chunk.index)
+	timestamps = step_timestamps(chunk.start, chunk.count, chunk.step_minutes)
+	return simulate_fleet_batch(fleet if fleet is not None else _WORKER_FLEET, timestamps, rng=rng, method=chunk.bounded_method)
+
+
+def fleet_chunks(cfg: SimulatorConfig, start: datetime, end: datetime, chunk_days: int, entropy: int) -> List[FleetChunk]:
+	step = timedelta(minutes=cfg.step_minutes)
+	total_steps = max(0, -(-(end - start) // step))
+	steps_per_chunk = max(1, int(timedelta(days=chunk_days) / step))
+	return [
+		FleetChunk(start + offset * step, min(steps_per_chunk, total_steps - offset), cfg.step_minutes, entropy, index, cfg.bounded_method)
+		for index, offset in enumerate(range(0, total_steps, steps_per_chunk))
+	]
+
+
+def iter_fleet(
+	cfg: SimulatorConfig,
+	fleet: Fleet,
+	start: datetime,
+	end: datetime,
+	chunk_days: int = 1,
+	workers: Optional[int] = None,
+	entropy: Optional[int] = None,
+) -> Iterator[FleetBatch]:
+	"""Yield fleet batches covering [start, end) in chronological order, generated on `workers` processes."""
+	if entropy is None:
+		entropy = cfg.random_seed if cfg.random_seed is not None else new_entropy()
+	chunks = fleet_chunks(cfg, start, end, chunk_days, entropy)
+	workers = workers or os.cpu_count() or 1
+	if workers <= 1 or len(chunks) <= 1:
+		for chunk in chunks:
+			yield _fleet_chunk(chunk, fleet)
+		return
+	with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker, initargs=(fleet,)) as pool:
+		yield from pool.map(_fleet_chunk, chunks)
+
+
+def write_fleet_batch(
+	cfg: SimulatorConfig,
+	batch: FleetBatch,
+	plant_rows: bool = True,
+	csv_writer: Optional[BufferedCsvWriter] = None,
+	parquet_writer=None,
+	sb: Optional[SupabaseClient] = None,
+) -> None:
+	for table, columns in batch.tables(plant_rows).items():
+		if csv_writer is not None:
+			csv_writer.append_columns(f"{cfg.csv_output_dir}/{table}.csv", columns, _FIELDS[table])
+		if parquet_writer is not None:
+			parquet_writer.append_columns(table, columns)
+		if sb is not None and sb.enabled():
+			# Matches the unique (timestamp, plant/region) indexes, so re-running a seeded range skips written rows
+			sb.insert_rows(table, _columns_to_rows(columns), on_conflict=f"timestamp,{ENTITY_COLUMNS[table]}", resolution="ignore-duplicates")
+
+
+def run_fleet(
+	cfg: SimulatorConfig,
+	fleet: Fleet,
+	start: datetime,
+	end: datetime,
+	chunk_days: int = 1,
+	workers: Optional[int] = None,
+	plant_rows: bool = True,
+) -> int:
+	"""Generate and write fleet data for [start, end). Returns the number of steps."""
+	from .parquet_storage import BufferedParquetWriter
+
+	sb = SupabaseClient(cfg.supabase_url, cfg.supabase_key, chunk_size=cfg.supabase_chunk_size, gzip=cfg.supabase_gzip) if cfg.output_mode in ("supabase", "both") else None
+	parquet_writer = BufferedParquetWriter(cfg.parquet_output_dir, cfg.parquet_partition, max_rows=1, max_seconds=0.0) if cfg.output_mode == "parquet" else None
+	steps = 0
+	with BufferedCsvWriter(max_rows=1 << 62, max_bytes=cfg.csv_buffer_bytes, max_seconds=float("inf")) as writer:
+		csv_writer = writer if cfg.output_mode in ("csv", "both") else None
+		for batch in iter_fleet(cfg, fleet, start, end, chunk_days=chunk_days, workers=workers):
+			write_fleet_batch(cfg, batch, plant_rows, csv_writer=csv_writer, parquet_writer=parquet_writer, sb=sb)
+			steps += len(batch)
+	if sb is not None:
+		sb.close()
+	return steps
+
+
+def main() -> None:
+	from .simulate import _now_tz, _parse_datetime
+
+	parser = argparse.ArgumentParser(description="Fleet-scale simulation (many plants across regions)")
+	parser.add_argument("mode", choices=["once", "backfill"], nargs="?", default="once")
+	parser.add_argument("--fleet", type=str, default=None, help="Fleet definition CSV (default: SIM_FLEET_PATH, else synthetic)")
+	parser.add_argument("--plants", type=int, default=1000, help="Synthetic fleet size")
+	parser.add_argument("--regions", type=int, default=10, help="Synthetic fleet regions")
+	parser.add_argument("--seed", type=int, default=None)
+	parser.add_argument("--output", choices=["csv", "supabase", "both", "parquet"], default=None, help="Override output mode")
+	parser.add_argument("--start", type=str, default=None, help="Backfill start (ISO date/datetime, inclusive)")
+	parser.add_argument("--end", type=str, default=None, help="Backfill end (ISO date/datetime, exclusive)")
+	parser.add_argument("--chunk-days", type=int, default=1, help="Simulated days per worker task")
+	parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+	parser.add_argument("--no-plant-rows", action="store_true", help="Write region aggregates only")
+	args = parser.parse_args()
+	if args.mode == "backfill" and (not args.start or not args.end):
+		parser.error("backfill requires --start and --end")
+
+	cfg = load_config_from_env()
+	if args.seed is not None:
+		cfg = replace(cfg, random_seed=args.seed)
+	if args.output:
+		cfg = replace(cfg, output_mode=args.output)
+	fleet_path = args.fleet or cfg.fleet_path
+	fleet = load_fleet(fleet_path) if fleet_path else synthetic_fleet(args.plants, args.regions, seed=cfg.random_seed)
+
+	if args.mode == "backfill":
+		start = _parse_datetime(args.start, cfg.timezone)
+		end = _parse_datetime(args.end, cfg.timezone)
+	else:
+		now = _now_tz(cfg.timezone)
+		# Same step-aligned anchor as `simulate.run_once`
+		start = now - timedelta(seconds=int(now.timestamp()) % (cfg.step_minutes * 60))
+		end = start + timedelta(minutes=cfg.step_minutes)
+	began = time.perf_counter()
+	steps = run_fleet(cfg, fleet, start, end, chunk_days=args.chunk_days, workers=args.workers, plant_rows=not args.no_plant_rows)
+	elapsed = time.perf_counter() - began
+	print(f"Fleet of {len(fleet)} plants in {len(fleet.regions)} regions: {steps} steps, {steps * len(fleet)} plant-steps in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+	main()
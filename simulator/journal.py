@@ -0,0 +1,388 @@
+"""Write-ahead journal for simulator outputs.
+
+Every generated step is appended to one append-only binary journal before any
+sink sees it. Each sink (CSV, Supabase) then consumes the journal from its own
+committed byte offset, so a crash between sink writes can no longer leave CSV
+and Supabase silently diverged: on restart each sink replays exactly what it
+has not committed, in bulk.
+
+Record framing: 4-byte big-endian payload length, 4-byte CRC32 of the payload,
+then the payload (UTF-8 JSON `{"key": ..., "tables": {table: [rows]}}`). A torn
+or corrupt tail left by a crash is detected by the length/CRC check and
+truncated when the journal is reopened.
+
+Delivery is at-least-once from the journal's point of view; the sinks make the
+replay idempotent. The CSV sink commits its file sizes with each offset and
+truncates anything written past them before replaying; the Supabase sink
+upserts with `on_conflict` + `ignore-duplicates` on each table's key
+(`timestamp`, `year` for the yearly table, (`timestamp`, `first_sample`) for
+rollups; see supabase/sql/05_unique_keys.sql and 06_rollups.sql). Parquet parts written twice are dropped by
+`simulator.compaction`.
+
+Once every sink has committed the end of a journal larger than `max_bytes`, it
+is truncated to empty and all offsets reset to 0 (`Journal.truncate`), so a
+long-running simulator does not grow it without bound.
+
+	python -m simulator.journal status
+	python -m simulator.journal replay --sink csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import struct
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple, get_type_hints
+
+from .config import SimulatorConfig, load_config_from_env
+from .storage import append_csv, ensure_dir
+from .supabase_client import SupabaseClient
+
+log = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">II")  # payload length, crc32
+
+# Idempotency key per canonical table
+TABLE_KEYS = {
+	"co2_intensity": "timestamp",
+	"generation_mix": "timestamp",
+	"netzero_alignment": "year",
+	# Rollup rows are partial aggregates, one per (bucket, first step covered)
+	"energy_rollup_hourly": "timestamp,first_sample",
+	"energy_rollup_daily": "timestamp,first_sample",
+}
+
+Tables = Dict[str, List[Dict[str, Any]]]
+
+
+def _jsonable(value: Any) -> Any:
+	return value.isoformat() if isinstance(value, datetime) else value
+
+
+class Journal:
+	def __init__(self, path: str, fsync: bool = True):
+		self.path = path
+		self.fsync = fsync
+		self.offsets_path = f"{path}.offsets.json"
+		ensure_dir(os.path.dirname(path))
+		self._offsets: Dict[str, int] = {}
+		self._states: Dict[str, Any] = {}
+		# Key of the newest record, so callers can resume after it
+		self.last_key: Any = None
+		if os.path.isfile(self.offsets_path):
+			with open(self.offsets_path, "r", encoding="utf-8") as f:
+				state = json.load(f)
+			self._offsets = {k: int(v) for k, v in state.get("offsets", {}).items()}
+			self._states = state.get("sinks", {})
+			self.last_key = state.get("last_key")
+		# Offsets past the end are left by a crash between truncating the file and
+		# saving the reset offsets; truncation only happens once every sink was at the end
+		size = os.path.getsize(path) if os.path.isfile(path) else 0
+		self._offsets = {k: min(v, size) for k, v in self._offsets.items()}
+		self._truncate_torn_tail()
+		self._fh = open(path, "ab")
+
+	def close(self) -> None:
+		self._fh.close()
+
+	def __enter__(self) -> "Journal":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	@property
+	def end_offset(self) -> int:
+		return self._fh.tell()
+
+	def _truncate_torn_tail(self) -> None:
+		if not os.path.isfile(self.path):
+			return
+		# Everything before the slowest sink's offset was read back successfully already
+		valid = min(self._offsets.values(), default=0)
+		for valid, record in self.read(valid):
+			self.last_key = record.get("key")
+		if valid < os.path.getsize(self.path):
+			with open(self.path, "r+b") as f:
+				f.truncate(valid)
+
+	def append(self, key: Any, tables: Tables) -> int:
+		"""Append one step's rows. Returns the offset just past the new record."""
+		payload = json.dumps(
+			{"key": _jsonable(key), "tables": {t: [{k: _jsonable(v) for k, v in r.items()} for r in rows] for t, rows in tables.items() if rows}},
+			separators=(",", ":"),
+		).encode("utf-8")
+		self._fh.write(_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+		self._fh.flush()
+		if self.fsync:
+			os.fsync(self._fh.fileno())
+		self.last_key = _jsonable(key)
+		return self._fh.tell()
+
+	def read(self, offset: int = 0, max_records: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+		"""Yield (offset after record, record) from `offset`, stopping at a torn tail."""
+		if not os.path.isfile(self.path):
+			return
+		count = 0
+		with open(self.path, "rb") as f:
+			f.seek(offset)
+			while max_records is None or count < max_records:
+				header = f.read(_HEADER.size)
+				if len(header) < _HEADER.size:
+					return
+				length, crc = _HEADER.unpack(header)
+				payload = f.read(length)
+				if len(payload) < length or zlib.crc32(payload) != crc:
+					return
+				count += 1
+				yield f.tell(), json.loads(payload)
+
+	def truncate(self) -> None:
+		"""Drop every record and reset all offsets to 0.
+
+		Only valid once every sink has committed `end_offset`; `last_key` is kept.
+		"""
+		self._fh.close()
+		with open(self.path, "r+b") as f:
+			f.truncate(0)
+			if self.fsync:
+				os.fsync(f.fileno())
+		self._fh = open(self.path, "ab")
+		self._offsets = {k: 0 for k in self._offsets}
+		self._save()
+
+	def caught_up(self, sinks: List[str]) -> bool:
+		"""Whether `sinks`, and every other sink that ever committed, consumed the whole journal."""
+		return all(self.committed(name) == self.end_offset for name in {*sinks, *self._offsets})
+
+	def committed(self, sink: str) -> int:
+		return self._offsets.get(sink, 0)
+
+	def sink_state(self, sink: str) -> Any:
+		return self._states.get(sink)
+
+	def commit(self, sink: str, offset: int, state: Any = None) -> None:
+		"""Record that `sink` has durably consumed everything before `offset`.
+
+		`state` is sink-specific recovery data saved atomically with the offset.
+		"""
+		self._offsets[sink] = offset
+		if state is not None:
+			self._states[sink] = state
+		self._save()
+
+	def _save(self) -> None:
+		state = {"offsets": self._offsets, "sinks": self._states, "last_key": self.last_key}
+		tmp = f"{self.offsets_path}.{uuid.uuid4().hex[:8]}.tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(state, f)
+			f.flush()
+			if self.fsync:
+				os.fsync(f.fileno())
+		os.replace(tmp, self.offsets_path)
+
+
+class CsvSink:
+	"""Appends journal rows to `<csv_dir>/<table>.csv`.
+
+	Its committed state is the size of each file at the last commit; on recovery,
+	rows appended after that (by a run that crashed before committing) are cut off
+	so the replay does not write them twice.
+	"""
+
+	name = "csv"
+
+	def __init__(self, csv_dir: str):
+		self.csv_dir = csv_dir
+
+	def _path(self, table: str) -> str:
+		return os.path.join(self.csv_dir, f"{table}.csv")
+
+	def state(self) -> Dict[str, int]:
+		return {t: os.path.getsize(self._path(t)) if os.path.isfile(self._path(t)) else 0 for t in TABLE_KEYS}
+
+	def recover(self, state: Dict[str, int]) -> None:
+		for table, size in state.items():
+			path = self._path(table)
+			if os.path.isfile(path) and os.path.getsize(path) > size:
+				with open(path, "r+b") as f:
+					f.truncate(size)
+
+	def write(self, tables: Tables) -> None:
+		for table, rows in tables.items():
+			append_csv(self._path(table), rows)
+
+
+class SupabaseSink:
+	"""Upserts journal rows with `ignore-duplicates` on each table's idempotency key."""
+
+	name = "supabase"
+
+	def __init__(self, client: SupabaseClient, table_names: Dict[str, str]):
+		self.client = client
+		self.table_names = table_names
+
+	def write(self, tables: Tables) -> None:
+		for table, rows in tables.items():
+			self.client.insert_rows(self.table_names.get(table, table), rows, on_conflict=TABLE_KEYS[table], resolution="ignore-duplicates")
+
+
+class ParquetSink:
+	"""Writes journal rows as partitioned Parquet; duplicates are dropped by compaction."""
+
+	name = "parquet"
+
+	def __init__(self, base_dir: str, partition: str = "day"):
+		self.base_dir = base_dir
+		self.partition = partition
+
+	def write(self, tables: Tables) -> None:
+		from .parquet_storage import write_partitioned
+
+		for table, rows in tables.items():
+			times = _datetime_fields(table)
+			columns = {name: [_key_value(r[name]) if name in times else r[name] for r in rows] for name in rows[0]}
+			write_partitioned(self.base_dir, table, columns, self.partition)
+
+
+def _datetime_fields(table: str) -> List[str]:
+	from .models import TABLE_MODELS
+
+	return [name for name, hint in get_type_hints(TABLE_MODELS[table]).items() if hint is datetime]
+
+
+def _key_value(value: Any) -> Any:
+	if isinstance(value, str):
+		return datetime.fromisoformat(value)
+	return value
+
+
+def deliver(journal: Journal, sink, batch_records: int = 5000) -> int:
+	"""Feed `sink` everything past its committed offset, in bulk. Returns records delivered.
+
+	Rows of up to `batch_records` journal records are coalesced per table into one
+	sink write, and the offset is committed only after that write succeeds.
+	"""
+	delivered = 0
+	if hasattr(sink, "recover"):
+		state = journal.sink_state(sink.name)
+		if state is None:
+			# First delivery: record the baseline before anything is written
+			journal.commit(sink.name, journal.committed(sink.name), state=sink.state())
+		else:
+			sink.recover(state)
+	while True:
+		offset = journal.committed(sink.name)
+		tables: Tables = {}
+		end = offset
+		count = 0
+		for end, record in journal.read(offset, max_records=batch_records):
+			count += 1
+			for table, rows in record["tables"].items():
+				tables.setdefault(table, []).extend(rows)
+		if count == 0:
+			return delivered
+		sink.write(tables)
+		journal.commit(sink.name, end, state=sink.state() if hasattr(sink, "state") else None)
+		delivered += count
+
+
+class JournaledOutputs:
+	"""Journal-first replacement for `write_outputs`.
+
+	`write()` appends the step to the journal, then lets each sink catch up. A sink
+	that fails (e.g. Supabase unreachable) simply stays behind; it is retried, with
+	all of its backlog in one bulk write, on the next step or on restart. Its
+	first error, and each different one after it, is logged; `errors` holds the
+	current error per sink. The journal is truncated once it exceeds `max_bytes`
+	and every sink has caught up.
+	"""
+
+	def __init__(self, journal: Journal, sinks: List[Any], max_bytes: int = 64 << 20):
+		self.journal = journal
+		self.sinks = sinks
+		self.max_bytes = max_bytes
+		self.errors: Dict[str, str] = {}
+
+	def catch_up(self) -> None:
+		for sink in self.sinks:
+			try:
+				deliver(self.journal, sink)
+			except Exception as e:  # noqa: BLE001 - one sink must not block the others
+				message = str(e)
+				if self.errors.get(sink.name) != message:
+					log.error("Sink %s failed; its rows stay in the journal and are retried: %s", sink.name, message)
+				self.errors[sink.name] = message
+			else:
+				if self.errors.pop(sink.name, None) is not None:
+					log.warning("Sink %s caught up with the journal", sink.name)
+		if self.journal.end_offset >= self.max_bytes and self.journal.caught_up([sink.name for sink in self.sinks]):
+			self.journal.truncate()
+
+	def lag(self, sink_name: str) -> int:
+		"""Journal bytes not yet delivered to `sink_name`."""
+		return self.journal.end_offset - self.journal.committed(sink_name)
+
+	def raise_for_errors(self) -> None:
+		"""Raise if any sink is still failing (for runs that should exit non-zero)."""
+		if self.errors:
+			failed = ", ".join(f"{name} ({message})" for name, message in self.errors.items())
+			raise RuntimeError(f"Journaled rows not delivered to: {failed}; replay with `python -m simulator.journal replay`")
+
+	def write(self, key: Any, tables: Tables) -> None:
+		self.journal.append(key, tables)
+		self.catch_up()
+
+	def close(self) -> None:
+		for name, message in self.errors.items():
+			log.error("Sink %s is %d bytes behind the journal at exit (last error: %s)", name, self.lag(name), message)
+		self.journal.close()
+
+
+def sinks_for(cfg: SimulatorConfig, client: Optional[SupabaseClient] = None) -> List[Any]:
+	sinks: List[Any] = []
+	if cfg.output_mode in ("csv", "both"):
+		sinks.append(CsvSink(cfg.csv_output_dir))
+	if cfg.output_mode == "parquet":
+		sinks.append(ParquetSink(cfg.parquet_output_dir, cfg.parquet_partition))
+	if cfg.output_mode in ("supabase", "both"):
+		client = client or SupabaseClient(cfg.supabase_url, cfg.supabase_key, chunk_size=cfg.supabase_chunk_size, gzip=cfg.supabase_gzip)
+		if client.enabled():
+			sinks.append(SupabaseSink(client, {
+				"co2_intensity": cfg.table_co2_intensity,
+				"generation_mix": cfg.table_generation_mix,
+				"netzero_alignment": cfg.table_netzero_alignment,
+				"energy_rollup_hourly": cfg.table_rollup_hourly,
+				"energy_rollup_daily": cfg.table_rollup_daily,
+			}))
+	return sinks
+
+
+def main() -> None:
+	cfg = load_config_from_env()
+	parser = argparse.ArgumentParser(description="Inspect or replay the simulator output journal")
+	parser.add_argument("command", choices=["status", "replay"])
+	parser.add_argument("--journal", type=str, default=cfg.journal_path, help="Journal path (default: SIM_JOURNAL_PATH)")
+	parser.add_argument("--sink", choices=["csv", "supabase", "parquet", "all"], default="all")
+	args = parser.parse_args()
+	if not args.journal:
+		parser.error("no journal configured (set SIM_JOURNAL_PATH or pass --journal)")
+
+	with Journal(args.journal) as journal:
+		sinks = [s for s in sinks_for(cfg) if args.sink in ("all", s.name)]
+		if args.command == "status":
+			print(f"journal end offset: {journal.end_offset}")
+			for sink in sinks:
+				print(f"{sink.name}: committed {journal.committed(sink.name)} ({journal.end_offset - journal.committed(sink.name)} bytes behind)")
+			return
+		for sink in sinks:
+			print(f"{sink.name}: replayed {deliver(journal, sink)} records")
+
+
+if __name__ == "__main__":
+	main()
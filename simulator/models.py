@@ -31,4 +31,63 @@ class NetZeroAlignmentRecord:
 	alignment_pct: float
 
 
+@dataclass
+class EnergyRollupRecord:
+	"""Partial aggregate of one hourly/daily UTC bucket (see simulator.rollups)."""
+	id: Optional[int]
+	timestamp: datetime  # bucket start
+	first_sample: datetime
+	last_sample: datetime
+	samples: int
+	co2_sum_g_per_kwh: float
+	co2_min_g_per_kwh: float
+	co2_max_g_per_kwh: float
+	co2_weighted_g_per_kwh: float
+	emissions_t: float
+	hydro_mwh: float
+	wind_mwh: float
+	solar_mwh: float
+	nuclear_mwh: float
+	fossil_mwh: float
+	total_mwh: float
+	total_mw_min: float
+	total_mw_max: float
+
+
+@dataclass
+class PlantOutputRecord:
+	"""Output of one fleet plant at one step (see simulator.fleet)."""
+	id: Optional[int]
+	timestamp: datetime
+	plant_id: int
+	region: str
+	technology: str
+	output_mw: float
+
+
+@dataclass
+class RegionGenerationMixRecord(GenerationMixRecord):
+	"""`GenerationMixRecord` summed over the fleet plants of one region."""
+	region: str
+
+
+@dataclass
+class RegionCo2IntensityRecord(Co2IntensityRecord):
+	"""Generation-weighted intensity of one region's fleet plants."""
+	region: str
+
+
+# Canonical table name -> record type; used for typed columnar outputs
+TABLE_MODELS = {
+	"co2_intensity": Co2IntensityRecord,
+	"generation_mix": GenerationMixRecord,
+	"netzero_alignment": NetZeroAlignmentRecord,
+	"energy_rollup_hourly": EnergyRollupRecord,
+	"energy_rollup_daily": EnergyRollupRecord,
+	"fleet_plant_output": PlantOutputRecord,
+	"fleet_generation_mix": RegionGenerationMixRecord,
+	"fleet_co2_intensity": RegionCo2IntensityRecord,
+}
 
+# Rows per timestamp are told apart by this column in the fleet tables
+ENTITY_COLUMNS = {"fleet_plant_output": "plant_id", "fleet_generation_mix": "region", "fleet_co2_intensity": "region"}
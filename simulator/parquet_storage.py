@@ -0,0 +1,186 @@
+"""Time-partitioned Parquet output for the simulator.
+
+Layout (Hive-style, one directory per partition):
+
+	<base_dir>/<table>/day=2025-09-27/part-20250927T000000-1a2b3c4d.parquet
+	<base_dir>/<table>/month=2025-09/part-...parquet     (partition="month")
+	<base_dir>/netzero_alignment/year=2025/part-...parquet
+
+Time-series tables are partitioned by UTC day or month of `timestamp`; yearly
+tables by `year`. Column types come from the record dataclasses in
+`simulator.models`. pyarrow is an optional dependency, imported on first use.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, get_type_hints
+
+from .models import TABLE_MODELS
+from .storage import ensure_dir
+
+PARTITION_GRAINS = ("day", "month")
+_KEY_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+
+
+def require_pyarrow():
+	try:
+		import pyarrow as pa  # noqa: F401
+		import pyarrow.parquet  # noqa: F401
+	except ImportError as e:
+		raise RuntimeError("Parquet support requires pyarrow (pip install pyarrow)") from e
+	return pa
+
+
+def arrow_schema(table: str):
+	"""Arrow schema for a canonical table, derived from its record dataclass."""
+	pa = require_pyarrow()
+	types = {int: pa.int64(), float: pa.float64(), str: pa.string(), datetime: pa.timestamp("us", tz="UTC")}
+	fields = []
+	for name, hint in get_type_hints(TABLE_MODELS[table]).items():
+		# Optional[int] -> int
+		base = next((t for t in getattr(hint, "__args__", (hint,)) if t is not type(None)), hint)
+		fields.append(pa.field(name, types[base]))
+	return pa.schema(fields)
+
+
+def partition_column(table: str) -> str:
+	return "timestamp" if "timestamp" in get_type_hints(TABLE_MODELS[table]) else "year"
+
+
+def partition_bounds(name: str) -> Optional[Tuple[datetime, datetime]]:
+	"""UTC [start, end) covered by a partition directory name such as `day=2025-09-27`."""
+	key, _, value = name.partition("=")
+	try:
+		if key == "day":
+			start = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+			return start, start + timedelta(days=1)
+		if key == "month":
+			start = datetime.strptime(value, "%Y-%m").replace(tzinfo=timezone.utc)
+			return start, (start + timedelta(days=32)).replace(day=1)
+		if key == "year":
+			return datetime(int(value), 1, 1, tzinfo=timezone.utc), datetime(int(value) + 1, 1, 1, tzinfo=timezone.utc)
+	except ValueError:
+		return None
+	return None
+
+
+def write_partitioned(base_dir: str, table: str, columns: Dict[str, Sequence[Any]], partition: str = "day") -> List[str]:
+	"""Write columnar data as one new file per touched partition. Returns the paths written."""
+	pa = require_pyarrow()
+	schema = arrow_schema(table)
+	arrays = []
+	for field in schema:
+		values = columns.get(field.name)
+		if values is None:
+			values = [None] * len(next(iter(columns.values())))
+		elif hasattr(values, "tolist"):
+			values = values.tolist()
+		arrays.append(pa.array(values, type=field.type))
+	return write_partitioned_table(base_dir, table, pa.Table.from_arrays(arrays, schema=schema), partition)
+
+
+def write_partitioned_table(base_dir: str, table: str, data, partition: str = "day") -> List[str]:
+	"""Like `write_partitioned`, for an Arrow table already in `arrow_schema(table)`."""
+	pa = require_pyarrow()
+	import numpy as np
+	import pyarrow.compute as pc
+	import pyarrow.parquet as pq
+
+	if partition not in PARTITION_GRAINS:
+		raise ValueError(f"Unknown parquet partition: {partition!r} (expected one of {PARTITION_GRAINS})")
+	if data.num_rows == 0:
+		return []
+
+	column = partition_column(table)
+	if column == "timestamp":
+		keys = pc.strftime(data["timestamp"], format=_KEY_FORMATS[partition]).to_numpy(zero_copy_only=False)
+		key_name = partition
+	else:
+		keys = data["year"].to_numpy().astype(str)
+		key_name = "year"
+
+	paths = []
+	uniques, inverse = np.unique(keys, return_inverse=True)
+	for i, value in enumerate(uniques):
+		part = data.filter(pa.array(inverse == i))
+		part_dir = os.path.join(base_dir, table, f"{key_name}={value}")
+		ensure_dir(part_dir)
+		first = part[column][0].as_py()
+		stamp = first.strftime("%Y%m%dT%H%M%S") if isinstance(first, datetime) else str(first)
+		path = os.path.join(part_dir, f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet")
+		pq.write_table(part, path)
+		paths.append(path)
+	return paths
+
+
+class BufferedParquetWriter:
+	"""Accumulates rows per table and writes partitioned Parquet files in bulk.
+
+	Mirrors `BufferedCsvWriter`: a flush happens once `max_rows` rows are buffered
+	or `max_seconds` have passed since the last flush, and on `close()`.
+	"""
+
+	def __init__(self, base_dir: str, partition: str = "day", max_rows: int = 500, max_seconds: float = 10.0):
+		require_pyarrow()
+		self.base_dir = base_dir
+		self.partition = partition
+		self.max_rows = max_rows
+		self.max_seconds = max_seconds
+		self._buffers: Dict[str, Dict[str, List[Any]]] = {}
+		self._buffered_rows = 0
+		self._last_flush = time.monotonic()
+
+	def __enter__(self) -> "BufferedParquetWriter":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def _buffer(self, table: str) -> Dict[str, List[Any]]:
+		"""Column buffers for `table`, one per `arrow_schema(table)` field, so rows and columns can mix."""
+		buf = self._buffers.get(table)
+		if buf is None:
+			buf = self._buffers[table] = {field.name: [] for field in arrow_schema(table)}
+		return buf
+
+	def append(self, table: str, rows: Iterable[Dict[str, Any]]) -> None:
+		rows = list(rows)
+		if not rows:
+			return
+		for name, values in self._buffer(table).items():
+			values.extend(r.get(name) for r in rows)
+		self._buffered(len(rows))
+
+	def append_columns(self, table: str, columns: Dict[str, Sequence[Any]]) -> None:
+		if not columns:
+			return
+		n = len(next(iter(columns.values())))
+		if n == 0:
+			return
+		for name, buf in self._buffer(table).items():
+			values = columns.get(name)
+			if values is None:
+				buf.extend([None] * n)
+			else:
+				buf.extend(values.tolist() if hasattr(values, "tolist") else values)
+		self._buffered(n)
+
+	def _buffered(self, rows: int) -> None:
+		self._buffered_rows += rows
+		if self._buffered_rows >= self.max_rows or time.monotonic() - self._last_flush >= self.max_seconds:
+			self.flush()
+
+	def flush(self) -> None:
+		for table, columns in self._buffers.items():
+			if columns:
+				write_partitioned(self.base_dir, table, columns, self.partition)
+		self._buffers.clear()
+		self._buffered_rows = 0
+		self._last_flush = time.monotonic()
+
+	def close(self) -> None:
+		self.flush()
@@ -2,46 +2,67 @@ from __future__ import annotations
 
 import argparse
 import math
-import random
-from dataclasses import asdict
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields, replace
 from datetime import datetime, timedelta, timezone
-from typing import List, Tuple
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from .bias import diurnal_profile, weather_variation, planned_outage_factor, fossil_price_shock_factor, compute_co2_intensity, bounded_normal
+import numpy as np
+
+from .async_writer import BackgroundSupabaseWriter
+from .batch import Co2IntensityBatch, GenerationMixBatch, simulate_co2_intensity_batch, simulate_generation_mix_batch, step_timestamps
+from .bias import diurnal_profile, weather_variation, planned_outage_factor, fossil_price_shock_factor, compute_co2_intensity, bounded_normal, set_bounded_method
 from .config import SimulatorConfig, load_config_from_env
-from .models import Co2IntensityRecord, GenerationMixRecord, NetZeroAlignmentRecord
-from .storage import append_csv
+from .rng import chunk_rng, get_rng, new_entropy, seed_default_rng
+from .models import Co2IntensityRecord, EnergyRollupRecord, GenerationMixRecord, NetZeroAlignmentRecord
+from .journal import TABLE_KEYS, Journal, JournaledOutputs, sinks_for
+from .parquet_storage import BufferedParquetWriter
+from .rollups import ROLLUP_TABLES, RollupAccumulator, columns_to_rows, rollup_columns, rollup_rows
+from .storage import BufferedCsvWriter, append_csv, install_signal_handlers
 from .supabase_client import SupabaseClient
+from . import telemetry
 
 
-def _now_tz(tz_name: str) -> datetime:
+def _tz(tz_name: str):
 	try:
 		import zoneinfo  # Python 3.9+
-		tz = zoneinfo.ZoneInfo(key=tz_name)
+		return zoneinfo.ZoneInfo(key=tz_name)
 	except Exception:
-		tz = timezone.utc
-	return datetime.now(tz)
+		return timezone.utc
+
+
+_CO2_FIELDS = [f.name for f in fields(Co2IntensityRecord)]
+_GEN_FIELDS = [f.name for f in fields(GenerationMixRecord)]
+_ROLLUP_FIELDS = [f.name for f in fields(EnergyRollupRecord)]
+
+
+def _now_tz(tz_name: str) -> datetime:
+	return datetime.now(_tz(tz_name))
 
 
 def _seed_random(seed: int | None) -> None:
-	if seed is not None:
-		random.seed(seed)
+	seed_default_rng(seed)
 
 
-def simulate_generation_mix(ts: datetime, base_total_mw: float = 7000.0) -> GenerationMixRecord:
+def simulate_generation_mix(ts: datetime, base_total_mw: float = 7000.0, rng: np.random.Generator | None = None) -> GenerationMixRecord:
+	if rng is None:
+		rng = get_rng()
 	# Demand diurnal shape
 	load_factor = diurnal_profile(ts.hour, 0.85, 1.15)
-	wind_f, solar_f, hydro_f = weather_variation()
-	planned_factor = planned_outage_factor()
-	price_shock = fossil_price_shock_factor()
+	wind_f, solar_f, hydro_f = weather_variation(rng)
+	planned_factor = planned_outage_factor(rng)
+	price_shock = fossil_price_shock_factor(rng)
 
 	# Baseline capacities (MW) roughly aligned to doc table totals
 	# EXTREME variation for testing - much more dramatic changes for real-time demo
-	base_hydro = 950.0 * bounded_normal(1.0, 0.8, 0.1, 4.0)  # More extreme variation
-	base_wind = 1800.0 * bounded_normal(1.0, 1.2, 0.05, 5.0)  # Much more dramatic wind changes
-	base_solar = (150.0 if 8 <= ts.hour <= 18 else 10.0) * bounded_normal(1.0, 1.5, 0.02, 6.0)  # Extreme solar variation
-	base_nuclear = 2700.0 * bounded_normal(1.0, 0.5, 0.3, 3.0)  # More nuclear variation
-	base_fossil = max(1200.0, 1600.0 * load_factor) * bounded_normal(1.0, 0.8, 0.2, 4.0)  # More fossil variation
+	base_hydro = 950.0 * bounded_normal(1.0, 0.8, 0.1, 4.0, rng=rng)  # More extreme variation
+	base_wind = 1800.0 * bounded_normal(1.0, 1.2, 0.05, 5.0, rng=rng)  # Much more dramatic wind changes
+	base_solar = (150.0 if 8 <= ts.hour <= 18 else 10.0) * bounded_normal(1.0, 1.5, 0.02, 6.0, rng=rng)  # Extreme solar variation
+	base_nuclear = 2700.0 * bounded_normal(1.0, 0.5, 0.3, 3.0, rng=rng)  # More nuclear variation
+	base_fossil = max(1200.0, 1600.0 * load_factor) * bounded_normal(1.0, 0.8, 0.2, 4.0, rng=rng)  # More fossil variation
 
 	# Apply multiplicative factors and ensure non-negative
 	hydro = max(0.0, base_hydro * hydro_f)
@@ -75,23 +96,23 @@ def simulate_generation_mix(ts: datetime, base_total_mw: float = 7000.0) -> Gene
 	)
 
 
-def simulate_co2_intensity(ts: datetime, generation: GenerationMixRecord) -> Co2IntensityRecord:
+def simulate_co2_intensity(ts: datetime, generation: GenerationMixRecord, rng: np.random.Generator | None = None) -> Co2IntensityRecord:
 	# More dramatic CO2 intensity changes for real-time demo
-	base_intensity = compute_co2_intensity(generation.renewable_share_pct, base_range=(100, 300))
+	base_intensity = compute_co2_intensity(generation.renewable_share_pct, base_range=(100, 300), rng=rng)
 	# Add extra variation for more dramatic changes
-	variation = bounded_normal(1.0, 0.3, 0.5, 2.0)  # 50% to 200% variation
+	variation = bounded_normal(1.0, 0.3, 0.5, 2.0, rng=rng)  # 50% to 200% variation
 	intensity = base_intensity * variation
 	# Ensure it stays within reasonable bounds
 	intensity = max(50, min(400, intensity))
 	return Co2IntensityRecord(id=None, timestamp=ts, co2_intensity_g_per_kwh=round(intensity, 1))
 
 
-def simulate_netzero_alignment(year: int) -> NetZeroAlignmentRecord:
+def simulate_netzero_alignment(year: int, rng: np.random.Generator | None = None) -> NetZeroAlignmentRecord:
 	# Targets per doc example: 2020=30, 2021=29, ..., 2025=25
 	base_targets = {2020: 30, 2021: 29, 2022: 28, 2023: 27, 2024: 26, 2025: 25}
 	target = base_targets.get(year, max(10, 30 - (year - 2020)))
 	# Actual with noise and potential setbacks
-	actual = bounded_normal(base=float(target) * 1.02, std_dev=1.0, lower=target * 0.8, upper=target * 1.2)
+	actual = bounded_normal(base=float(target) * 1.02, std_dev=1.0, lower=target * 0.8, upper=target * 1.2, rng=rng)
 	alignment = 100.0 * target / actual if actual > 0 else 0.0
 	return NetZeroAlignmentRecord(year=year, actual_emissions_mt=round(actual, 1), target_emissions_mt=float(target), alignment_pct=round(alignment, 0))
 
@@ -100,117 +121,429 @@ def to_row_dicts(records) -> List[dict]:
 	return [asdict(r) for r in records]
 
 
-def write_outputs(cfg: SimulatorConfig, sb: SupabaseClient, co2_rows, gen_rows, nz_rows) -> None:
-	if cfg.output_mode in ("csv", "both"):
-		append_csv(f"{cfg.csv_output_dir}/co2_intensity.csv", co2_rows)
-		append_csv(f"{cfg.csv_output_dir}/generation_mix.csv", gen_rows)
-		append_csv(f"{cfg.csv_output_dir}/netzero_alignment.csv", nz_rows)
-	if cfg.output_mode in ("supabase", "both") and sb.enabled():
-		sb.insert_rows(cfg.table_co2_intensity, co2_rows)
-		sb.insert_rows(cfg.table_generation_mix, gen_rows)
-		# Upsert yearly alignment to avoid duplicate key conflicts
-		sb.insert_rows(cfg.table_netzero_alignment, nz_rows, on_conflict="year", resolution="ignore-duplicates")
+def supabase_client(cfg: SimulatorConfig) -> SupabaseClient:
+	return SupabaseClient(cfg.supabase_url, cfg.supabase_key, chunk_size=cfg.supabase_chunk_size, gzip=cfg.supabase_gzip)
+
 
+def _csv_writer(cfg: SimulatorConfig) -> BufferedCsvWriter:
+	return BufferedCsvWriter(max_rows=cfg.csv_buffer_rows, max_bytes=cfg.csv_buffer_bytes, max_seconds=cfg.csv_flush_seconds)
 
-def run_once(cfg: SimulatorConfig, anchor: datetime | None = None) -> datetime:
+
+def _parquet_writer(cfg: SimulatorConfig, max_rows: Optional[int] = None, max_seconds: Optional[float] = None) -> BufferedParquetWriter:
+	return BufferedParquetWriter(
+		cfg.parquet_output_dir,
+		partition=cfg.parquet_partition,
+		max_rows=cfg.csv_buffer_rows if max_rows is None else max_rows,
+		max_seconds=cfg.csv_flush_seconds if max_seconds is None else max_seconds,
+	)
+
+
+def write_outputs(
+	cfg: SimulatorConfig,
+	sb: SupabaseClient,
+	co2_rows,
+	gen_rows,
+	nz_rows,
+	csv_writer: Optional[BufferedCsvWriter] = None,
+	parquet_writer: Optional[BufferedParquetWriter] = None,
+	rollups: Optional[Dict[str, List[dict]]] = None,
+) -> None:
+	"""Write one step's rows; `rollups` maps rollup table names to rows."""
+	rollups = rollups or {}
+	with telemetry.span("write_outputs", mode=cfg.output_mode):
+		if cfg.output_mode in ("csv", "both"):
+			with telemetry.span("write_outputs.csv"):
+				append = csv_writer.append if csv_writer is not None else append_csv
+				append(f"{cfg.csv_output_dir}/co2_intensity.csv", co2_rows)
+				append(f"{cfg.csv_output_dir}/generation_mix.csv", gen_rows)
+				append(f"{cfg.csv_output_dir}/netzero_alignment.csv", nz_rows)
+				for table, rows in rollups.items():
+					append(f"{cfg.csv_output_dir}/{table}.csv", rows)
+		if cfg.output_mode == "parquet":
+			with telemetry.span("write_outputs.parquet"):
+				writer = parquet_writer if parquet_writer is not None else _parquet_writer(cfg)
+				writer.append("co2_intensity", co2_rows)
+				writer.append("generation_mix", gen_rows)
+				writer.append("netzero_alignment", nz_rows)
+				for table, rows in rollups.items():
+					writer.append(table, rows)
+				if parquet_writer is None:
+					writer.close()
+		if cfg.output_mode in ("supabase", "both") and sb.enabled():
+			with telemetry.span("write_outputs.supabase"):
+				# Steps written twice (re-runs, restarts) are skipped on the unique keys
+				_upsert(sb, cfg.table_co2_intensity, "co2_intensity", co2_rows)
+				_upsert(sb, cfg.table_generation_mix, "generation_mix", gen_rows)
+				_upsert(sb, cfg.table_netzero_alignment, "netzero_alignment", nz_rows)
+				names = rollup_table_names(cfg)
+				for table, rows in rollups.items():
+					_upsert(sb, names[table], table, rows)
+
+
+def _upsert(sb, name: str, table: str, rows) -> None:
+	"""Insert into `name`, ignoring rows whose idempotency key (`TABLE_KEYS[table]`) exists."""
+	sb.insert_rows(name, rows, on_conflict=TABLE_KEYS[table], resolution="ignore-duplicates")
+
+
+def rollup_table_names(cfg: SimulatorConfig) -> Dict[str, str]:
+	"""Canonical rollup table -> configured Supabase table name."""
+	return {ROLLUP_TABLES["hourly"]: cfg.table_rollup_hourly, ROLLUP_TABLES["daily"]: cfg.table_rollup_daily}
+
+
+def run_once(
+	cfg: SimulatorConfig,
+	anchor: datetime | None = None,
+	csv_writer: Optional[BufferedCsvWriter] = None,
+	parquet_writer: Optional[BufferedParquetWriter] = None,
+	sb: Optional[SupabaseClient] = None,
+	journal: Optional[JournaledOutputs] = None,
+	rollups: Optional[RollupAccumulator] = None,
+) -> datetime:
 	"""Generate one step. If anchor not provided, compute from current time.
 
+	With `rollups`, closed hourly/daily buckets are written as they complete;
+	without it the single step is written as its own partial rollup row.
 	Returns the timestamp used so caller can advance consistently.
 	"""
-	if anchor is None:
-		_now = _now_tz(cfg.timezone)
-		# Compute a default anchor rounded to step_minutes
-		step_seconds = int(cfg.step_minutes * 60)
-		anchor = _now - timedelta(seconds=int(_now.timestamp()) % step_seconds)
-
-	gen = simulate_generation_mix(anchor)
-	co2 = simulate_co2_intensity(anchor, gen)
-	# Yearly record updated once per run for simplicity
-	nz = simulate_netzero_alignment(anchor.year)
-	co2_rows = to_row_dicts([co2])
-	gen_rows = to_row_dicts([gen])
-	nz_rows = to_row_dicts([nz])
-	sb = SupabaseClient(cfg.supabase_url, cfg.supabase_key)
-	write_outputs(cfg, sb, co2_rows, gen_rows, nz_rows)
-	return anchor
+	with telemetry.span("run_once"):
+		if anchor is None:
+			_now = _now_tz(cfg.timezone)
+			# Compute a default anchor rounded to step_minutes
+			step_seconds = int(cfg.step_minutes * 60)
+			anchor = _now - timedelta(seconds=int(_now.timestamp()) % step_seconds)
+
+		# RNG draws and record construction
+		with telemetry.span("run_once.simulate"):
+			gen = simulate_generation_mix(anchor)
+			co2 = simulate_co2_intensity(anchor, gen)
+			# Yearly record updated once per run for simplicity
+			nz = simulate_netzero_alignment(anchor.year)
+			co2_rows = to_row_dicts([co2])
+			gen_rows = to_row_dicts([gen])
+			nz_rows = to_row_dicts([nz])
+		with telemetry.span("run_once.rollups"):
+			if rollups is not None:
+				rollup = rollups.add(co2_rows, gen_rows)
+			else:
+				rollup = {ROLLUP_TABLES[g]: rollup_rows(co2_rows, gen_rows, cfg.step_minutes, g) for g in cfg.rollup_grains}
+		if journal is not None:
+			with telemetry.span("run_once.journal"):
+				journal.write(anchor, {"co2_intensity": co2_rows, "generation_mix": gen_rows, "netzero_alignment": nz_rows, **rollup})
+			return anchor
+		if sb is None:
+			sb = supabase_client(cfg)
+		write_outputs(cfg, sb, co2_rows, gen_rows, nz_rows, csv_writer=csv_writer, parquet_writer=parquet_writer, rollups=rollup)
+		return anchor
+
+
+def _rollup_accumulator(cfg: SimulatorConfig) -> Optional[RollupAccumulator]:
+	return RollupAccumulator(cfg.step_minutes, cfg.rollup_grains) if cfg.rollup_grains else None
+
+
+def _flush_rollups(
+	cfg: SimulatorConfig,
+	rollups: Optional[RollupAccumulator],
+	sb=None,
+	csv_writer: Optional[BufferedCsvWriter] = None,
+	parquet_writer: Optional[BufferedParquetWriter] = None,
+	journal: Optional[JournaledOutputs] = None,
+) -> None:
+	"""Write the still-open buckets as partial rows (on shutdown)."""
+	rows = rollups.flush() if rollups is not None else {}
+	if not rows:
+		return
+	if journal is not None:
+		journal.write(max(r["last_sample"] for table_rows in rows.values() for r in table_rows), rows)
+	else:
+		write_outputs(cfg, sb, [], [], [], csv_writer=csv_writer, parquet_writer=parquet_writer, rollups=rows)
+
+
+def _open_journal(cfg: SimulatorConfig, sb: Optional[SupabaseClient] = None) -> JournaledOutputs:
+	outputs = JournaledOutputs(Journal(cfg.journal_path), sinks_for(cfg, sb), max_bytes=cfg.journal_max_bytes)
+	# Replay whatever a previous run journaled but did not deliver
+	outputs.catch_up()
+	return outputs
 
 
 def run_continuous(cfg: SimulatorConfig) -> None:
-	import time
-	# Initialize anchor at the rounded current step
+	if cfg.journal_path:
+		_run_continuous_journaled(cfg)
+		return
+	# Keep CSV files open and flush in bulk instead of reopening them every step
+	writer = _csv_writer(cfg)
+	# Buffer Parquet rows too, so each flush writes one file per partition
+	parquet_writer = _parquet_writer(cfg) if cfg.output_mode == "parquet" else None
+	# One client (and keep-alive connection pool) for the whole run
+	sb = supabase_client(cfg)
+	if cfg.supabase_async and cfg.output_mode in ("supabase", "both") and sb.enabled():
+		# Deliver from a background thread so a slow endpoint cannot stall the cadence
+		sb = BackgroundSupabaseWriter(sb, spool_path=cfg.supabase_spool_path, max_queue=cfg.supabase_queue_size).start()
+	rollups = _rollup_accumulator(cfg)
+	flush_rollups = partial(_flush_rollups, cfg, rollups, sb, writer, parquet_writer)
+	# SIGTERM/SIGINT end the loop after the current step; the writers are closed below, never mid-append
+	shutdown = install_signal_handlers()
+	try:
+		# Initialize anchor at the rounded current step
+		step = timedelta(minutes=cfg.step_minutes)
+		anchor = run_once(cfg, csv_writer=writer, parquet_writer=parquet_writer, sb=sb, rollups=rollups)
+		while not shutdown.is_set():
+			# Advance simulated time by step for each wall-clock tick
+			anchor = anchor + step
+			run_once(cfg, anchor=anchor, csv_writer=writer, parquet_writer=parquet_writer, sb=sb, rollups=rollups)
+			shutdown.wait(cfg.wall_interval_seconds)
+	finally:
+		# Open buckets are handed over before the writers close
+		flush_rollups()
+		sb.close()
+		writer.close()
+		if parquet_writer is not None:
+			parquet_writer.close()
+	shutdown.exit()
+
+
+def _run_continuous_journaled(cfg: SimulatorConfig) -> None:
+	"""Continuous mode with every step journaled before sinks consume it.
+
+	The journal takes the place of the CSV buffer and the Supabase spool: sinks are
+	written synchronously from it, and a lagging sink catches up in bulk.
+	"""
+	sb = supabase_client(cfg)
+	outputs = _open_journal(cfg, sb)
+	rollups = _rollup_accumulator(cfg)
+	flush_rollups = partial(_flush_rollups, cfg, rollups, journal=outputs)
+	shutdown = install_signal_handlers()
+	try:
+		step = timedelta(minutes=cfg.step_minutes)
+		anchor = None
+		last = outputs.journal.last_key
+		if isinstance(last, str):
+			# Resume after the last journaled step so restarts never rewrite earlier timestamps
+			resumed = datetime.fromisoformat(last) + step
+			if resumed > _now_tz(cfg.timezone):
+				anchor = resumed
+		anchor = run_once(cfg, anchor=anchor, journal=outputs, rollups=rollups)
+		while not shutdown.is_set():
+			anchor = anchor + step
+			run_once(cfg, anchor=anchor, journal=outputs, rollups=rollups)
+			shutdown.wait(cfg.wall_interval_seconds)
+	finally:
+		flush_rollups()
+		sb.close()
+		outputs.close()
+	shutdown.exit()
+
+
+@dataclass(frozen=True)
+class BackfillChunk:
+	start: datetime
+	count: int
+	step_minutes: int
+	entropy: int
+	index: int
+	bounded_method: str = "clip"
+
+
+def _backfill_chunk(chunk: BackfillChunk) -> Tuple[GenerationMixBatch, Co2IntensityBatch]:
+	"""Generate one backfill chunk. Runs in a worker process.
+
+	The chunk stream is derived from (entropy, chunk index) only, so output does not
+	depend on the number of workers or the order chunks complete in.
+	"""
+	rng = chunk_rng(chunk.entropy, chunk.index)
+	timestamps = step_timestamps(chunk.start, chunk.count, chunk.step_minutes)
+	gen = simulate_generation_mix_batch(timestamps, rng=rng, method=chunk.bounded_method)
+	co2 = simulate_co2_intensity_batch(gen, rng=rng, method=chunk.bounded_method)
+	return gen, co2
+
+
+def backfill_chunks(cfg: SimulatorConfig, start: datetime, end: datetime, chunk_days: int, entropy: int) -> List[BackfillChunk]:
+	"""Split [start, end) into chunks of whole steps, at most `chunk_days` long."""
+	step = timedelta(minutes=cfg.step_minutes)
+	total_steps = max(0, math.ceil((end - start) / step))
+	steps_per_chunk = max(1, int(timedelta(days=chunk_days) / step))
+	chunks = []
+	for index, offset in enumerate(range(0, total_steps, steps_per_chunk)):
+		count = min(steps_per_chunk, total_steps - offset)
+		chunks.append(BackfillChunk(start + offset * step, count, cfg.step_minutes, entropy, index, cfg.bounded_method))
+	return chunks
+
+
+def backfill_years(cfg: SimulatorConfig, start: datetime, end: datetime) -> range:
+	"""Years holding at least one step of [start, end); `end` itself is excluded."""
 	step = timedelta(minutes=cfg.step_minutes)
-	anchor = run_once(cfg)
-	while True:
-		# Advance simulated time by step for each wall-clock tick
-		anchor = anchor + step
-		run_once(cfg, anchor=anchor)
-		time.sleep(cfg.wall_interval_seconds)
+	total_steps = max(0, math.ceil((end - start) / step))
+	if total_steps == 0:
+		return range(start.year, start.year)
+	return range(start.year, (start + (total_steps - 1) * step).year + 1)
+
+
+def iter_backfill(
+	cfg: SimulatorConfig,
+	start: datetime,
+	end: datetime,
+	chunk_days: int = 30,
+	workers: Optional[int] = None,
+	entropy: Optional[int] = None,
+) -> Iterator[Tuple[GenerationMixBatch, Co2IntensityBatch]]:
+	"""Yield (generation, co2) batches covering [start, end) in chronological order."""
+	if entropy is None:
+		entropy = cfg.random_seed if cfg.random_seed is not None else new_entropy()
+	chunks = backfill_chunks(cfg, start, end, chunk_days, entropy)
+	workers = workers or os.cpu_count() or 1
+	if workers <= 1 or len(chunks) <= 1:
+		for chunk in chunks:
+			yield _backfill_chunk(chunk)
+		return
+	with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+		# map() preserves submission order, so chunks are written chronologically
+		yield from pool.map(_backfill_chunk, chunks)
+
+
+def _batch_rollups(cfg: SimulatorConfig, gen: GenerationMixBatch, co2: Co2IntensityBatch) -> Dict[str, Dict[str, np.ndarray]]:
+	"""Rollup columns per rollup table for one backfill chunk."""
+	return {
+		ROLLUP_TABLES[g]: rollup_columns(gen.timestamp, co2.co2_intensity_g_per_kwh, gen.columns(), cfg.step_minutes, g)
+		for g in cfg.rollup_grains
+	}
+
+
+def run_backfill(cfg: SimulatorConfig, start: datetime, end: datetime, chunk_days: int = 30, workers: Optional[int] = None) -> int:
+	"""Generate and write the full [start, end) range as fast as possible.
+
+	Returns the number of steps written.
+	"""
+	sb = supabase_client(cfg)
+	entropy = cfg.random_seed if cfg.random_seed is not None else new_entropy()
+	written = 0
+	if cfg.journal_path:
+		outputs = _open_journal(cfg, sb)
+		try:
+			for gen, co2 in iter_backfill(cfg, start, end, chunk_days=chunk_days, workers=workers, entropy=entropy):
+				rollup = {t: columns_to_rows(c) for t, c in _batch_rollups(cfg, gen, co2).items()}
+				outputs.write(gen.timestamp[0], {"co2_intensity": co2.to_rows(), "generation_mix": gen.to_rows(), **rollup})
+				written += len(gen)
+			nz_rng = chunk_rng(entropy, 2**32)
+			nz_rows = to_row_dicts([simulate_netzero_alignment(year, rng=nz_rng) for year in backfill_years(cfg, start, end)])
+			outputs.write(end, {"netzero_alignment": nz_rows})
+		finally:
+			sb.close()
+			outputs.close()
+		# Everything is in the journal, but a sink that never caught up must fail the run
+		outputs.raise_for_errors()
+		return written
+	# Whole chunks are buffered, so flush per chunk rather than per row count
+	parquet_writer = _parquet_writer(cfg, max_rows=1, max_seconds=0.0) if cfg.output_mode == "parquet" else None
+	with BufferedCsvWriter(max_rows=1 << 62, max_bytes=cfg.csv_buffer_bytes, max_seconds=float("inf")) as writer:
+		for gen, co2 in iter_backfill(cfg, start, end, chunk_days=chunk_days, workers=workers, entropy=entropy):
+			rollup = _batch_rollups(cfg, gen, co2)
+			if cfg.output_mode in ("csv", "both"):
+				writer.append_columns(f"{cfg.csv_output_dir}/co2_intensity.csv", co2.columns(), _CO2_FIELDS)
+				writer.append_columns(f"{cfg.csv_output_dir}/generation_mix.csv", gen.columns(), _GEN_FIELDS)
+				for table, columns in rollup.items():
+					writer.append_columns(f"{cfg.csv_output_dir}/{table}.csv", columns, _ROLLUP_FIELDS)
+			if parquet_writer is not None:
+				parquet_writer.append_columns("co2_intensity", co2.columns())
+				parquet_writer.append_columns("generation_mix", gen.columns())
+				for table, columns in rollup.items():
+					parquet_writer.append_columns(table, columns)
+			if cfg.output_mode in ("supabase", "both") and sb.enabled():
+				_upsert(sb, cfg.table_co2_intensity, "co2_intensity", co2.to_rows())
+				_upsert(sb, cfg.table_generation_mix, "generation_mix", gen.to_rows())
+				names = rollup_table_names(cfg)
+				for table, columns in rollup.items():
+					_upsert(sb, names[table], table, columns_to_rows(columns))
+			written += len(gen)
+		# Yearly records draw from a stream past the last possible chunk index
+		nz_rng = chunk_rng(entropy, 2**32)
+		nz_rows = to_row_dicts([simulate_netzero_alignment(year, rng=nz_rng) for year in backfill_years(cfg, start, end)])
+		write_outputs(cfg, sb, [], [], nz_rows, csv_writer=writer, parquet_writer=parquet_writer)
+	if sb.stats.requests:
+		print(f"Supabase: {sb.stats.rows} rows in {sb.stats.requests} requests ({sb.stats.rows_per_second:.0f} rows/s)")
+	sb.close()
+	return written
+
+
+@contextmanager
+def start_telemetry(cfg: SimulatorConfig) -> Iterator[None]:
+	"""Enable spans and start the configured exporters for the duration of the block.
+
+	The last JSON snapshot is written on the way out, so even a short `once`
+	run leaves its timings behind.
+	"""
+	if not (cfg.telemetry or cfg.metrics_port is not None or cfg.telemetry_snapshot_path):
+		yield
+		return
+	telemetry.enable()
+	exporters = []
+	try:
+		if cfg.metrics_port is not None:
+			server = telemetry.MetricsServer(cfg.metrics_port).start()
+			exporters.append(server)
+			print(f"[telemetry] metrics on http://{server.host}:{server.port}/metrics")
+		if cfg.telemetry_snapshot_path:
+			exporters.append(telemetry.SnapshotWriter(cfg.telemetry_snapshot_path, cfg.telemetry_snapshot_seconds).start())
+		yield
+	finally:
+		for exporter in reversed(exporters):
+			exporter.close()
+		telemetry.disable()
+
+
+def _parse_datetime(value: str, tz_name: str) -> datetime:
+	dt = datetime.fromisoformat(value)
+	if dt.tzinfo is None:
+		dt = dt.replace(tzinfo=_tz(tz_name))
+	return dt
 
 
 def main() -> None:
 	parser = argparse.ArgumentParser(description="Sustainability Intelligence data simulator")
-	parser.add_argument("mode", choices=["once", "continuous"], nargs="?", default="once")
+	parser.add_argument("mode", choices=["once", "continuous", "backfill"], nargs="?", default="once")
 	parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducibility")
-	parser.add_argument("--output", choices=["csv", "supabase", "both"], default=None, help="Override output mode")
+	parser.add_argument("--output", choices=["csv", "supabase", "both", "parquet"], default=None, help="Override output mode")
 	parser.add_argument("--wall", type=int, default=None, help="Wall-clock interval seconds (e.g., 5)")
 	parser.add_argument("--step", type=int, default=None, help="Simulated step minutes (e.g., 15)")
+	parser.add_argument("--sampling", choices=["clip", "truncate"], default=None, help="Bounded-normal sampling: clip (legacy) or truncate")
+	parser.add_argument("--start", type=str, default=None, help="Backfill start (ISO date/datetime, inclusive)")
+	parser.add_argument("--end", type=str, default=None, help="Backfill end (ISO date/datetime, exclusive)")
+	parser.add_argument("--chunk-days", type=int, default=30, help="Backfill chunk size in simulated days")
+	parser.add_argument("--workers", type=int, default=None, help="Backfill worker processes (default: all cores)")
+	parser.add_argument("--metrics-port", type=int, default=None, help="Serve timing histograms on localhost:PORT/metrics (Prometheus)")
+	parser.add_argument("--profile", choices=list(telemetry.PROFILERS), default=None, help="Profile the run: cprofile or sample (collapsed stacks)")
 	args = parser.parse_args()
+	if args.mode == "backfill" and (not args.start or not args.end):
+		parser.error("backfill requires --start and --end")
 
 	cfg = load_config_from_env()
 	if args.seed is not None:
-		cfg = type(cfg)(
-			timezone=cfg.timezone,
-			interval_seconds=cfg.interval_seconds,
-			wall_interval_seconds=cfg.wall_interval_seconds,
-			step_minutes=cfg.step_minutes,
-			random_seed=args.seed,
-			output_mode=args.output or cfg.output_mode,
-			csv_output_dir=cfg.csv_output_dir,
-			supabase_url=cfg.supabase_url,
-			supabase_key=cfg.supabase_key,
-			table_co2_intensity=cfg.table_co2_intensity,
-			table_generation_mix=cfg.table_generation_mix,
-			table_netzero_alignment=cfg.table_netzero_alignment,
-		)
-	else:
-		if args.output:
-			cfg = type(cfg)(
-				timezone=cfg.timezone,
-				interval_seconds=cfg.interval_seconds,
-				wall_interval_seconds=cfg.wall_interval_seconds,
-				step_minutes=cfg.step_minutes,
-				random_seed=cfg.random_seed,
-				output_mode=args.output,
-				csv_output_dir=cfg.csv_output_dir,
-				supabase_url=cfg.supabase_url,
-				supabase_key=cfg.supabase_key,
-				table_co2_intensity=cfg.table_co2_intensity,
-				table_generation_mix=cfg.table_generation_mix,
-				table_netzero_alignment=cfg.table_netzero_alignment,
-			)
+		cfg = replace(cfg, random_seed=args.seed)
+	if args.output:
+		cfg = replace(cfg, output_mode=args.output)
+	if args.sampling:
+		cfg = replace(cfg, bounded_method=args.sampling)
+	if args.metrics_port is not None:
+		cfg = replace(cfg, metrics_port=args.metrics_port)
+	if args.profile:
+		cfg = replace(cfg, profile=args.profile)
 
 	_seed_random(cfg.random_seed)
+	set_bounded_method(cfg.bounded_method)
 	# Allow overriding cadence from CLI
-	if args.wall is not None or args.step is not None:
-		cfg = type(cfg)(
-			timezone=cfg.timezone,
-			interval_seconds=cfg.interval_seconds,
-			wall_interval_seconds=args.wall if args.wall is not None else cfg.wall_interval_seconds,
-			step_minutes=args.step if args.step is not None else cfg.step_minutes,
-			random_seed=cfg.random_seed,
-			output_mode=cfg.output_mode,
-			csv_output_dir=cfg.csv_output_dir,
-			supabase_url=cfg.supabase_url,
-			supabase_key=cfg.supabase_key,
-			table_co2_intensity=cfg.table_co2_intensity,
-			table_generation_mix=cfg.table_generation_mix,
-			table_netzero_alignment=cfg.table_netzero_alignment,
-		)
-
-	if args.mode == "continuous":
-		run_continuous(cfg)
-	else:
-		run_once(cfg)
+	if args.wall is not None:
+		cfg = replace(cfg, wall_interval_seconds=args.wall)
+	if args.step is not None:
+		cfg = replace(cfg, step_minutes=args.step)
+
+	with start_telemetry(cfg), telemetry.profiled(cfg.profile, f"{cfg.profile_path}-{args.mode}"):
+		if args.mode == "continuous":
+			run_continuous(cfg)
+		elif args.mode == "backfill":
+			start = _parse_datetime(args.start, cfg.timezone)
+			end = _parse_datetime(args.end, cfg.timezone)
+			written = run_backfill(cfg, start, end, chunk_days=args.chunk_days, workers=args.workers)
+			print(f"Backfilled {written} steps from {start.isoformat()} to {end.isoformat()}")
+		else:
+			run_once(cfg)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
 import csv
+import io
 import os
+import signal
+import threading
+import time
 from datetime import datetime
-from typing import Iterable, Dict, Any
+from typing import Iterable, Dict, Any, List, Optional, Sequence
 
 
 def ensure_dir(path: str) -> None:
@@ -33,4 +37,170 @@ def _serialize_row(row: Dict[str, Any]) -> Dict[str, Any]:
 	return out
 
 
+class _OpenCsv:
+	"""Per-file state held by BufferedCsvWriter."""
 
+	def __init__(self, path: str, fieldnames: List[str]):
+		ensure_dir(os.path.dirname(path))
+		needs_header = not os.path.isfile(path) or os.path.getsize(path) == 0
+		if not needs_header:
+			with open(path, "r", newline="", encoding="utf-8") as f:
+				header = next(csv.reader(f), None)
+			if header:
+				fieldnames = header
+		self.fieldnames = fieldnames
+		self.handle = open(path, "a", newline="", encoding="utf-8")
+		self.text = io.StringIO()
+		self.writer = csv.DictWriter(self.text, fieldnames=fieldnames)
+		if needs_header:
+			self.writer.writeheader()
+
+	def take(self) -> str:
+		data = self.text.getvalue()
+		self.text.seek(0)
+		self.text.truncate()
+		return data
+
+
+class BufferedCsvWriter:
+	"""Long-lived CSV appender that keeps files open and writes in bulk.
+
+	Rows are serialized into an in-memory buffer per file and written with a single
+	`write()` once any threshold is crossed: `max_rows` buffered rows, `max_bytes`
+	buffered bytes, or `max_seconds` since the last flush. `close()` flushes and
+	fsyncs every file; use the writer as a context manager, or close it from the
+	main loop once a `ShutdownFlag` is set, so buffered rows survive
+	SIGTERM/SIGINT.
+	"""
+
+	def __init__(self, max_rows: int = 500, max_bytes: int = 1 << 20, max_seconds: float = 10.0):
+		self.max_rows = max_rows
+		self.max_bytes = max_bytes
+		self.max_seconds = max_seconds
+		self._files: Dict[str, _OpenCsv] = {}
+		self._buffered_rows = 0
+		self._buffered_bytes = 0
+		self._last_flush = time.monotonic()
+
+	def __enter__(self) -> "BufferedCsvWriter":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def _file(self, path: str, fieldnames: List[str]) -> _OpenCsv:
+		f = self._files.get(path)
+		if f is None:
+			f = self._files[path] = _OpenCsv(path, fieldnames)
+		return f
+
+	def append(self, path: str, rows: Iterable[Dict[str, Any]]) -> None:
+		"""Buffer row dicts, same input as `append_csv`."""
+		rows = list(rows)
+		if not rows:
+			return
+		f = self._file(path, list(rows[0].keys()))
+		before = f.text.tell()
+		f.writer.writerows(_serialize_row(row) for row in rows)
+		self._buffered(len(rows), f.text.tell() - before)
+
+	def append_columns(self, path: str, columns: Dict[str, Sequence[Any]], fieldnames: Optional[List[str]] = None) -> None:
+		"""Buffer columnar data (e.g. a simulator.batch result) without building row dicts.
+
+		Fields in the file header that are missing from `columns` (such as `id`) are
+		written empty. Values must not need CSV quoting (numbers and timestamps).
+		"""
+		if not columns:
+			return
+		n = len(next(iter(columns.values())))
+		if n == 0:
+			return
+		f = self._file(path, fieldnames or list(columns))
+		empty = [""] * n
+		text_columns = [_format_column(columns[name]) if name in columns else empty for name in f.fieldnames]
+		data = "".join(",".join(row) + "\r\n" for row in zip(*text_columns))
+		f.text.write(data)
+		self._buffered(n, len(data))
+
+	def _buffered(self, rows: int, size: int) -> None:
+		self._buffered_rows += rows
+		self._buffered_bytes += size
+		if (
+			self._buffered_rows >= self.max_rows
+			or self._buffered_bytes >= self.max_bytes
+			or time.monotonic() - self._last_flush >= self.max_seconds
+		):
+			self.flush()
+
+	def flush(self, fsync: bool = False) -> None:
+		for f in self._files.values():
+			data = f.take()
+			if data:
+				f.handle.write(data)
+			f.handle.flush()
+			if fsync:
+				os.fsync(f.handle.fileno())
+		self._buffered_rows = 0
+		self._buffered_bytes = 0
+		self._last_flush = time.monotonic()
+
+	def close(self) -> None:
+		if not self._files:
+			return
+		self.flush(fsync=True)
+		for f in self._files.values():
+			f.handle.close()
+		self._files.clear()
+
+
+def _format_column(values: Sequence[Any]) -> List[str]:
+	if hasattr(values, "tolist"):
+		values = values.tolist()
+	return ["" if v is None else v.isoformat() if isinstance(v, datetime) else str(v) for v in values]
+
+
+class ShutdownFlag:
+	"""Set by SIGTERM/SIGINT so the main loop can stop between steps and close its writers.
+
+	A handler runs between two bytecodes of the main thread, possibly halfway
+	through `BufferedCsvWriter.append` or a flush, so it only records the signal:
+	writers are flushed and closed by the loop's own `finally`. A second signal
+	(e.g. a shutdown stuck on the network) defers to the previous handler.
+	"""
+
+	def __init__(self) -> None:
+		self.signum: Optional[int] = None
+		self._event = threading.Event()
+		self._previous: Dict[int, Any] = {}
+
+	def is_set(self) -> bool:
+		return self._event.is_set()
+
+	def wait(self, seconds: float) -> bool:
+		"""Sleep up to `seconds`, returning early (True) once a signal arrives."""
+		return self._event.wait(seconds)
+
+	def _handler(self, sig, frame) -> None:
+		if not self._event.is_set():
+			self.signum = sig
+			self._event.set()
+			return
+		previous = self._previous.get(sig)
+		if callable(previous):
+			previous(sig, frame)
+		else:
+			raise SystemExit(128 + sig)
+
+	def exit(self) -> None:
+		"""Exit as the signal would have (128 + signum), once the writers are closed."""
+		if self.signum is not None:
+			raise SystemExit(128 + self.signum)
+
+
+def install_signal_handlers(signals: Sequence[int] = (signal.SIGTERM, signal.SIGINT)) -> ShutdownFlag:
+	"""Route `signals` to a new ShutdownFlag. Call from the main thread."""
+	flag = ShutdownFlag()
+	for signum in signals:
+		flag._previous[signum] = signal.getsignal(signum)
+		signal.signal(signum, flag._handler)
+	return flag
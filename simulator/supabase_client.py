@@ -1,12 +1,80 @@
-from typing import Iterable, Dict, Any, Optional
+from dataclasses import dataclass, asdict
+from typing import Iterable, Dict, Any, List, Optional
+import gzip as _gzip
+import json
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 
+from . import telemetry
+
+
+@dataclass
+class InsertStats:
+	"""Cumulative request counters for a SupabaseClient."""
+	requests: int = 0
+	rows: int = 0
+	bytes_sent: int = 0
+	seconds: float = 0.0
+	max_latency_s: float = 0.0
+
+	def record(self, rows: int, nbytes: int, seconds: float) -> None:
+		self.requests += 1
+		self.rows += rows
+		self.bytes_sent += nbytes
+		self.seconds += seconds
+		self.max_latency_s = max(self.max_latency_s, seconds)
+
+	@property
+	def mean_latency_s(self) -> float:
+		return self.seconds / self.requests if self.requests else 0.0
+
+	@property
+	def rows_per_second(self) -> float:
+		return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+	def as_dict(self) -> Dict[str, float]:
+		return {**asdict(self), "mean_latency_s": self.mean_latency_s, "rows_per_second": self.rows_per_second}
+
 
 class SupabaseClient:
-	def __init__(self, url: Optional[str], key: Optional[str]):
+	"""Minimal PostgREST writer.
+
+	Holds one keep-alive `requests.Session` for its lifetime, so create the client
+	once and reuse it across steps. Large inserts are split into POSTs of at most
+	`chunk_size` rows; `gzip=True` compresses request bodies.
+	"""
+
+	def __init__(
+		self,
+		url: Optional[str],
+		key: Optional[str],
+		chunk_size: int = 1000,
+		gzip: bool = False,
+		timeout: float = 30,
+		session: Optional[requests.Session] = None,
+	):
 		self.url = url
 		self.key = key
+		self.chunk_size = max(1, chunk_size)
+		self.gzip = gzip
+		self.timeout = timeout
+		self.stats = InsertStats()
+		self._session = session
+
+	@property
+	def session(self) -> requests.Session:
+		if self._session is None:
+			self._session = requests.Session()
+			self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+			self._session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+		return self._session
+
+	def close(self) -> None:
+		if self._session is not None:
+			self._session.close()
+			self._session = None
 
 	def enabled(self) -> bool:
 		return bool(self.url and self.key)
@@ -39,10 +107,25 @@ class SupabaseClient:
 			"Content-Type": "application/json",
 			"Prefer": f"{'resolution='+resolution+',' if resolution else ''}return=minimal",
 		}
-		resp = requests.post(endpoint, json=payload, headers=headers, timeout=30)
+		if self.gzip:
+			headers["Content-Encoding"] = "gzip"
+		with telemetry.span("supabase.insert_rows", table=table):
+			for start in range(0, len(payload), self.chunk_size):
+				self._post(endpoint, headers, payload[start:start + self.chunk_size])
+
+	def _post(self, endpoint: str, headers: Dict[str, str], chunk: List[Dict[str, Any]]) -> None:
+		body = json.dumps(chunk, separators=(",", ":")).encode("utf-8")
+		if self.gzip:
+			body = _gzip.compress(body, compresslevel=5)
+		t0 = time.perf_counter()
+		resp = self.session.post(endpoint, data=body, headers=headers, timeout=self.timeout)
+		latency = time.perf_counter() - t0
+		self.stats.record(len(chunk), len(body), latency)
+		telemetry.observe("supabase.post", latency)
+		telemetry.incr("supabase.rows_sent", len(chunk))
+		telemetry.incr("supabase.bytes_sent", len(body))
 		try:
 			resp.raise_for_status()
 		except requests.HTTPError as e:
 			# Attach response text for easier debugging
-			raise requests.HTTPError(f"{e} | details: {resp.text}") from e
-
+			raise requests.HTTPError(f"{e} | details: {resp.text}", response=resp) from e
@@ -0,0 +1,402 @@
+"""Lightweight timing spans, histograms and profiling hooks.
+
+Instrumented code wraps its hot sections in `span("name", table=...)` (or
+decorates a function with `@timed("name")`). Telemetry is off by default and a
+disabled span is a shared no-op context manager behind one flag check, so the
+instrumentation can stay in the per-step path. Once `enable()`d, each span
+adds its duration to a histogram keyed by name and labels.
+
+Export:
+
+- `prometheus_text()`: Prometheus exposition format (`span_duration_seconds`
+  histograms, `events_total` counters), served on `/metrics` by `MetricsServer`.
+- `snapshot()`: the same data as JSON, written periodically by `SnapshotWriter`.
+
+`profiled("cprofile" | "sample", path)` profiles one run: cProfile stats
+(open with `python -m pstats` or snakeviz), or a low-overhead sampling
+profiler writing collapsed stacks (`flamegraph.pl`, speedscope).
+"""
+
+from __future__ import annotations
+
+import bisect
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds, from 10 µs (a small span) to 30 s (a stalled POST)
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+	"""Cumulative-bucket duration histogram, as Prometheus expects."""
+
+	def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+		self.buckets = buckets
+		# counts[i]: observations <= buckets[i] and > buckets[i - 1]; the last slot is +Inf
+		self.counts = [0] * (len(buckets) + 1)
+		self.count = 0
+		self.sum = 0.0
+		self.max = 0.0
+
+	def observe(self, seconds: float) -> None:
+		self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+		self.count += 1
+		self.sum += seconds
+		if seconds > self.max:
+			self.max = seconds
+
+	def quantile(self, q: float) -> Optional[float]:
+		"""Estimate by linear interpolation within the bucket holding rank q * count."""
+		if self.count == 0:
+			return None
+		rank = q * self.count
+		seen = 0
+		for i, n in enumerate(self.counts):
+			if n and seen + n >= rank:
+				lower = self.buckets[i - 1] if i > 0 else 0.0
+				upper = self.buckets[i] if i < len(self.buckets) else self.max
+				return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+			seen += n
+		return self.max
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			"count": self.count,
+			"sum_s": self.sum,
+			"mean_s": self.sum / self.count if self.count else None,
+			"max_s": self.max,
+			"p50_s": self.quantile(0.5),
+			"p95_s": self.quantile(0.95),
+			"p99_s": self.quantile(0.99),
+		}
+
+
+class Registry:
+	def __init__(self):
+		self.enabled = False
+		self._lock = threading.Lock()
+		self._histograms: Dict[_Key, Histogram] = {}
+		self._counters: Counter = Counter()
+		self.started = time.time()
+
+	def observe(self, name: str, seconds: float, labels: Dict[str, Any]) -> None:
+		key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+		with self._lock:
+			histogram = self._histograms.get(key)
+			if histogram is None:
+				histogram = self._histograms[key] = Histogram()
+			histogram.observe(seconds)
+
+	def incr(self, name: str, value: float, labels: Dict[str, Any]) -> None:
+		key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+		with self._lock:
+			self._counters[key] += value
+
+	def reset(self) -> None:
+		with self._lock:
+			self._histograms.clear()
+			self._counters.clear()
+			self.started = time.time()
+
+	def items(self) -> Tuple[List[Tuple[_Key, Histogram]], List[Tuple[_Key, float]]]:
+		"""Consistent copies for export."""
+		with self._lock:
+			histograms = [(key, _copy(h)) for key, h in self._histograms.items()]
+			counters = list(self._counters.items())
+		return sorted(histograms), sorted(counters)
+
+
+def _copy(histogram: Histogram) -> Histogram:
+	out = Histogram(histogram.buckets)
+	out.counts, out.count, out.sum, out.max = list(histogram.counts), histogram.count, histogram.sum, histogram.max
+	return out
+
+
+REGISTRY = Registry()
+
+
+def enable() -> None:
+	REGISTRY.enabled = True
+
+
+def disable() -> None:
+	REGISTRY.enabled = False
+
+
+def is_enabled() -> bool:
+	return REGISTRY.enabled
+
+
+class _Span:
+	__slots__ = ("name", "labels", "t0")
+
+	def __init__(self, name: str, labels: Dict[str, Any]):
+		self.name = name
+		self.labels = labels
+
+	def __enter__(self) -> "_Span":
+		self.t0 = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc) -> None:
+		REGISTRY.observe(self.name, time.perf_counter() - self.t0, self.labels)
+
+
+class _NoopSpan:
+	__slots__ = ()
+
+	def __enter__(self) -> "_NoopSpan":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		return None
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **labels: Any):
+	"""Context manager timing its body into the `name` histogram (no-op while disabled)."""
+	if not REGISTRY.enabled:
+		return _NOOP
+	return _Span(name, labels)
+
+
+def timed(name: str) -> Callable:
+	"""Decorator form of `span`."""
+	def decorate(fn: Callable) -> Callable:
+		@wraps(fn)
+		def wrapper(*args, **kwargs):
+			if not REGISTRY.enabled:
+				return fn(*args, **kwargs)
+			with _Span(name, {}):
+				return fn(*args, **kwargs)
+		return wrapper
+	return decorate
+
+
+def observe(name: str, seconds: float, **labels: Any) -> None:
+	"""Record a duration measured by the caller (e.g. a request latency it already times)."""
+	if REGISTRY.enabled:
+		REGISTRY.observe(name, seconds, labels)
+
+
+def incr(name: str, value: float = 1, **labels: Any) -> None:
+	if REGISTRY.enabled:
+		REGISTRY.incr(name, value, labels)
+
+
+def _label_text(pairs: Tuple[Tuple[str, str], ...]) -> str:
+	return ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _key_text(key: _Key) -> str:
+	name, labels = key
+	return f"{name}{{{_label_text(labels)}}}" if labels else name
+
+
+def prometheus_text() -> str:
+	"""All metrics in the Prometheus text exposition format (version 0.0.4)."""
+	histograms, counters = REGISTRY.items()
+	lines = [
+		"# HELP span_duration_seconds Duration of instrumented code sections.",
+		"# TYPE span_duration_seconds histogram",
+	]
+	for (name, labels), h in histograms:
+		base = _label_text((("span", name),) + labels)
+		cumulative = 0
+		for bound, n in zip(h.buckets, h.counts):
+			cumulative += n
+			lines.append(f'span_duration_seconds_bucket{{{base},le="{bound:g}"}} {cumulative}')
+		lines.append(f'span_duration_seconds_bucket{{{base},le="+Inf"}} {h.count}')
+		lines.append(f"span_duration_seconds_sum{{{base}}} {h.sum:.9g}")
+		lines.append(f"span_duration_seconds_count{{{base}}} {h.count}")
+	lines += ["# HELP events_total Counted events (rows, bytes, requests).", "# TYPE events_total counter"]
+	for (name, labels), value in counters:
+		lines.append(f"events_total{{{_label_text((('event', name),) + labels)}}} {value:.9g}")
+	return "\n".join(lines) + "\n"
+
+
+def snapshot() -> Dict[str, Any]:
+	histograms, counters = REGISTRY.items()
+	return {
+		"time": datetime.now(timezone.utc).isoformat(),
+		"uptime_s": time.time() - REGISTRY.started,
+		"pid": os.getpid(),
+		"spans": {_key_text(key): h.to_dict() for key, h in histograms},
+		"counters": {_key_text(key): value for key, value in counters},
+	}
+
+
+def write_snapshot(path: str) -> None:
+	if os.path.dirname(path):
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+	tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+	with open(tmp, "w", encoding="utf-8") as f:
+		json.dump(snapshot(), f, indent=2)
+	os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+	def do_GET(self) -> None:
+		if self.path.split("?")[0] == "/metrics":
+			body, content_type = prometheus_text().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+		elif self.path.split("?")[0] == "/metrics.json":
+			body, content_type = json.dumps(snapshot()).encode("utf-8"), "application/json"
+		else:
+			self.send_error(404)
+			return
+		self.send_response(200)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format: str, *args: Any) -> None:
+		# Scrapes every few seconds would drown the simulator's own output
+		return None
+
+
+class MetricsServer:
+	"""`/metrics` (Prometheus) and `/metrics.json` on a local port, served from a daemon thread."""
+
+	def __init__(self, port: int, host: str = "127.0.0.1"):
+		self.host = host
+		self.port = port
+		self._server: Optional[ThreadingHTTPServer] = None
+
+	def start(self) -> "MetricsServer":
+		self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+		self._server.daemon_threads = True
+		# Port 0 picks a free port
+		self.port = self._server.server_address[1]
+		threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+		return self
+
+	def close(self) -> None:
+		if self._server is not None:
+			self._server.shutdown()
+			self._server.server_close()
+			self._server = None
+
+
+class SnapshotWriter:
+	"""Writes `snapshot()` to `path` every `interval_seconds`, and once more on `close()`."""
+
+	def __init__(self, path: str, interval_seconds: float = 60.0):
+		self.path = path
+		self.interval_seconds = interval_seconds
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def start(self) -> "SnapshotWriter":
+		self._thread = threading.Thread(target=self._run, name="telemetry-snapshots", daemon=True)
+		self._thread.start()
+		return self
+
+	def _run(self) -> None:
+		while not self._stop.wait(self.interval_seconds):
+			try:
+				write_snapshot(self.path)
+			except OSError as e:
+				print(f"[telemetry] snapshot to {self.path} failed: {e}", file=sys.stderr)
+
+	def close(self) -> None:
+		if self._thread is None:
+			return
+		self._stop.set()
+		self._thread.join()
+		self._thread = None
+		write_snapshot(self.path)
+
+
+class SamplingProfiler:
+	"""Samples one thread's Python stack every `interval` seconds from a background thread.
+
+	Overhead is one stack walk per sample regardless of how much code runs, so
+	it suits long continuous runs where cProfile's per-call cost would distort
+	the cadence. `write()` emits collapsed stacks: `outer;inner;leaf count`.
+	"""
+
+	def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+		self.interval = interval
+		self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+		self.stacks: Counter = Counter()
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def start(self) -> "SamplingProfiler":
+		self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+		self._thread.start()
+		return self
+
+	def _run(self) -> None:
+		while not self._stop.wait(self.interval):
+			frame = sys._current_frames().get(self.thread_id)
+			stack = []
+			while frame is not None:
+				code = frame.f_code
+				stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+				frame = frame.f_back
+			if stack:
+				self.stacks[";".join(reversed(stack))] += 1
+
+	def stop(self) -> None:
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+
+	def write(self, path: str) -> None:
+		with open(path, "w", encoding="utf-8") as f:
+			for stack, n in self.stacks.most_common():
+				f.write(f"{stack} {n}\n")
+
+
+PROFILERS = ("cprofile", "sample")
+
+
+@contextmanager
+def profiled(mode: Optional[str], path: str) -> Iterator[None]:
+	"""Profile the body: `cprofile` writes `<path>.prof`, `sample` writes `<path>.collapsed`; None is a no-op."""
+	if not mode:
+		yield
+		return
+	if mode not in PROFILERS:
+		raise ValueError(f"Unknown profiler {mode!r} (expected one of {', '.join(PROFILERS)})")
+	if os.path.dirname(path):
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+	if mode == "cprofile":
+		profiler = cProfile.Profile()
+		profiler.enable()
+		try:
+			yield
+		finally:
+			profiler.disable()
+			profiler.dump_stats(f"{path}.prof")
+			print(f"[telemetry] cProfile stats written to {path}.prof", file=sys.stderr)
+	else:
+		sampler = SamplingProfiler().start()
+		try:
+			yield
+		finally:
+			sampler.stop()
+			sampler.write(f"{path}.collapsed")
+			print(f"[telemetry] {sum(sampler.stacks.values())} samples written to {path}.collapsed", file=sys.stderr)
@@ -4,21 +4,27 @@ from pathlib import Path
 # Ensure imports work whether run via `streamlit run` or direct python
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 try:
-	from streamlit_app.lib import fetch_table
+	from streamlit_app.lib import MAX_CHART_POINTS, RANGE_WINDOWS, RAW_HISTORY, ROLLUP_RANGES, TableRequest, splice_rollup
+	from streamlit_app.caching import fetch_rollup, fetch_tables, goal_tracker, render_cache_debug, window_bounds
 except ModuleNotFoundError:
 	sys.path.insert(0, str(Path(__file__).resolve().parent))
-	from lib import fetch_table  # type: ignore
+	sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'analysis'))
+	from lib import MAX_CHART_POINTS, RANGE_WINDOWS, RAW_HISTORY, ROLLUP_RANGES, TableRequest, splice_rollup  # type: ignore
+	from caching import fetch_rollup, fetch_tables, goal_tracker, render_cache_debug, window_bounds  # type: ignore
 
-# Also expose analysis helpers
 try:
-	from analysis.goal_tracker import compute_goal_tracker  # type: ignore
+	from analysis.downsample import downsample_buckets, downsample_lttb
+	from analysis.regression import rolling_velocity
 except ModuleNotFoundError:
-	sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'analysis'))
-	from goal_tracker import compute_goal_tracker  # type: ignore
+	from downsample import downsample_buckets, downsample_lttb  # type: ignore
+	from regression import rolling_velocity  # type: ignore
 
+import pandas as pd
 import streamlit as st
 import plotly.express as px
 
+GEN_COLUMNS = ["hydro_mw", "wind_mw", "solar_mw", "nuclear_mw", "fossil_mw"]
+
 st.set_page_config(page_title="Sustainability Intelligence", layout="wide")
 st.title("Sustainability Intelligence Dashboard")
 st.write(
@@ -36,20 +42,33 @@ st.sidebar.markdown(
 	"- **Status**: Simulated data for demo. Architecture supports scaling to live sources and APIs.\n"
 )
 
-range_choice = st.selectbox("Range", ["24h", "7d"], index=0, help="How much history to show on charts")
-limit = 96 if range_choice == "24h" else 96 * 7
+range_choice = st.selectbox("Range", list(RANGE_WINDOWS), index=0, help="How much history to show on charts")
 
 col1, col2, col3 = st.columns(3)
 
 try:
-	co2 = fetch_table("co2_intensity", limit=limit, order="timestamp")
-	gen = fetch_table("generation_mix", limit=limit, order="timestamp")
-	nz = fetch_table("netzero_alignment", limit=100, order="year")
+	# Same window for both tables so their rows line up
+	start, end = window_bounds("co2_intensity", range_choice)
+	# Long ranges are charted from hourly/daily rollups when the simulator writes them
+	grain = ROLLUP_RANGES.get(range_choice)
+	rollup = fetch_rollup(grain, start, end) if grain and start is not None else pd.DataFrame()
+	# Then raw rows are only needed for the last few days (goal tracker, KPI cards, newest bucket)
+	raw_start = start if rollup.empty else max(start, end - RAW_HISTORY)
+	tables = fetch_tables([
+		TableRequest("co2_intensity", raw_start, end),
+		TableRequest("generation_mix", raw_start, end),
+		TableRequest("netzero_alignment", limit=100, order="year", tiebreak=None),
+	])
+	co2, gen, nz = tables["co2_intensity"], tables["generation_mix"], tables["netzero_alignment"]
+	co2_chart, gen_chart = co2, gen
+	if not rollup.empty:
+		co2_chart = splice_rollup(rollup, co2, grain, ["co2_intensity_g_per_kwh"])
+		gen_chart = splice_rollup(rollup, gen, grain, GEN_COLUMNS)
 
 	# Goal Tracker block (only if data available)
 	gt = {}
 	if not co2.empty and not gen.empty:
-		gt = compute_goal_tracker(co2, gen, nz)
+		gt = goal_tracker((range_choice, raw_start, end), co2, gen, nz)
 		if not gt.get("error"):
 			st.subheader("Goal Tracker (1.5°C / Net‑zero 2050)")
 			m1, m2, m3 = st.columns(3)
@@ -118,22 +137,35 @@ try:
 		col3.metric("Net-zero alignment (%)", f"{latest_align:.0f}")
 
 	# Time series
-	if not co2.empty:
-		fig = px.line(co2.sort_values("timestamp"), x="timestamp", y="co2_intensity_g_per_kwh", title="CO₂ intensity over time")
+	if not co2_chart.empty:
+		# LTTB keeps peaks and dips while capping the points shipped to the browser
+		co2_plot = downsample_lttb(co2_chart.sort_values("timestamp"), "timestamp", "co2_intensity_g_per_kwh", MAX_CHART_POINTS)
+		fig = px.line(co2_plot, x="timestamp", y="co2_intensity_g_per_kwh", title="CO₂ intensity over time")
 		st.plotly_chart(fig, use_container_width=True)
 		st.caption("Lower is better. Expect dips when wind/solar/hydro output is high; spikes during outages or low renewables. Useful for trend disclosures and operational decarbonization tracking.")
 		with st.expander("What this shows (CO₂ intensity)"):
 			st.markdown(
 				"- **Y‑axis**: gCO₂ per kWh.\n"
-				"- **X‑axis**: time (15‑minute simulated steps).\n"
+				"- **X‑axis**: time (simulated steps; long ranges use hourly/daily averages when rollups are enabled and are downsampled, keeping peaks and dips).\n"
 				"- **Drivers**: renewable availability, outages/maintenance, fossil dispatch.\n"
 				"- **Read it**: downward trend = decarbonization; spikes = operational events.\n"
 				"- **Why it matters**: core emissions intensity indicator for CSRD/ESRS climate metrics."
 			)
 
-	if not gen.empty:
-		g = gen.sort_values("timestamp")
-		fig2 = px.area(g, x="timestamp", y=["hydro_mw","wind_mw","solar_mw","nuclear_mw","fossil_mw"], title="Generation mix (MW)")
+		# Velocity at every step from one vectorized pass of 7-day rolling slopes;
+		# a 7-day window holds only 7-8 daily buckets, so fewer points are required there
+		min_points = 5 if grain == "daily" and not rollup.empty else 10
+		velocity = rolling_velocity(co2_chart.sort_values("timestamp"), min_points=min_points).dropna(subset=["v_actual_g_per_kwh_per_yr"])
+		if not velocity.empty:
+			velocity = downsample_lttb(velocity, "timestamp", "v_actual_g_per_kwh_per_yr", MAX_CHART_POINTS)
+			figv = px.line(velocity, x="timestamp", y="v_actual_g_per_kwh_per_yr", title="Decarbonization velocity (7‑day rolling, g/kWh per year)")
+			st.plotly_chart(figv, use_container_width=True)
+			st.caption("Positive values mean intensity is falling. Each point is the trend over the preceding 7 days, the same fit the Goal Tracker uses (over hourly/daily averages on rollup-backed long ranges).")
+
+	if not gen_chart.empty:
+		# Bucket means share one x per bucket, so the stack stays consistent
+		g = downsample_buckets(gen_chart.sort_values("timestamp"), "timestamp", GEN_COLUMNS, MAX_CHART_POINTS)
+		fig2 = px.area(g, x="timestamp", y=GEN_COLUMNS, title="Generation mix (MW)")
 		st.plotly_chart(fig2, use_container_width=True)
 		st.caption("Stacked by technology (MW). Weather, maintenance, and price signals drive shifts. Supports narrative on energy mix and renewable penetration.")
 		with st.expander("What this shows (generation mix)"):
@@ -162,3 +194,5 @@ try:
 
 except Exception as e:
 	st.error(f"Error fetching data: {e}")
+
+render_cache_debug()
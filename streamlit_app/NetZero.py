@@ -4,10 +4,10 @@ from pathlib import Path
 # Ensure imports work whether run via `streamlit run` or direct python
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 try:
-	from streamlit_app.lib import fetch_table
+	from streamlit_app.caching import fetch_table, render_cache_debug
 except ModuleNotFoundError:
 	sys.path.insert(0, str(Path(__file__).resolve().parent))
-	from lib import fetch_table  # type: ignore
+	from caching import fetch_table, render_cache_debug  # type: ignore
 
 import streamlit as st
 import plotly.express as px
@@ -23,7 +23,7 @@ with st.expander("How to read this"):
 	)
 
 try:
-	nz = fetch_table("netzero_alignment", limit=200, order="year")
+	nz = fetch_table("netzero_alignment", limit=200, order="year", tiebreak=None)
 	if nz.empty:
 		st.info("No yearly data yet.")
 	else:
@@ -31,3 +31,5 @@ try:
 		st.plotly_chart(fig, use_container_width=True)
 except Exception as e:
 	st.error(f"Error: {e}")
+
+render_cache_debug()
@@ -4,14 +4,21 @@ from pathlib import Path
 # Ensure imports work whether run via `streamlit run` or direct python
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 try:
-	from streamlit_app.lib import fetch_table
+	from streamlit_app.lib import MAX_CHART_POINTS, RANGE_WINDOWS, TableRequest
+	from streamlit_app.caching import fetch_tables, render_cache_debug, window_bounds
 except ModuleNotFoundError:
 	sys.path.insert(0, str(Path(__file__).resolve().parent))
-	from lib import fetch_table  # type: ignore
+	from lib import MAX_CHART_POINTS, RANGE_WINDOWS, TableRequest  # type: ignore
+	from caching import fetch_tables, render_cache_debug, window_bounds  # type: ignore
+
+try:
+	from analysis.alignment import align_frames
+except ModuleNotFoundError:
+	sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "analysis"))
+	from alignment import align_frames  # type: ignore
 
 import streamlit as st
 import plotly.express as px
-import pandas as pd
 
 st.set_page_config(page_title="Renewables vs CO₂", layout="wide")
 st.title("Renewables vs CO₂ intensity")
@@ -24,17 +31,24 @@ with st.expander("How to read this"):
 		"- **Why it matters**: evidence that renewable integration lowers emissions, supporting climate strategy narratives."
 	)
 
-range_choice = st.selectbox("Range", ["24h", "7d"], index=0)
-limit = 96 if range_choice == "24h" else 96 * 7
+range_choice = st.selectbox("Range", list(RANGE_WINDOWS), index=0)
 
 try:
-	co2 = fetch_table("co2_intensity", limit=limit, order="timestamp")
-	gen = fetch_table("generation_mix", limit=limit, order="timestamp")
+	# Same window for both tables so their rows line up
+	start, end = window_bounds("co2_intensity", range_choice)
+	tables = fetch_tables([
+		TableRequest("co2_intensity", start, end, columns=("timestamp", "co2_intensity_g_per_kwh")),
+		TableRequest("generation_mix", start, end, columns=("timestamp", "renewable_share_pct")),
+	])
+	co2, gen = tables["co2_intensity"], tables["generation_mix"]
 	if co2.empty or gen.empty:
 		st.info("Not enough data yet.")
 		st.stop()
-	# Join on timestamp
-	df = pd.merge(gen, co2, on="timestamp", how="inner")
+	# Timestamps carry sub-second jitter; join on the step grid instead of exact equality
+	df = align_frames(gen, co2)
+	if len(df) > MAX_CHART_POINTS:
+		# A uniform sample keeps the OLS trendline unbiased; fixed seed so reruns draw the same points
+		df = df.sample(MAX_CHART_POINTS, random_state=0)
 	fig = px.scatter(
 		df,
 		x="renewable_share_pct",
@@ -45,3 +59,5 @@ try:
 	st.plotly_chart(fig, use_container_width=True)
 except Exception as e:
 	st.error(f"Error: {e}")
+
+render_cache_debug()
@@ -0,0 +1,203 @@
+"""Process-wide memoization for the dashboard pages.
+
+Wraps the `lib` fetchers and `compute_goal_tracker` in `st.cache_data`, which is
+shared by every browser session served by the same Streamlit process:
+
+- `window_bounds` (the only call that reaches Supabase on a rerun) is cached for
+  the simulator's wall interval, so within one step every rerun reuses it.
+- Table windows are keyed on (table, start, end, columns) and rollup windows on
+  (grain, start, end). `end` is derived from the high-water mark, so a new step
+  naturally produces a new key.
+- Bulk `fetch_tables` calls are keyed on their requests, which carry the same
+  window bounds, and expire with the same TTL.
+- Goal tracker results are keyed on (window, high-water mark) instead of hashing
+  the input frames. The YTD budget comes from one `YtdBudgetTracker` per process
+  that only integrates rows newer than its checkpoint, persisted to
+  GOAL_TRACKER_CHECKPOINT so a restart does not redo the year. The velocity
+  slope is likewise maintained by one `SlidingWindowSlope`, filled with the
+  full 7 days before its first update whatever window the page shows. Both
+  catch up on older rows through the cached `fetch_range`.
+
+Hit/miss counters live in an `st.cache_resource` object and can be shown with
+`render_cache_debug()`, along with the timing spans when telemetry is enabled
+(`lib.start_telemetry`, started once per process).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from simulator import telemetry
+from simulator.config import load_config_from_env
+
+try:
+	from streamlit_app import lib
+except ModuleNotFoundError:
+	import lib  # type: ignore
+
+try:
+	from analysis.goal_tracker import YtdBudgetTracker, compute_goal_tracker
+	from analysis.regression import SlidingWindowSlope
+except ModuleNotFoundError:
+	from goal_tracker import YtdBudgetTracker, compute_goal_tracker  # type: ignore
+	from regression import SlidingWindowSlope  # type: ignore
+
+# A new row arrives once per simulator wall interval; nothing can change sooner
+TTL_SECONDS = max(1, load_config_from_env().wall_interval_seconds)
+
+
+class CacheStats:
+	def __init__(self):
+		self._lock = threading.Lock()
+		self.calls: Counter = Counter()
+		self.misses: Counter = Counter()
+
+	def call(self, name: str) -> None:
+		with self._lock:
+			self.calls[name] += 1
+
+	def miss(self, name: str) -> None:
+		with self._lock:
+			self.misses[name] += 1
+
+	def snapshot(self) -> Dict[str, Dict[str, int]]:
+		with self._lock:
+			return {name: {"hits": n - self.misses[name], "misses": self.misses[name]} for name, n in sorted(self.calls.items())}
+
+
+@st.cache_resource
+def cache_stats() -> CacheStats:
+	return CacheStats()
+
+
+_TRACKER_LOCK = threading.Lock()
+
+
+@st.cache_resource
+def budget_tracker() -> YtdBudgetTracker:
+	path = lib.budget_checkpoint_path()
+	return YtdBudgetTracker.load(path) if path else YtdBudgetTracker()
+
+
+@st.cache_resource
+def velocity_estimator() -> SlidingWindowSlope:
+	return SlidingWindowSlope()
+
+
+@st.cache_resource
+def telemetry_exporters() -> list:
+	return lib.start_telemetry()
+
+
+# Started before any page fetches so the first render is measured too
+telemetry_exporters()
+
+
+# The cached bodies only run on a miss, so that is where misses are counted
+
+
+@st.cache_data(ttl=TTL_SECONDS, show_spinner=False)
+def _window_bounds(table: str, range_choice: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+	cache_stats().miss("window_bounds")
+	return lib.window_bounds(table, range_choice)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _fetch_range(table: str, start: Optional[datetime], end: Optional[datetime], columns: Optional[Tuple[str, ...]]) -> pd.DataFrame:
+	cache_stats().miss("fetch_range")
+	return lib.fetch_range(table, start, end, list(columns) if columns is not None else None)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _fetch_rollup(grain: str, start: Optional[datetime], end: Optional[datetime]) -> pd.DataFrame:
+	cache_stats().miss("fetch_rollup")
+	return lib.fetch_rollup(grain, start, end)
+
+
+@st.cache_data(ttl=TTL_SECONDS, show_spinner=False)
+def _fetch_table(table: str, limit: int, order: str, tiebreak: Optional[str]) -> pd.DataFrame:
+	cache_stats().miss("fetch_table")
+	return lib.fetch_table(table, limit=limit, order=order, tiebreak=tiebreak)
+
+
+@st.cache_data(ttl=TTL_SECONDS, max_entries=32, show_spinner=False)
+def _fetch_tables(table_requests: Tuple[lib.TableRequest, ...]) -> Dict[str, pd.DataFrame]:
+	cache_stats().miss("fetch_tables")
+	return lib.fetch_tables(table_requests)
+
+
+@st.cache_data(ttl=TTL_SECONDS, max_entries=16, show_spinner=False)
+def _goal_tracker(key: Tuple[Any, ...], _co2: pd.DataFrame, _gen: pd.DataFrame, _nz: pd.DataFrame) -> Dict[str, object]:
+	cache_stats().miss("goal_tracker")
+	if _gen.empty:
+		return compute_goal_tracker(_co2, _gen, _nz)
+	tracker = budget_tracker()
+	with _TRACKER_LOCK:
+		# Rows between the checkpoint and this window, through the cached fetch like every other read
+		tracker.catch_up(fetch_range, pd.Timestamp(_gen["timestamp"].iloc[0]).to_pydatetime())
+		estimator = velocity_estimator()
+		if not _co2.empty:
+			# Likewise the part of the 7-day slope window before this (possibly shorter) one
+			estimator.catch_up(fetch_range, pd.Timestamp(_co2["timestamp"].min()).to_pydatetime())
+		result = compute_goal_tracker(_co2, _gen, _nz, budget_tracker=tracker, velocity_estimator=estimator)
+		path = lib.budget_checkpoint_path()
+		if path:
+			tracker.save(path)
+	return result
+
+
+def window_bounds(table: str, range_choice: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+	cache_stats().call("window_bounds")
+	return _window_bounds(table, range_choice)
+
+
+def fetch_range(
+	table: str,
+	start: Optional[datetime] = None,
+	end: Optional[datetime] = None,
+	columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+	cache_stats().call("fetch_range")
+	return _fetch_range(table, start, end, tuple(columns) if columns is not None else None)
+
+
+def fetch_rollup(grain: str, start: Optional[datetime], end: Optional[datetime]) -> pd.DataFrame:
+	cache_stats().call("fetch_rollup")
+	return _fetch_rollup(grain, start, end)
+
+
+def fetch_table(table: str, limit: int = 500, order: str = "timestamp", tiebreak: Optional[str] = "id") -> pd.DataFrame:
+	cache_stats().call("fetch_table")
+	return _fetch_table(table, limit, order, tiebreak)
+
+
+def fetch_tables(table_requests: Sequence[lib.TableRequest]) -> Dict[str, pd.DataFrame]:
+	"""`lib.fetch_tables` (concurrent), memoized on the full set of requests."""
+	cache_stats().call("fetch_tables")
+	return _fetch_tables(tuple(table_requests))
+
+
+def goal_tracker(key: Tuple[Any, ...], co2: pd.DataFrame, gen: pd.DataFrame, nz: pd.DataFrame) -> Dict[str, object]:
+	"""`compute_goal_tracker`, memoized on `key` (e.g. the window bounds) rather than the frames."""
+	cache_stats().call("goal_tracker")
+	return _goal_tracker(key, co2, gen, nz)
+
+
+def render_cache_debug() -> None:
+	with st.sidebar.expander("Cache debug", expanded=False):
+		st.caption(f"TTL {TTL_SECONDS}s, shared by all sessions of this server process")
+		stats = cache_stats().snapshot()
+		if stats:
+			st.table(pd.DataFrame.from_dict(stats, orient="index"))
+		else:
+			st.write("No cached calls yet.")
+		spans = telemetry.snapshot()["spans"] if telemetry.is_enabled() else {}
+		if spans:
+			st.caption("Timing spans (seconds)")
+			st.table(pd.DataFrame.from_dict(spans, orient="index")[["count", "mean_s", "p95_s", "max_s"]])
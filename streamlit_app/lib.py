@@ -1,25 +1,162 @@
 from __future__ import annotations
 
 import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
 import pandas as pd
 import requests
 
+from analysis import data_access
+from analysis.data_access import TableRequest
+from simulator import telemetry
+from simulator.config import load_config_from_env
+from simulator.rollups import GRAINS, rollup_means
+
+try:
+	from streamlit_app.local_cache import KEY_COLUMNS, LocalTableCache
+except ModuleNotFoundError:
+	from local_cache import KEY_COLUMNS, LocalTableCache  # type: ignore
+
+# Chart windows offered by the pages
+RANGE_WINDOWS = {
+	"24h": timedelta(hours=24),
+	"7d": timedelta(days=7),
+	"30d": timedelta(days=30),
+	"90d": timedelta(days=90),
+	"1y": timedelta(days=365),
+}
+# Upper bound on points sent to the browser per chart series
+MAX_CHART_POINTS = 1500
+# Long ranges are charted from the simulator's rollups when it writes them (SIM_ROLLUPS)
+ROLLUP_RANGES = {"30d": "hourly", "90d": "hourly", "1y": "daily"}
+# Raw history still read for those ranges: goal tracker, KPI cards and the not yet rolled-up tail
+RAW_HISTORY = timedelta(days=7)
+
 
 def get_env():
-	from dotenv import load_dotenv
-	load_dotenv(override=False)
-	return os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+	return data_access.get_supabase_env()
+
+
+_CACHE: Optional[LocalTableCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> Optional[LocalTableCache]:
+	"""Process-wide local table cache; disabled when DASHBOARD_CACHE_PATH is empty."""
+	global _CACHE
+	get_env()
+	path = os.getenv("DASHBOARD_CACHE_PATH", "data/.dashboard_cache.sqlite")
+	if not path:
+		return None
+	with _CACHE_LOCK:
+		if _CACHE is None or _CACHE.path != path:
+			_CACHE = LocalTableCache(path)
+		return _CACHE
+
+
+def budget_checkpoint_path() -> Optional[str]:
+	"""Where the YTD budget tracker is saved; not persisted when GOAL_TRACKER_CHECKPOINT is empty."""
+	get_env()
+	return os.getenv("GOAL_TRACKER_CHECKPOINT", "data/.goal_tracker.json") or None
+
+
+def start_telemetry() -> list:
+	"""Enable timing spans when DASHBOARD_METRICS_PORT or DASHBOARD_TELEMETRY_SNAPSHOT is set.
+
+	Returns the started exporters. Separate from the simulator's SIM_* settings
+	so both can run on one host.
+	"""
+	get_env()
+	port = os.getenv("DASHBOARD_METRICS_PORT")
+	snapshot_path = os.getenv("DASHBOARD_TELEMETRY_SNAPSHOT")
+	if not port and not snapshot_path:
+		return []
+	telemetry.enable()
+	exporters = []
+	if port:
+		exporters.append(telemetry.MetricsServer(int(port)).start())
+	if snapshot_path:
+		exporters.append(telemetry.SnapshotWriter(snapshot_path, float(os.getenv("DASHBOARD_TELEMETRY_SNAPSHOT_SECONDS", "60"))).start())
+	return exporters
+
+
+def fetch_range(
+	table: str,
+	start: Optional[datetime] = None,
+	end: Optional[datetime] = None,
+	columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+	"""Rows with `timestamp` in [start, end), oldest first, served from the local cache."""
+	cache = get_cache()
+	if cache is None:
+		return data_access.fetch_range(table, start, end, columns)
+	return cache.read(table, start, end, columns)
+
+
+def fetch_table(table: str, limit: int = 500, order: str = "timestamp", tiebreak: Optional[str] = "id") -> pd.DataFrame:
+	with telemetry.span("fetch_table", table=table):
+		cache = get_cache()
+		if cache is not None and KEY_COLUMNS.get(table) == order:
+			return cache.read(table).iloc[::-1].head(limit).reset_index(drop=True)
+		return data_access.fetch_supabase_table(table, limit=limit, order=order, tiebreak=tiebreak)
+
+
+def fetch_rollup(grain: str, start: Optional[datetime], end: Optional[datetime]) -> pd.DataFrame:
+	"""Per-bucket means of the `grain` rollup in [start, end) (see `rollup_means`).
+
+	Empty when rollups are not written, including when their tables were never
+	created (supabase/sql/06_rollups.sql); callers then fall back to raw rows.
+	"""
+	with telemetry.span("fetch_rollup", grain=grain):
+		try:
+			df = data_access.fetch_rollup(grain, start, end)
+		except requests.HTTPError:
+			return pd.DataFrame()
+	return pd.DataFrame() if df.empty else rollup_means(df, load_config_from_env().step_minutes)
+
+
+def splice_rollup(means: pd.DataFrame, raw: pd.DataFrame, grain: str, columns: Sequence[str]) -> pd.DataFrame:
+	"""Rollup bucket means followed by the raw rows after the last bucket.
+
+	A bucket is only rolled up once it closes, so the newest hour (or day) comes
+	from the raw rows read anyway for the goal tracker.
+	"""
+	cutoff = means["timestamp"].max() + GRAINS[grain]
+	tail = raw[["timestamp", *columns]].assign(timestamp=pd.to_datetime(raw["timestamp"], utc=True, format="ISO8601"))
+	tail = tail[tail["timestamp"] >= cutoff]
+	return pd.concat([means[["timestamp", *columns]], tail], ignore_index=True)
+
+
+def _fetch_request(req: TableRequest) -> pd.DataFrame:
+	if req.limit is None:
+		return fetch_range(req.table, req.start, req.end, req.columns)
+	return fetch_table(req.table, limit=req.limit, order=req.order, tiebreak=req.tiebreak)
+
 
+def fetch_tables(table_requests: Sequence[TableRequest]) -> Dict[str, pd.DataFrame]:
+	"""Fetch all tables a page needs concurrently (through the local cache when enabled)."""
+	return data_access.fetch_tables(table_requests, fetch=_fetch_request)
 
-def fetch_table(table: str, limit: int = 500, order: str = "timestamp") -> pd.DataFrame:
-	url, key = get_env()
-	if not url or not key:
-		raise RuntimeError("Supabase URL/KEY not set")
-	endpoint = f"{url}/rest/v1/{table}?select=*&order={order}.desc&limit={limit}"
-	headers = {"apikey": key, "Authorization": f"Bearer {key}"}
-	resp = requests.get(endpoint, headers=headers, timeout=30)
-	resp.raise_for_status()
-	return pd.DataFrame(resp.json())
 
+def window_bounds(table: str, range_choice: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+	"""[start, end) of the chosen window, ending at the newest row of `table`.
 
+	Anchoring on the data rather than the wall clock keeps the window full when the
+	simulator runs ahead of (or behind) real time, whatever its step size.
+	"""
+	cache = get_cache()
+	if cache is not None:
+		# Delta sync; the high-water mark is the newest row. Rollup ranges read
+		# less raw history, and `read` fetches more if the rollup turns out empty
+		history = RANGE_WINDOWS[range_choice]
+		if range_choice in ROLLUP_RANGES:
+			history = min(history, RAW_HISTORY)
+		latest = cache.sync(table, history=history)
+	else:
+		latest = data_access.latest_timestamp(table)
+	if latest is None:
+		return None, None
+	end = latest + timedelta(microseconds=1)
+	return end - RANGE_WINDOWS[range_choice], end
 
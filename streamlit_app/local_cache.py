@@ -0,0 +1,194 @@
+"""On-disk cache of Supabase tables for the dashboard, synced by delta.
+
+Each table is mirrored into a SQLite file together with its high-water mark (the
+newest key seen). A sync only asks Supabase for rows at or after that mark, so a
+dashboard refresh transfers the handful of rows written since the last one
+instead of the whole chart window.
+
+Time-series tables are keyed on `timestamp` (stored as epoch microseconds in
+`_key`) and rows are upserted on `id`; yearly tables have no `id` and are keyed
+and upserted on `year`. The cache keeps the largest history ever requested for
+a table and evicts rows older than that, so the file stays bounded by the
+widest chart window.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from analysis.data_access import iter_supabase_table, latest_timestamp
+
+# Tables not keyed on `timestamp`
+KEY_COLUMNS = {"netzero_alignment": "year"}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_key(value: Any, column: str) -> int:
+	if column != "timestamp":
+		return int(value)
+	ts = pd.Timestamp(value)
+	ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+	return (ts.to_pydatetime() - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_key(key: int, column: str) -> Any:
+	return _EPOCH + timedelta(microseconds=key) if column == "timestamp" else key
+
+
+def _column_list(names: Sequence[str]) -> str:
+	return ", ".join(f'"{c}"' for c in names)
+
+
+class LocalTableCache:
+	def __init__(self, path: str, min_sync_interval: float = 1.0):
+		"""`min_sync_interval` skips delta fetches repeated within that many seconds."""
+		self.path = path
+		self.min_sync_interval = min_sync_interval
+		# One lock per table, so different tables can sync concurrently
+		self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+		self._last_sync: Dict[str, float] = {}
+		self.rows_fetched = 0
+		if os.path.dirname(path):
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+		with self._connect() as conn:
+			conn.execute("pragma journal_mode=wal")
+			conn.execute(
+				"create table if not exists _meta (tbl text primary key, hwm integer, low integer, retention integer)"
+			)
+
+	@contextmanager
+	def _connect(self) -> Iterator[sqlite3.Connection]:
+		conn = sqlite3.connect(self.path, timeout=30)
+		try:
+			with conn:
+				yield conn
+		finally:
+			conn.close()
+
+	def _meta(self, conn: sqlite3.Connection, table: str) -> Optional[Dict[str, Optional[int]]]:
+		row = conn.execute("select hwm, low, retention from _meta where tbl = ?", (table,)).fetchone()
+		return None if row is None else {"hwm": row[0], "low": row[1], "retention": row[2]}
+
+	def _save_meta(self, conn: sqlite3.Connection, table: str, meta: Dict[str, Optional[int]]) -> None:
+		conn.execute(
+			"insert or replace into _meta (tbl, hwm, low, retention) values (?, ?, ?, ?)",
+			(table, meta["hwm"], meta["low"], meta["retention"]),
+		)
+
+	def _fetch(self, table: str, start: Any = None, end: Any = None) -> pd.DataFrame:
+		column = KEY_COLUMNS.get(table, "timestamp")
+		# Only timestamps repeat; other key columns are unique on their own
+		tiebreak = "id" if column == "timestamp" else None
+		pages = list(iter_supabase_table(table, start=start, end=end, order=column, tiebreak=tiebreak))
+		frame = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+		self.rows_fetched += len(frame)
+		return frame
+
+	def _upsert(self, conn: sqlite3.Connection, table: str, frame: pd.DataFrame) -> Optional[int]:
+		"""Store rows; returns the largest key written."""
+		if frame.empty:
+			return None
+		column = KEY_COLUMNS.get(table, "timestamp")
+		keys = [_to_key(v, column) for v in frame[column]]
+		if "id" in frame.columns:
+			row_ids, names = ["id"], [c for c in frame.columns if c != "id"]
+			conn.execute(f'create table if not exists "{table}" (id integer primary key, _key integer not null, {_column_list(names)})')
+			conn.execute(f'create index if not exists "{table}_key" on "{table}" (_key)')
+		else:
+			# Keyed tables without `id` (netzero_alignment: year) are upserted on the key itself
+			row_ids, names = [], list(frame.columns)
+			conn.execute(f'create table if not exists "{table}" (_key integer primary key, {_column_list(names)})')
+		existing = {r[1] for r in conn.execute(f'pragma table_info("{table}")')}
+		for c in names:
+			if c not in existing:
+				conn.execute(f'alter table "{table}" add column "{c}"')
+		fields = [*row_ids, *names]
+		records = frame[fields].astype(object).where(frame[fields].notna(), None).values.tolist()
+		placeholders = ", ".join("?" * (len(fields) + 1))
+		conn.executemany(
+			f'insert or replace into "{table}" (_key, {_column_list(fields)}) values ({placeholders})',
+			[[k, *r] for r, k in zip(records, keys)],
+		)
+		return max(keys)
+
+	def sync(self, table: str, since: Optional[datetime | int] = None, history: Optional[timedelta] = None) -> Optional[datetime | int]:
+		"""Bring the cached copy of `table` up to date and return its high-water mark.
+
+		Rows newer than the mark are fetched; if `since` (or `history` back from the
+		mark) reaches before what is cached, the missing older span is fetched once.
+		"""
+		column = KEY_COLUMNS.get(table, "timestamp")
+		with self._locks[table], self._connect() as conn:
+			meta = self._meta(conn, table)
+			if meta is None:
+				if since is None and history is not None and column == "timestamp":
+					latest = latest_timestamp(table)
+					if latest is None:
+						return None
+					since = latest - history
+				hwm = self._upsert(conn, table, self._fetch(table, start=since))
+				if hwm is None:
+					return None
+				low = _to_key(since, column) if since is not None else None
+				meta = {"hwm": hwm, "low": low, "retention": None}
+				self._last_sync[table] = time.monotonic()
+			else:
+				if since is None and history is not None and column == "timestamp":
+					since = _from_key(meta["hwm"], column) - history
+				since_key = None if since is None else _to_key(since, column)
+				if since_key is not None and meta["low"] is not None and since_key < meta["low"]:
+					# Requested span reaches before what is cached: fill the gap once
+					self._upsert(conn, table, self._fetch(table, start=since, end=_from_key(meta["low"], column)))
+					meta["low"] = since_key
+				if time.monotonic() - self._last_sync.get(table, float("-inf")) >= self.min_sync_interval:
+					# `gte` the mark so rows sharing the newest key are not missed
+					newest = self._upsert(conn, table, self._fetch(table, start=_from_key(meta["hwm"], column)))
+					meta["hwm"] = max(meta["hwm"], newest or meta["hwm"])
+					self._last_sync[table] = time.monotonic()
+			if column == "timestamp" and since is not None:
+				meta["retention"] = max(meta["retention"] or 0, meta["hwm"] - _to_key(since, column))
+			if column == "timestamp" and meta["retention"] is not None:
+				cutoff = meta["hwm"] - meta["retention"]
+				conn.execute(f'delete from "{table}" where _key < ?', (cutoff,))
+				meta["low"] = cutoff if meta["low"] is None else max(meta["low"], cutoff)
+			self._save_meta(conn, table, meta)
+			return _from_key(meta["hwm"], column)
+
+	def read(
+		self,
+		table: str,
+		start: Optional[datetime | int] = None,
+		end: Optional[datetime | int] = None,
+		columns: Optional[Sequence[str]] = None,
+	) -> pd.DataFrame:
+		"""Sync `table` from `start`, then return cached rows in [start, end), oldest first."""
+		self.sync(table, since=start)
+		column = KEY_COLUMNS.get(table, "timestamp")
+		where: List[str] = []
+		params: List[int] = []
+		if start is not None:
+			where.append("_key >= ?")
+			params.append(_to_key(start, column))
+		if end is not None:
+			where.append("_key < ?")
+			params.append(_to_key(end, column))
+		with self._connect() as conn:
+			exists = conn.execute("select 1 from sqlite_master where type = 'table' and name = ?", (table,)).fetchone()
+			if not exists:
+				return pd.DataFrame(columns=list(columns) if columns is not None else None)
+			select = "*" if columns is None else _column_list(columns)
+			has_id = any(r[1] == "id" for r in conn.execute(f'pragma table_info("{table}")'))
+			order = "_key, id" if has_id else "_key"
+			sql = f'select {select} from "{table}"' + (f" where {' and '.join(where)}" if where else "") + f" order by {order}"
+			frame = pd.read_sql_query(sql, conn, params=params)
+		return frame.drop(columns="_key", errors="ignore")
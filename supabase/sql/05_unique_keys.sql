@@ -0,0 +1,7 @@
+-- Idempotency keys for simulator inserts (simulator.journal.TABLE_KEYS)
+-- Every simulator insert (journal replay, once, continuous, backfill) uses
+-- on_conflict=timestamp with resolution=ignore-duplicates, which requires a
+-- unique constraint on the conflict column.
+
+create unique index if not exists ux_co2_intensity_ts on public.co2_intensity ("timestamp");
+create unique index if not exists ux_generation_mix_ts on public.generation_mix ("timestamp");
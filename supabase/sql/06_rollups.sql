@@ -0,0 +1,47 @@
+-- Hourly and daily rollups maintained by the simulator (simulator.rollups)
+-- Rows are partial aggregates of one UTC bucket; a bucket can be written in
+-- several pieces (restarts, backfill chunk edges), told apart by first_sample.
+-- Readers sum/min/max the pieces per "timestamp" (see analysis.data_access.fetch_rollup).
+-- Run before enabling rollups with SIM_ROLLUPS=hourly,daily (off by default); the
+-- dashboard charts its 30d/90d/1y ranges from these tables when they have rows.
+
+create table if not exists public.energy_rollup_hourly (
+	id bigint generated by default as identity primary key,
+	"timestamp" timestamptz not null,
+	first_sample timestamptz not null,
+	last_sample timestamptz not null,
+	samples int not null,
+	co2_sum_g_per_kwh numeric not null,
+	co2_min_g_per_kwh numeric not null,
+	co2_max_g_per_kwh numeric not null,
+	co2_weighted_g_per_kwh numeric not null,
+	emissions_t numeric not null,
+	hydro_mwh numeric not null,
+	wind_mwh numeric not null,
+	solar_mwh numeric not null,
+	nuclear_mwh numeric not null,
+	fossil_mwh numeric not null,
+	total_mwh numeric not null,
+	total_mw_min numeric not null,
+	total_mw_max numeric not null
+);
+
+create table if not exists public.energy_rollup_daily (like public.energy_rollup_hourly including all);
+
+-- Idempotency key for journal replay (on_conflict=timestamp,first_sample)
+create unique index if not exists ux_energy_rollup_hourly_bucket on public.energy_rollup_hourly ("timestamp", first_sample);
+create unique index if not exists ux_energy_rollup_daily_bucket on public.energy_rollup_daily ("timestamp", first_sample);
+
+alter table public.energy_rollup_hourly enable row level security;
+alter table public.energy_rollup_daily enable row level security;
+
+-- For demo/dev, allow inserts and reads for anon key. Restrict in production.
+drop policy if exists "energy_rollup_hourly anon read" on public.energy_rollup_hourly;
+create policy "energy_rollup_hourly anon read" on public.energy_rollup_hourly for select using (true);
+drop policy if exists "energy_rollup_hourly anon insert" on public.energy_rollup_hourly;
+create policy "energy_rollup_hourly anon insert" on public.energy_rollup_hourly for insert with check (true);
+
+drop policy if exists "energy_rollup_daily anon read" on public.energy_rollup_daily;
+create policy "energy_rollup_daily anon read" on public.energy_rollup_daily for select using (true);
+drop policy if exists "energy_rollup_daily anon insert" on public.energy_rollup_daily;
+create policy "energy_rollup_daily anon insert" on public.energy_rollup_daily for insert with check (true);
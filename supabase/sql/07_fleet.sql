@@ -0,0 +1,55 @@
+-- Fleet-scale simulation output (simulator.fleet)
+-- Per-plant output and per-region aggregates in the shape of generation_mix / co2_intensity.
+
+create table if not exists public.fleet_plant_output (
+	id bigint generated by default as identity primary key,
+	"timestamp" timestamptz not null,
+	plant_id bigint not null,
+	region text not null,
+	technology text not null,
+	output_mw numeric not null
+);
+
+create table if not exists public.fleet_generation_mix (
+	id bigint generated by default as identity primary key,
+	"timestamp" timestamptz not null,
+	hydro_mw numeric not null,
+	wind_mw numeric not null,
+	solar_mw numeric not null,
+	nuclear_mw numeric not null,
+	fossil_mw numeric not null,
+	total_mw numeric not null,
+	renewable_share_pct numeric not null,
+	region text not null
+);
+
+create table if not exists public.fleet_co2_intensity (
+	id bigint generated by default as identity primary key,
+	"timestamp" timestamptz not null,
+	co2_intensity_g_per_kwh numeric not null,
+	region text not null
+);
+
+create unique index if not exists ux_fleet_plant_output_ts on public.fleet_plant_output ("timestamp", plant_id);
+create unique index if not exists ux_fleet_generation_mix_ts on public.fleet_generation_mix ("timestamp", region);
+create unique index if not exists ux_fleet_co2_intensity_ts on public.fleet_co2_intensity ("timestamp", region);
+
+alter table public.fleet_plant_output enable row level security;
+alter table public.fleet_generation_mix enable row level security;
+alter table public.fleet_co2_intensity enable row level security;
+
+-- For demo/dev, allow inserts and reads for anon key. Restrict in production.
+drop policy if exists "fleet_plant_output anon read" on public.fleet_plant_output;
+create policy "fleet_plant_output anon read" on public.fleet_plant_output for select using (true);
+drop policy if exists "fleet_plant_output anon insert" on public.fleet_plant_output;
+create policy "fleet_plant_output anon insert" on public.fleet_plant_output for insert with check (true);
+
+drop policy if exists "fleet_generation_mix anon read" on public.fleet_generation_mix;
+create policy "fleet_generation_mix anon read" on public.fleet_generation_mix for select using (true);
+drop policy if exists "fleet_generation_mix anon insert" on public.fleet_generation_mix;
+create policy "fleet_generation_mix anon insert" on public.fleet_generation_mix for insert with check (true);
+
+drop policy if exists "fleet_co2_intensity anon read" on public.fleet_co2_intensity;
+create policy "fleet_co2_intensity anon read" on public.fleet_co2_intensity for select using (true);
+drop policy if exists "fleet_co2_intensity anon insert" on public.fleet_co2_intensity;
+create policy "fleet_co2_intensity anon insert" on public.fleet_co2_intensity for insert with check (true);
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from analysis.alignment import align_frames, join_positions, snap, to_epoch_us
+
+T0 = pd.Timestamp("2026-01-01", tz="UTC")
+STEP = timedelta(minutes=15)
+
+
+def jittered(n: int, seed: int, max_jitter_s: float = 1.0) -> pd.Series:
+	rng = np.random.default_rng(seed)
+	grid = pd.date_range(T0, periods=n, freq="15min")
+	return pd.Series(grid + pd.to_timedelta(rng.uniform(0, max_jitter_s, n), unit="s"))
+
+
+def test_jittered_tables_align_on_the_grid():
+	gen = pd.DataFrame({"timestamp": jittered(8, 0), "share": np.arange(8.0)})
+	co2 = pd.DataFrame({"timestamp": jittered(8, 1), "co2": 100 + np.arange(8.0)})
+	# An exact join finds nothing
+	assert gen.merge(co2, on="timestamp").empty
+	out = align_frames(gen, co2)
+	assert list(out["timestamp"]) == list(pd.date_range(T0, periods=8, freq="15min"))
+	assert list(out["share"]) == list(np.arange(8.0))
+	assert list(out["co2"]) == list(100 + np.arange(8.0))
+
+
+def test_missing_steps_duplicates_and_iso_strings():
+	left = pd.DataFrame({
+		# Step 2 missing, step 3 written twice (the later write wins)
+		"timestamp": [T0, T0 + STEP, T0 + 3 * STEP, T0 + 3 * STEP + timedelta(seconds=1)],
+		"v": [0.0, 1.0, 3.0, 3.5],
+	})
+	right = pd.DataFrame({
+		"timestamp": [(T0 + i * STEP).isoformat() for i in range(4)],
+		"v": [10.0, 11.0, 12.0, 13.0],
+	})
+	out = align_frames(left, right, step=STEP)
+	assert list(out.columns) == ["timestamp", "v_left", "v_right"]
+	assert list(out["timestamp"]) == [T0, T0 + STEP, T0 + 3 * STEP]
+	assert list(out["v_left"]) == [0.0, 1.0, 3.5]
+	assert list(out["v_right"]) == [10.0, 11.0, 13.0]
+
+
+def test_tolerance_drops_far_pairs():
+	left = pd.DataFrame({"timestamp": [T0, T0 + STEP], "a": [1, 2]})
+	right = pd.DataFrame({"timestamp": [T0 + timedelta(seconds=2), T0 + STEP + timedelta(minutes=5)], "b": [3, 4]})
+	assert len(align_frames(left, right, step=STEP)) == 2
+	out = align_frames(left, right, step=STEP, tolerance=timedelta(seconds=5))
+	assert list(out["a"]) == [1]
+	assert list(out["b"]) == [3]
+
+
+def naive_join(left, right):
+	last_left = {b: i for i, b in enumerate(left)}
+	last_right = {b: i for i, b in enumerate(right)}
+	common = sorted(set(last_left) & set(last_right))
+	return [last_left[b] for b in common], [last_right[b] for b in common], common
+
+
+def test_sparse_and_dense_lookups_match_a_naive_join():
+	rng = np.random.default_rng(3)
+	left = rng.choice(10**7, 200, replace=False)
+	right = np.concatenate([rng.choice(left, 150, replace=False), rng.choice(10**7, 100)])
+	# Duplicated buckets resolve to their last position
+	left = np.concatenate([left, left[:20]])
+	# Few rows over a wide span take the sparse path; their ranks the dense one
+	ranks = {b: i for i, b in enumerate(np.unique(np.concatenate([left, right])))}
+	for lb, rb in ((left, right), (np.array([ranks[b] for b in left]), np.array([ranks[b] for b in right]))):
+		li, ri, buckets = join_positions(lb, rb)
+		expected = naive_join(lb.tolist(), rb.tolist())
+		assert li.tolist() == expected[0]
+		assert ri.tolist() == expected[1]
+		assert buckets.tolist() == expected[2]
+
+
+def test_snap_rounds_to_the_nearest_grid_point():
+	us = to_epoch_us(pd.Series([T0 + timedelta(minutes=7), T0 + timedelta(minutes=8)]))
+	buckets, offsets = snap(us, STEP)
+	assert buckets[1] - buckets[0] == 1
+	assert offsets[0] == 7 * 60 * 10**6
+	assert offsets[1] == -7 * 60 * 10**6
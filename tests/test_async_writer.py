@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from simulator.async_writer import BackgroundSupabaseWriter
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class StandInClient:
+	"""Records delivered rows; raises a connection error while `down` is set."""
+
+	def __init__(self, down: bool = False):
+		self.down = down
+		self.calls = []
+
+	def enabled(self):
+		return True
+
+	def insert_rows(self, table, rows, on_conflict=None, resolution=None):
+		if self.down:
+			raise requests.ConnectionError("unreachable")
+		self.calls.append((table, on_conflict, resolution, [r["v"] for r in rows]))
+
+
+def writer(client, spool) -> BackgroundSupabaseWriter:
+	return BackgroundSupabaseWriter(client, spool_path=str(spool), max_retries=0, base_backoff=0.0, max_backoff=60.0)
+
+
+def test_spool_round_trip(tmp_path):
+	spool = tmp_path / "spool.jsonl"
+	with writer(StandInClient(down=True), spool) as w:
+		w.insert_rows("co2_intensity", [{"timestamp": T0, "v": 1}], on_conflict="timestamp", resolution="ignore-duplicates")
+		w.insert_rows("netzero_alignment", [{"year": 2026, "v": 2}], on_conflict="year", resolution="ignore-duplicates")
+	assert len(spool.read_text().splitlines()) == 2
+
+	client = StandInClient()
+	with writer(client, spool):
+		pass
+	assert client.calls == [
+		("co2_intensity", "timestamp", "ignore-duplicates", [1]),
+		("netzero_alignment", "year", "ignore-duplicates", [2]),
+	]
+	assert not spool.exists()
+	assert not (tmp_path / "spool.jsonl.replaying").exists()
+
+
+def test_torn_last_line_is_skipped(tmp_path, caplog):
+	spool = tmp_path / "spool.jsonl"
+	with writer(StandInClient(down=True), spool) as w:
+		w.insert_rows("co2_intensity", [{"v": 1}])
+	# Crash mid-spill: half a record, no newline, cut inside a multi-byte character
+	with open(spool, "ab") as f:
+		f.write('{"table":"co2_intensity","rows":[{"v":"é'.encode("utf-8")[:-1])
+
+	client = StandInClient(down=True)
+	with caplog.at_level(logging.WARNING, logger="simulator.async_writer"):
+		w = writer(client, spool).start()
+		w.close()
+	assert "unreadable spool line 2" in caplog.text
+	assert w._thread is None
+
+	# The record spilled after the torn line is not swallowed by it
+	client = StandInClient()
+	with writer(client, spool) as w:
+		w.insert_rows("co2_intensity", [{"v": 3}])
+	assert client.calls == [("co2_intensity", None, None, [1]), ("co2_intensity", None, None, [3])]
+
+
+def test_worker_survives_a_failing_spill(tmp_path, caplog):
+	# The spool path is a directory, so spilling raises
+	spool = tmp_path / "spool"
+	spool.mkdir()
+
+	class FlakyClient(StandInClient):
+		def insert_rows(self, table, rows, on_conflict=None, resolution=None):
+			# Only the first call fails
+			self.down, down = False, self.down
+			if down:
+				raise requests.ConnectionError("unreachable")
+			super().insert_rows(table, rows, on_conflict, resolution)
+
+	client = FlakyClient(down=True)
+	w = BackgroundSupabaseWriter(client, spool_path=str(spool), max_retries=0, base_backoff=0.0, max_backoff=0.0)
+	with caplog.at_level(logging.ERROR, logger="simulator.async_writer"):
+		w.start()
+		w.insert_rows("co2_intensity", [{"v": 1}])
+		while client.down:
+			time.sleep(0.001)
+		# Same worker thread, after its spill failed
+		w.insert_rows("co2_intensity", [{"v": 2}])
+		w.close()
+	assert "Supabase writer failed; spilling 1 pending batches" in caplog.text
+	assert "Dropping 1 rows for co2_intensity" in caplog.text
+	assert client.calls == [("co2_intensity", None, None, [2])]
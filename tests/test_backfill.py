@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from simulator.config import SimulatorConfig
+from simulator.simulate import backfill_years, run_backfill
+
+
+def utc(*args) -> datetime:
+	return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_backfill_years_exclude_end():
+	cfg = SimulatorConfig(step_minutes=15)
+	assert list(backfill_years(cfg, utc(2025, 1, 1), utc(2026, 1, 1))) == [2025]
+	assert list(backfill_years(cfg, utc(2025, 12, 31), utc(2026, 1, 1, 0, 15))) == [2025, 2026]
+	# A partial last step starting at midnight still lands in the new year
+	assert list(backfill_years(cfg, utc(2025, 12, 31), utc(2026, 1, 1, 0, 5))) == [2025, 2026]
+	assert list(backfill_years(cfg, utc(2025, 6, 1), utc(2025, 6, 1))) == []
+
+
+def test_backfill_writes_netzero_rows_only_for_covered_years(tmp_path):
+	cfg = SimulatorConfig(output_mode="csv", csv_output_dir=str(tmp_path), random_seed=7, step_minutes=60)
+	written = run_backfill(cfg, utc(2025, 12, 31), utc(2026, 1, 1), chunk_days=1, workers=1)
+	assert written == 24
+	nz = pd.read_csv(tmp_path / "netzero_alignment.csv")
+	assert list(nz["year"]) == [2025]
+	co2 = pd.read_csv(tmp_path / "co2_intensity.csv")
+	assert len(co2) == 24
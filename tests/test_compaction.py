@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from analysis.data_access import list_parquet_files, read_parquet_table
+from simulator.compaction import CSV_MANIFEST_NAME, MANIFEST_NAME, compact_csv_dir, compact_parquet_table
+from simulator.parquet_storage import write_partitioned
+
+T0 = datetime(2025, 9, 29, 23, 0, tzinfo=timezone.utc)
+
+
+def stamps(*hours: float):
+	return [T0 + timedelta(hours=h) for h in hours]
+
+
+def test_csv_is_deduplicated_and_sorted_with_a_manifest(tmp_path):
+	pd.DataFrame({
+		"id": ["", "", "", ""],
+		"timestamp": [t.isoformat() for t in stamps(2, 0, 1, 0)],
+		"co2_intensity_g_per_kwh": ["302.0", "300.0", "301.0", "300.5"],
+	}).to_csv(tmp_path / "co2_intensity.csv", index=False)
+	pd.DataFrame({
+		"year": ["2025", "2024", "2025"],
+		"actual_emissions_mt": ["25.0", "26.0", "24.0"],
+		"target_emissions_mt": ["25.0", "25.0", "25.0"],
+		"alignment_pct": ["100.0", "96.0", "104.0"],
+	}).to_csv(tmp_path / "netzero_alignment.csv", index=False)
+
+	manifest = compact_csv_dir(str(tmp_path))
+
+	co2 = pd.read_csv(tmp_path / "co2_intensity.csv", dtype=str, keep_default_na=False)
+	# Sorted, last row per timestamp kept, original strings written back
+	assert list(co2["timestamp"]) == [t.isoformat() for t in stamps(0, 1, 2)]
+	assert list(co2["co2_intensity_g_per_kwh"]) == ["300.5", "301.0", "302.0"]
+	# Yearly rows keep the first, as the ignore-duplicates upsert does
+	nz = pd.read_csv(tmp_path / "netzero_alignment.csv")
+	assert list(nz["year"]) == [2024, 2025]
+	assert list(nz["alignment_pct"]) == [96.0, 100.0]
+
+	with open(tmp_path / CSV_MANIFEST_NAME) as f:
+		assert json.load(f) == manifest
+	assert manifest["tables"]["co2_intensity"]["segments"] == [{
+		"path": "co2_intensity.csv", "rows": 3, "rows_before": 4,
+		"min": stamps(0)[0].isoformat(), "max": stamps(2)[0].isoformat(),
+	}]
+	assert manifest["tables"]["netzero_alignment"]["segments"][0]["min"] == 2024
+
+
+def write_steps(base, hours, values):
+	write_partitioned(str(base), "co2_intensity", {
+		"id": [None] * len(hours),
+		"timestamp": stamps(*hours),
+		"co2_intensity_g_per_kwh": values,
+	})
+
+
+def test_parquet_parts_are_merged_per_partition(tmp_path):
+	# Three small parts over two days, with a step written twice
+	write_steps(tmp_path, [0, 1], [300.0, 301.0])
+	write_steps(tmp_path, [2, 1], [302.0, 311.0])
+	write_steps(tmp_path, [3], [303.0])
+	table_dir = tmp_path / "co2_intensity"
+	assert sorted(os.listdir(table_dir)) == ["day=2025-09-29", "day=2025-09-30"]
+
+	manifest = compact_parquet_table(str(tmp_path), "co2_intensity")
+
+	assert [len(os.listdir(table_dir / d)) for d in ("day=2025-09-29", "day=2025-09-30")] == [1, 1]
+	assert manifest["key"] == "timestamp"
+	assert [(s["rows"], s["min"], s["max"]) for s in manifest["segments"]] == [
+		(1, stamps(0)[0].isoformat(), stamps(0)[0].isoformat()),
+		(3, stamps(1)[0].isoformat(), stamps(3)[0].isoformat()),
+	]
+	with open(table_dir / MANIFEST_NAME) as f:
+		assert json.load(f) == manifest
+
+	df = read_parquet_table(str(tmp_path), "co2_intensity")
+	assert list(df["timestamp"]) == stamps(0, 1, 2, 3)
+	# The later write of a repeated step wins
+	assert list(df["co2_intensity_g_per_kwh"]) == [300.0, 311.0, 302.0, 303.0]
+	assert df["id"].isna().all()
+
+
+def test_parquet_partitions_regroup_into_months(tmp_path):
+	write_steps(tmp_path, [0, 1], [300.0, 301.0])
+	write_steps(tmp_path, [24 * 2], [302.0])
+	manifest = compact_parquet_table(str(tmp_path), "co2_intensity", partition="month")
+	table_dir = tmp_path / "co2_intensity"
+	assert sorted(d for d in os.listdir(table_dir) if d != MANIFEST_NAME) == ["month=2025-09", "month=2025-10"]
+	# day=2025-09-29 and day=2025-09-30 become one segment
+	assert [s["rows"] for s in manifest["segments"]] == [2, 1]
+	assert len(os.listdir(table_dir / "month=2025-09")) == 1
+
+
+def test_manifest_bounds_prune_segments(tmp_path):
+	write_steps(tmp_path, [1, 2], [301.0, 302.0])
+	write_steps(tmp_path, [20], [320.0])
+	compact_parquet_table(str(tmp_path), "co2_intensity")
+	# Day 2025-09-30 is one segment ending at 19:00 (T0 + 20h)
+	late = T0 + timedelta(hours=21)
+	assert list_parquet_files(str(tmp_path), "co2_intensity", start=late) == []
+	assert len(list_parquet_files(str(tmp_path), "co2_intensity", start=T0 + timedelta(hours=20))) == 1
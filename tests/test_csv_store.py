@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from analysis.csv_store import CACHE_DIRNAME, read_csv_cached
+from analysis.data_access import read_csv_table
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def write_co2(path, hours, values, mode="w"):
+	pd.DataFrame({
+		"id": [""] * len(hours),
+		"timestamp": [(T0 + timedelta(hours=h)).isoformat() for h in hours],
+		"co2_intensity_g_per_kwh": values,
+	}).to_csv(path, index=False, mode=mode, header=mode == "w")
+
+
+def cache_dirs(tmp_path):
+	return sorted(os.listdir(tmp_path / CACHE_DIRNAME))
+
+
+def test_second_read_comes_from_the_sidecar(tmp_path):
+	path = str(tmp_path / "co2_intensity.csv")
+	write_co2(path, [0, 1, 2, 3], [300.0, 301.0, 302.0, 303.0])
+	first = read_csv_cached(path)
+	assert len(cache_dirs(tmp_path)) == 1
+	# Make the text unparseable without changing size or mtime: only the sidecar can answer
+	stat = os.stat(path)
+	with open(path, "r+b") as f:
+		f.write(b"#" * stat.st_size)
+	os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+	second = read_csv_cached(path)
+	pd.testing.assert_frame_equal(first, second)
+	assert str(second["timestamp"].dtype) == "datetime64[us, UTC]"
+	assert second["id"].isna().all()
+
+	window = read_csv_cached(path, columns=["co2_intensity_g_per_kwh"], start=T0 + timedelta(hours=1), end=T0 + timedelta(hours=3))
+	assert list(window.columns) == ["co2_intensity_g_per_kwh"]
+	assert list(window["co2_intensity_g_per_kwh"]) == [301.0, 302.0]
+
+
+def test_appending_invalidates_the_sidecar(tmp_path):
+	path = str(tmp_path / "co2_intensity.csv")
+	write_co2(path, [0, 1], [300.0, 301.0])
+	read_csv_cached(path)
+	old = cache_dirs(tmp_path)
+	write_co2(path, [2], [302.0], mode="a")
+	df = read_csv_cached(path)
+	assert list(df["co2_intensity_g_per_kwh"]) == [300.0, 301.0, 302.0]
+	# A new version directory replaces the stale one
+	assert len(cache_dirs(tmp_path)) == 1
+	assert cache_dirs(tmp_path) != old
+
+
+def test_unsorted_file_is_filtered_by_mask(tmp_path):
+	path = str(tmp_path / "co2_intensity.csv")
+	write_co2(path, [2, 0, 3, 1], [302.0, 300.0, 303.0, 301.0])
+	for _ in range(2):
+		df = read_csv_cached(path, start=T0 + timedelta(hours=1), end=T0 + timedelta(hours=3))
+		assert list(df["co2_intensity_g_per_kwh"]) == [302.0, 301.0]
+
+
+@pytest.mark.parametrize("cache", [True, False])
+def test_missing_column_raises_value_error(tmp_path, cache):
+	path = str(tmp_path / "co2_intensity.csv")
+	write_co2(path, [0], [300.0])
+	# Twice, so the cached run covers both the miss and the sidecar hit
+	for _ in range(2):
+		with pytest.raises(ValueError, match="no column"):
+			read_csv_table(path, columns=["co2_intensity_g_per_kwh", "nope"], cache=cache)
+
+
+def test_read_only_cache_directory_only_costs_the_cache(tmp_path):
+	path = str(tmp_path / "co2_intensity.csv")
+	write_co2(path, [0, 1], [300.0, 301.0])
+	# A file where the cache directory should be
+	(tmp_path / CACHE_DIRNAME).write_text("")
+	df = read_csv_cached(path)
+	assert list(df["co2_intensity_g_per_kwh"]) == [300.0, 301.0]
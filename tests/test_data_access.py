@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from analysis import data_access
+from analysis.data_access import _keyset_params, iter_supabase_table
+
+
+class FakeSession:
+	"""Serves `pages` (already in the requested order) one per `get`, recording the params."""
+
+	def __init__(self, pages):
+		self.pages = list(pages)
+		self.calls = []
+
+	def get(self, url, params=None, headers=None, timeout=None):
+		self.calls.append(list(params))
+		return FakeResponse(self.pages.pop(0) if self.pages else [])
+
+
+class FakeResponse:
+	def __init__(self, rows):
+		self.rows = rows
+
+	def raise_for_status(self):
+		pass
+
+	def json(self):
+		return self.rows
+
+
+def test_keyset_params_netzero_has_no_id():
+	params = _keyset_params(["year", "actual_emissions_mt"], "year", True, None, None, tiebreak=None)
+	assert params == [("select", "year,actual_emissions_mt"), ("order", "year.desc")]
+
+
+def test_keyset_params_time_series_uses_id_tiebreak():
+	params = _keyset_params(["co2_intensity_g_per_kwh"], "timestamp", False, None, None)
+	assert params == [("select", "co2_intensity_g_per_kwh,timestamp,id"), ("order", "timestamp.asc,id.asc")]
+
+
+def test_iter_netzero_pages_on_year_alone(monkeypatch):
+	monkeypatch.setattr(data_access, "get_supabase_env", lambda: ("https://example.test", "key"))
+	session = FakeSession([
+		[{"year": 2026, "actual_emissions_mt": 1.0}, {"year": 2025, "actual_emissions_mt": 2.0}],
+		[{"year": 2024, "actual_emissions_mt": 3.0}],
+	])
+	pages = list(iter_supabase_table("netzero_alignment", order="year", descending=True, page_size=2, session=session, tiebreak=None))
+	assert [list(p["year"]) for p in pages] == [[2026, 2025], [2024]]
+	for params in session.calls:
+		assert not any(key == "or" or "id" in value for key, value in params)
+	assert ("year", "lt.2025") in session.calls[1]
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.downsample import bucket_aggregate, downsample_buckets, downsample_lttb, lttb_indices
+
+
+def reference_lttb(x, y, n_out):
+	"""Textbook LTTB, one point at a time."""
+	n = len(x)
+	every = (n - 2) / (n_out - 2)
+	out, a = [0], 0
+	for i in range(n_out - 2):
+		lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+		nlo, nhi = hi, min(int((i + 2) * every) + 1, n - 1)
+		if i == n_out - 3:
+			avg_x, avg_y = x[n - 1], y[n - 1]
+		else:
+			avg_x, avg_y = np.mean(x[nlo:nhi]), np.mean(y[nlo:nhi])
+		best, best_area = lo, -1.0
+		for j in range(lo, hi):
+			area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+			if area > best_area:
+				best, best_area = j, area
+		out.append(best)
+		a = best
+	out.append(n - 1)
+	return out
+
+
+@pytest.mark.parametrize("n, n_out", [(1000, 100), (1001, 37), (50, 49), (10, 3)])
+def test_lttb_matches_reference(n, n_out):
+	rng = np.random.default_rng(n)
+	x = np.sort(rng.uniform(0, 1000, n))
+	y = np.cumsum(rng.normal(size=n))
+	assert lttb_indices(x, y, n_out).tolist() == reference_lttb(x, y, n_out)
+
+
+def test_lttb_keeps_spikes_and_ends():
+	y = np.zeros(1000)
+	y[123], y[777] = 50.0, -40.0
+	idx = lttb_indices(np.arange(1000.0), y, 20)
+	assert len(idx) == 20
+	assert idx[0] == 0 and idx[-1] == 999
+	assert {123, 777} <= set(idx.tolist())
+	assert (np.diff(idx) > 0).all()
+
+
+def test_short_series_are_returned_whole():
+	assert lttb_indices(np.arange(5.0), np.arange(5.0), 10).tolist() == list(range(5))
+	assert lttb_indices(np.arange(5.0), np.arange(5.0), 2).tolist() == list(range(5))
+
+
+@pytest.mark.parametrize("how", ["mean", "min", "max"])
+def test_bucket_aggregate_matches_groupby(how):
+	rng = np.random.default_rng(1)
+	values = rng.normal(size=(103, 3))
+	out = bucket_aggregate(values, 10, how)
+	edges = np.linspace(0, 103, 11).astype(int)
+	groups = np.repeat(np.arange(10), np.diff(edges))
+	expected = pd.DataFrame(values).groupby(groups).agg(how).to_numpy()
+	np.testing.assert_allclose(out, expected)
+
+
+def test_bucket_aggregate_rejects_unknown_aggregates():
+	with pytest.raises(ValueError, match="median"):
+		bucket_aggregate(np.ones((4, 1)), 2, "median")
+
+
+def test_downsample_frames():
+	ts = pd.date_range("2026-01-01", periods=500, freq="15min", tz="UTC")
+	df = pd.DataFrame({"timestamp": ts.map(lambda t: t.isoformat()), "a": np.arange(500.0), "b": np.ones(500)})
+	df.loc[10, "a"] = np.nan
+
+	lttb = downsample_lttb(df, "timestamp", "a", 50)
+	assert len(lttb) == 50
+	assert lttb["a"].notna().all()
+	assert lttb["timestamp"].is_monotonic_increasing
+
+	buckets = downsample_buckets(df, "timestamp", ["a", "b"], 25, how="max")
+	assert len(buckets) == 25
+	# Each bucket is labelled with its first x; stacked series share those x values
+	assert list(buckets["timestamp"]) == list(df["timestamp"].iloc[::20])
+	assert list(buckets["b"]) == [1.0] * 25
+	assert buckets["a"].iloc[-1] == 499.0
+
+	assert len(downsample_buckets(df.head(10), "timestamp", ["a"], 25)) == 10
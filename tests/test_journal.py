@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from simulator.config import SimulatorConfig
+from simulator.journal import TABLE_KEYS, CsvSink, Journal, JournaledOutputs, deliver
+from simulator.simulate import write_outputs
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def step(i: int):
+	ts = T0 + timedelta(minutes=15 * i)
+	return ts, {"co2_intensity": [{"timestamp": ts, "co2_intensity_g_per_kwh": 300.0 + i}]}
+
+
+class ListSink:
+	"""Records what it is given; fails while `down` is set."""
+
+	def __init__(self, name: str = "list"):
+		self.name = name
+		self.down = False
+		self.writes = []
+
+	def write(self, tables):
+		if self.down:
+			raise ConnectionError("unreachable")
+		self.writes.append(tables)
+
+	def rows(self):
+		return [r["co2_intensity_g_per_kwh"] for w in self.writes for r in w.get("co2_intensity", [])]
+
+
+def test_records_round_trip(tmp_path):
+	with Journal(str(tmp_path / "j.bin"), fsync=False) as j:
+		ends = [j.append(*step(i)) for i in range(3)]
+		records = list(j.read())
+	assert [end for end, _ in records] == ends
+	assert [r["key"] for _, r in records] == [step(i)[0].isoformat() for i in range(3)]
+	assert records[1][1]["tables"]["co2_intensity"][0]["co2_intensity_g_per_kwh"] == 301.0
+
+
+def test_torn_and_corrupt_tails_are_truncated_on_reopen(tmp_path):
+	path = str(tmp_path / "j.bin")
+	with Journal(path, fsync=False) as j:
+		j.append(*step(0))
+		good = j.append(*step(1))
+	with open(path, "ab") as f:
+		f.write(b"\x00\x00\x01\x00partial")
+	j = Journal(path, fsync=False)
+	assert os.path.getsize(path) == good
+	assert j.last_key == step(1)[0].isoformat()
+	j.close()
+
+	# Flip a payload byte of the last record: the CRC no longer matches
+	with open(path, "r+b") as f:
+		f.seek(good - 2)
+		f.write(b"#")
+	with Journal(path, fsync=False) as j:
+		assert len(list(j.read())) == 1
+		assert j.end_offset < good
+
+
+def test_each_sink_consumes_from_its_own_offset(tmp_path):
+	fast, slow = ListSink("fast"), ListSink("slow")
+	slow.down = True
+	outputs = JournaledOutputs(Journal(str(tmp_path / "j.bin"), fsync=False), [fast, slow])
+	for i in range(3):
+		outputs.write(*step(i))
+	assert fast.rows() == [300.0, 301.0, 302.0]
+	assert slow.rows() == []
+	assert outputs.journal.committed("fast") == outputs.journal.end_offset
+	assert outputs.journal.committed("slow") == 0
+	assert outputs.lag("slow") == outputs.journal.end_offset
+	with pytest.raises(RuntimeError, match="slow"):
+		outputs.raise_for_errors()
+	outputs.close()
+
+	# On restart the backlog is delivered in one bulk write
+	slow.down = False
+	with Journal(str(tmp_path / "j.bin"), fsync=False) as j:
+		assert deliver(j, slow) == 3
+		assert deliver(j, fast) == 0
+	assert len(slow.writes) == 1
+	assert slow.rows() == [300.0, 301.0, 302.0]
+
+
+def test_csv_sink_cuts_rows_written_after_its_last_commit(tmp_path):
+	csv_dir = tmp_path / "csv"
+	j = Journal(str(tmp_path / "j.bin"), fsync=False)
+	sink = CsvSink(str(csv_dir))
+	j.append(*step(0))
+	deliver(j, sink)
+	committed = (csv_dir / "co2_intensity.csv").read_text()
+	# A crash after the CSV write but before the offset commit
+	j.append(*step(1))
+	sink.write(step(1)[1])
+	deliver(j, sink)
+	lines = (csv_dir / "co2_intensity.csv").read_text().splitlines()
+	assert (csv_dir / "co2_intensity.csv").read_text().startswith(committed)
+	assert len(lines) == 3  # header + one row per step, no duplicate
+	j.close()
+
+
+def test_journal_is_truncated_once_every_sink_caught_up(tmp_path):
+	path = str(tmp_path / "j.bin")
+	sink = ListSink()
+	outputs = JournaledOutputs(Journal(path, fsync=False), [sink], max_bytes=200)
+	outputs.write(*step(0))
+	assert outputs.journal.end_offset > 0
+	outputs.write(*step(1))
+	# Past max_bytes and delivered: emptied, with the resume key kept
+	assert os.path.getsize(path) == 0
+	assert outputs.journal.committed("list") == 0
+	assert outputs.journal.last_key == step(1)[0].isoformat()
+
+	sink.down = True
+	for i in range(2, 6):
+		outputs.write(*step(i))
+	# A sink behind keeps the journal
+	assert os.path.getsize(path) > 200
+	sink.down = False
+	outputs.catch_up()
+	assert os.path.getsize(path) == 0
+	assert sink.rows() == [300.0 + i for i in range(6)]
+	outputs.close()
+
+	with Journal(path, fsync=False) as j:
+		assert j.last_key == step(5)[0].isoformat()
+
+
+def test_a_sink_that_never_committed_keeps_the_journal(tmp_path):
+	sink = ListSink()
+	sink.down = True
+	outputs = JournaledOutputs(Journal(str(tmp_path / "j.bin"), fsync=False), [sink], max_bytes=1)
+	outputs.write(*step(0))
+	assert outputs.journal.end_offset > 0
+	outputs.close()
+
+
+def test_offsets_past_a_truncated_file_are_reset(tmp_path):
+	path = str(tmp_path / "j.bin")
+	with Journal(path, fsync=False) as j:
+		end = j.append(*step(0))
+		j.commit("list", end)
+	# Crash between truncating the file and saving the reset offsets
+	open(path, "wb").close()
+	sink = ListSink()
+	with Journal(path, fsync=False) as j:
+		assert j.committed("list") == 0
+		j.append(*step(1))
+		assert deliver(j, sink) == 1
+	assert sink.rows() == [301.0]
+
+
+class RecordingClient:
+	def __init__(self):
+		self.calls = []
+
+	def enabled(self):
+		return True
+
+	def insert_rows(self, table, rows, on_conflict=None, resolution=None):
+		self.calls.append((table, on_conflict, resolution))
+
+
+def test_direct_supabase_writes_ignore_duplicates():
+	client = RecordingClient()
+	cfg = SimulatorConfig(output_mode="supabase")
+	rollup = {"energy_rollup_hourly": [{"timestamp": T0}]}
+	write_outputs(cfg, client, [{"timestamp": T0}], [{"timestamp": T0}], [{"year": 2026}], rollups=rollup)
+	assert client.calls == [
+		("co2_intensity", TABLE_KEYS["co2_intensity"], "ignore-duplicates"),
+		("generation_mix", TABLE_KEYS["generation_mix"], "ignore-duplicates"),
+		("netzero_alignment", "year", "ignore-duplicates"),
+		("energy_rollup_hourly", "timestamp,first_sample", "ignore-duplicates"),
+	]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from streamlit_app import local_cache
+from streamlit_app.local_cache import LocalTableCache
+
+NETZERO = pd.DataFrame({
+	"year": [2024, 2025, 2026],
+	"actual_emissions_mt": [10.0, 9.0, 8.0],
+	"target_emissions_mt": [9.5, 8.5, 7.5],
+})
+
+
+def fake_iter(tables):
+	"""Stand-in for `iter_supabase_table` that, like PostgREST, rejects unknown sort columns."""
+	def iterate(table, start=None, end=None, order="timestamp", tiebreak="id"):
+		df = tables[table]
+		for column in (order, tiebreak):
+			if column is not None and column not in df.columns:
+				raise AssertionError(f"{table} has no column {column}")
+		mask = pd.Series(True, index=df.index)
+		key = df[order] if order != "timestamp" else pd.to_datetime(df[order], utc=True)
+		if start is not None:
+			mask &= key >= start
+		if end is not None:
+			mask &= key < end
+		yield df.loc[mask].reset_index(drop=True)
+	return iterate
+
+
+def test_netzero_is_keyed_on_year(tmp_path, monkeypatch):
+	tables = {"netzero_alignment": NETZERO}
+	monkeypatch.setattr(local_cache, "iter_supabase_table", fake_iter(tables))
+	cache = LocalTableCache(str(tmp_path / "cache.sqlite"), min_sync_interval=0)
+	first = cache.read("netzero_alignment")
+	assert list(first["year"]) == [2024, 2025, 2026]
+	assert "id" not in first.columns
+
+	# A revised figure for the newest year replaces the cached row instead of duplicating it
+	tables["netzero_alignment"] = pd.concat([
+		NETZERO.iloc[:2],
+		pd.DataFrame({"year": [2026, 2027], "actual_emissions_mt": [7.0, 6.0], "target_emissions_mt": [7.5, 6.5]}),
+	], ignore_index=True)
+	second = cache.read("netzero_alignment")
+	assert list(second["year"]) == [2024, 2025, 2026, 2027]
+	assert list(second["actual_emissions_mt"]) == [10.0, 9.0, 7.0, 6.0]
+
+
+def test_time_series_is_upserted_on_id(tmp_path, monkeypatch):
+	t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+	stamps = [t0, t0 + timedelta(minutes=5), t0 + timedelta(minutes=5)]
+	co2 = pd.DataFrame({
+		"id": [1, 2, 3],
+		# PostgREST returns timestamps as ISO strings
+		"timestamp": [t.isoformat() for t in stamps],
+		"co2_intensity_g_per_kwh": [300.0, 310.0, 320.0],
+	})
+	monkeypatch.setattr(local_cache, "iter_supabase_table", fake_iter({"co2_intensity": co2}))
+	cache = LocalTableCache(str(tmp_path / "cache.sqlite"), min_sync_interval=0)
+	cache.read("co2_intensity", start=t0)
+	df = cache.read("co2_intensity", start=t0)
+	assert list(df["id"]) == [1, 2, 3]
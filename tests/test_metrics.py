@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from analysis.metrics import NetZeroSummary, summarize_netzero
+
+
+def baseline_alignment(df: pd.DataFrame) -> float:
+	return float(df.sort_values("year", kind="stable")["alignment_pct"].iloc[-1])
+
+
+def test_netzero_ties_take_the_last_row():
+	df = pd.DataFrame({"year": [2024, 2025, 2025, 2024, 2025], "alignment_pct": [90.0, 97.0, 96.0, 91.0, 95.0]})
+	assert summarize_netzero(df)["latest_alignment_pct"] == baseline_alignment(df) == 95.0
+	# All one year, as in data/netzero_alignment.csv
+	same = df.assign(year=2025)
+	assert summarize_netzero(same)["latest_alignment_pct"] == baseline_alignment(same)
+
+
+def test_netzero_repeated_index_labels():
+	df = pd.concat([
+		pd.DataFrame({"year": [2025, 2026], "alignment_pct": [97.0, 98.0]}),
+		pd.DataFrame({"year": [2026, 2025], "alignment_pct": [99.0, 95.0]}),
+	])
+	assert summarize_netzero(df) == {"count": 4, "latest_alignment_pct": 99.0}
+
+
+def test_netzero_updates_match_one_frame():
+	df = pd.DataFrame({"year": [2025, 2026, 2026, 2025, 2026], "alignment_pct": [97.0, 98.0, 99.0, 95.0, 94.0]})
+	summary = NetZeroSummary()
+	for lo in range(0, len(df), 2):
+		summary.update(df.iloc[lo:lo + 2])
+	assert summary.result() == summarize_netzero(df) == {"count": 5, "latest_alignment_pct": 94.0}
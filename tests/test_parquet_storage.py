@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from analysis.data_access import read_parquet_table
+from simulator.parquet_storage import BufferedParquetWriter
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_rows_and_columns_mix_in_one_buffer(tmp_path):
+	with BufferedParquetWriter(str(tmp_path), max_rows=1000) as writer:
+		# Row dicts carry `id`, batch columns do not; neither may shift the other
+		writer.append("co2_intensity", [{"id": None, "timestamp": T0, "co2_intensity_g_per_kwh": 300.0}])
+		writer.append_columns("co2_intensity", {
+			"timestamp": [T0 + timedelta(hours=h) for h in (1, 2)],
+			"co2_intensity_g_per_kwh": np.array([301.0, 302.0]),
+		})
+		writer.append("co2_intensity", [{"timestamp": T0 + timedelta(hours=3), "co2_intensity_g_per_kwh": 303.0, "extra": 1}])
+		lengths = {name: len(values) for name, values in writer._buffers["co2_intensity"].items()}
+		assert set(lengths) == {"id", "timestamp", "co2_intensity_g_per_kwh"}
+		assert set(lengths.values()) == {4}
+
+	df = read_parquet_table(str(tmp_path), "co2_intensity").sort_values("timestamp")
+	assert list(df["co2_intensity_g_per_kwh"]) == [300.0, 301.0, 302.0, 303.0]
+	assert df["id"].isna().all()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from analysis.regression import SlidingWindowSlope, rolling_slope
+
+
+def co2_series(days: int = 10, step_minutes: int = 15, seed: int = 0) -> pd.DataFrame:
+	rng = np.random.default_rng(seed)
+	n = days * 24 * 60 // step_minutes
+	ts = pd.date_range(datetime(2026, 3, 1, tzinfo=timezone.utc), periods=n, freq=f"{step_minutes}min")
+	# A falling trend with a daily cycle and noise, so short and long windows disagree
+	t = np.arange(n) * step_minutes / 1440.0
+	values = 350.0 - 2.0 * t + 40.0 * np.sin(2 * np.pi * t) + rng.normal(0, 10, n)
+	return pd.DataFrame({"timestamp": ts, "co2_intensity_g_per_kwh": values})
+
+
+def polyfit_slope(window: pd.DataFrame) -> float:
+	t = (window["timestamp"] - window["timestamp"].iloc[0]).dt.total_seconds().to_numpy() / 86400.0
+	return np.polyfit(t, window["co2_intensity_g_per_kwh"].to_numpy(), 1)[0]
+
+
+def trailing(df: pd.DataFrame, i: int) -> pd.DataFrame:
+	ts = df["timestamp"]
+	return df[(ts >= ts.iloc[i] - pd.Timedelta("7D")) & (ts <= ts.iloc[i])]
+
+
+def test_rolling_slope_matches_polyfit():
+	df = co2_series()
+	slopes = rolling_slope(df["timestamp"], df["co2_intensity_g_per_kwh"].to_numpy())
+	assert np.isnan(slopes[:9]).all()
+	for i in [9, 50, 671, 672, 673, len(df) // 2, len(df) - 1]:
+		assert abs(slopes[i] - polyfit_slope(trailing(df, i))) < 1e-8
+
+
+def test_sliding_window_slope_matches_polyfit():
+	# Longer than twice the window, so the origin is rebased
+	df = co2_series(days=16)
+	estimator = SlidingWindowSlope()
+	# Fed in uneven chunks of a growing frame
+	for hi in [5, 9, 10, 400, 900, 901, len(df)]:
+		estimator.update(df.iloc[:hi], "co2_intensity_g_per_kwh")
+		if hi < 10:
+			assert estimator.slope() is None
+		else:
+			assert abs(estimator.slope() - polyfit_slope(trailing(df, hi - 1))) < 1e-8
+
+
+def test_rolling_slope_stays_precise_on_long_series():
+	# Five years of 15-minute data: sums restart per block instead of growing from the first point
+	df = co2_series(days=5 * 365, seed=1)
+	slopes = rolling_slope(df["timestamp"], df["co2_intensity_g_per_kwh"].to_numpy())
+	for i in [671, 672, 673, 100_000, len(df) - 1]:
+		window = trailing(df, i)
+		assert abs(slopes[i] - polyfit_slope(window)) < 1e-9
+
+
+def test_update_parses_only_the_new_tail():
+	df = co2_series(days=8)
+	estimator = SlidingWindowSlope()
+	estimator.update(df.iloc[:500], "co2_intensity_g_per_kwh")
+	# Rows already seen are never parsed again, so garbage there goes unnoticed
+	grown = df.astype({"timestamp": object})
+	grown.loc[:200, "timestamp"] = "not a timestamp"
+	assert estimator.update(grown, "co2_intensity_g_per_kwh") == len(df) - 500
+	assert abs(estimator.slope() - polyfit_slope(trailing(df, len(df) - 1))) < 1e-8
+	assert estimator.update(grown, "co2_intensity_g_per_kwh") == 0
+
+
+def window_fetch(df: pd.DataFrame):
+	def fetch(table, start, end, columns):
+		mask = (df["timestamp"] >= start) & (df["timestamp"] < end)
+		return df.loc[mask, list(columns)].reset_index(drop=True)
+	return fetch
+
+
+def test_catch_up_fills_the_window_before_a_short_frame():
+	df = co2_series()
+	newest = df["timestamp"].iloc[-1]
+	day = df[df["timestamp"] > newest - pd.Timedelta("1D")]
+	week = df[df["timestamp"] >= newest - pd.Timedelta("7D")]
+
+	seeded = SlidingWindowSlope()
+	seeded.catch_up(window_fetch(df), day["timestamp"].iloc[0].to_pydatetime())
+	seeded.update(day, "co2_intensity_g_per_kwh")
+	unseeded = SlidingWindowSlope()
+	unseeded.update(day, "co2_intensity_g_per_kwh")
+
+	expected = polyfit_slope(week)
+	assert len(seeded) == len(week)
+	assert abs(seeded.slope() - expected) < 1e-8
+	# Without the seed only the 24h frame is fitted
+	assert abs(unseeded.slope() - expected) > 1.0
+
+	# A later 7-day frame adds nothing and leaves the slope unchanged
+	before = seeded.slope()
+	seeded.catch_up(window_fetch(df), week["timestamp"].iloc[0].to_pydatetime())
+	assert seeded.update(week, "co2_intensity_g_per_kwh") == 0
+	assert seeded.slope() == before
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.metrics import Co2Summary, summarize_co2
+from analysis.sketches import KllSketch, RunningStats
+
+
+def test_running_stats_merge_matches_numpy():
+	rng = np.random.default_rng(0)
+	# Large offset, so a naive sum-of-squares variance would lose precision
+	values = 1e6 + rng.normal(size=10_000)
+	values[::97] = np.nan
+	chunks = np.array_split(values, 7)
+	parts = [RunningStats().update_many(chunk) for chunk in chunks[1:]]
+	# The first chunk value by value (Welford), the others in bulk
+	one_by_one = RunningStats()
+	for v in chunks[0]:
+		one_by_one.update(float(v))
+	merged = RunningStats().merge(one_by_one)
+	for part in parts:
+		merged.merge(part)
+
+	finite = values[~np.isnan(values)]
+	assert merged.count == len(finite)
+	assert merged.sum == pytest.approx(finite.sum(), rel=1e-12)
+	assert merged.mean == pytest.approx(finite.mean(), rel=1e-12)
+	assert merged.variance == pytest.approx(finite.var(ddof=1), rel=1e-9)
+	assert (merged.min, merged.max) == (finite.min(), finite.max())
+
+
+def test_running_stats_round_trips_through_json():
+	stats = RunningStats().update_many([1.0, 2.0, 4.0])
+	restored = RunningStats.from_dict(json.loads(json.dumps(stats.to_dict())))
+	assert restored.to_dict() == stats.to_dict()
+	empty = RunningStats.from_dict(json.loads(json.dumps(RunningStats().to_dict())))
+	assert empty.count == 0 and empty.min == math.inf
+	assert math.isnan(RunningStats().update(1.0).std)
+
+
+def test_kll_merge_stays_within_rank_error():
+	rng = np.random.default_rng(1)
+	values = rng.lognormal(size=200_000)
+	k = 200
+	sketches = [KllSketch(k, seed=i).update_many(chunk) for i, chunk in enumerate(np.array_split(values, 8))]
+	merged = KllSketch(k, seed=99)
+	for sketch in sketches:
+		merged.merge(sketch)
+	assert merged.n == len(values)
+	# Memory stays O(k) whatever n is
+	assert sum(len(level) for level in merged._levels) < 4 * k
+	ordered = np.sort(values)
+	for q, estimate in zip([0.01, 0.25, 0.5, 0.95, 0.99], merged.quantiles([0.01, 0.25, 0.5, 0.95, 0.99])):
+		rank = np.searchsorted(ordered, estimate) / len(values)
+		assert abs(rank - q) < 3 * 1.7 / k
+
+
+def test_kll_round_trips_and_ignores_nan():
+	sketch = KllSketch(16, seed=0).update_many([3.0, np.nan, 1.0, 2.0])
+	assert sketch.n == 3
+	assert sketch.quantiles([0.0, 0.5, 1.0]) == [1.0, 2.0, 3.0]
+	restored = KllSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+	assert restored.quantiles([0.5]) == [2.0]
+	assert KllSketch().quantile(0.5) is None
+	with pytest.raises(ValueError):
+		KllSketch(4)
+
+
+def test_co2_summaries_merge_across_workers():
+	rng = np.random.default_rng(2)
+	df = pd.DataFrame({
+		"timestamp": pd.date_range("2026-01-01", periods=4000, freq="15min", tz="UTC").map(lambda t: t.isoformat()),
+		"co2_intensity_g_per_kwh": rng.normal(300, 40, 4000),
+	})
+	merged = Co2Summary()
+	for lo in range(0, len(df), 800):
+		chunk = df.iloc[lo:lo + 800]
+		# Each worker's summary is persisted and reloaded before the merge
+		merged.merge(Co2Summary.from_dict(json.loads(json.dumps(Co2Summary().update(chunk).to_dict()))))
+	whole = summarize_co2(df)
+	result = merged.result()
+	assert result["count"] == whole["count"] == 4000
+	for name in ("min_gco2_kwh", "max_gco2_kwh", "avg_gco2_kwh", "std_gco2_kwh"):
+		assert result[name] == pytest.approx(whole[name], rel=1e-12)
+	assert result["p50_gco2_kwh"] == pytest.approx(df["co2_intensity_g_per_kwh"].median(), rel=0.02)
+	assert merged.latest_timestamp == pd.Timestamp(df["timestamp"].iloc[-1]).isoformat()
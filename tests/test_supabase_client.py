@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from simulator.supabase_client import SupabaseClient
+
+
+class StandInPostgrest(ThreadingHTTPServer):
+	"""Records every POST; answers with `status`."""
+
+	def __init__(self):
+		super().__init__(("127.0.0.1", 0), Handler)
+		self.posts = []
+		self.status = 201
+
+	@property
+	def url(self) -> str:
+		return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class Handler(BaseHTTPRequestHandler):
+	# Keep-alive, so a pooled session reuses one connection
+	protocol_version = "HTTP/1.1"
+
+	def do_POST(self):
+		raw = self.rfile.read(int(self.headers["Content-Length"]))
+		body = gzip.decompress(raw) if self.headers.get("Content-Encoding") == "gzip" else raw
+		self.server.posts.append({
+			"path": self.path,
+			"headers": dict(self.headers),
+			"raw": raw,
+			"rows": json.loads(body),
+			"client_port": self.client_address[1],
+		})
+		reply = b"" if self.server.status < 400 else b'{"message":"duplicate key"}'
+		self.send_response(self.server.status)
+		self.send_header("Content-Length", str(len(reply)))
+		self.end_headers()
+		self.wfile.write(reply)
+
+	def log_message(self, *args):
+		pass
+
+
+@pytest.fixture
+def server():
+	srv = StandInPostgrest()
+	thread = threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+	thread.start()
+	yield srv
+	srv.shutdown()
+	srv.server_close()
+
+
+def rows(n: int):
+	t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+	return [{"id": None, "timestamp": t0.replace(minute=i % 60), "value": i} for i in range(n)]
+
+
+def test_rows_are_posted_in_chunks_over_one_connection(server):
+	client = SupabaseClient(server.url, "key", chunk_size=4)
+	client.insert_rows("co2_intensity", rows(10))
+	client.close()
+	assert [len(p["rows"]) for p in server.posts] == [4, 4, 2]
+	assert [r["value"] for p in server.posts for r in p["rows"]] == list(range(10))
+	first = server.posts[0]["rows"][0]
+	# None fields are dropped, datetimes sent as ISO strings
+	assert first == {"timestamp": "2026-01-01T00:00:00+00:00", "value": 0}
+	assert len({p["client_port"] for p in server.posts}) == 1
+	assert {p["path"] for p in server.posts} == {"/rest/v1/co2_intensity"}
+	assert server.posts[0]["headers"]["Prefer"] == "return=minimal"
+	assert server.posts[0]["headers"]["apikey"] == "key"
+	assert server.posts[0]["headers"]["Authorization"] == "Bearer key"
+
+
+def test_gzip_bodies(server):
+	client = SupabaseClient(server.url, "key", chunk_size=1000, gzip=True)
+	client.insert_rows("co2_intensity", rows(50))
+	post = server.posts[0]
+	assert post["headers"]["Content-Encoding"] == "gzip"
+	assert post["raw"][:2] == b"\x1f\x8b"
+	assert len(post["rows"]) == 50
+	assert client.stats.bytes_sent == len(post["raw"])
+
+
+def test_on_conflict_and_prefer_headers(server):
+	client = SupabaseClient(server.url, "key")
+	client.insert_rows("netzero_alignment", [{"year": 2026}], on_conflict="year", resolution="ignore-duplicates")
+	post = server.posts[0]
+	assert post["path"] == "/rest/v1/netzero_alignment?on_conflict=year"
+	assert post["headers"]["Prefer"] == "resolution=ignore-duplicates,return=minimal"
+
+
+def test_stats_count_requests_rows_and_bytes(server):
+	client = SupabaseClient(server.url, "key", chunk_size=3)
+	client.insert_rows("co2_intensity", rows(7))
+	client.insert_rows("co2_intensity", [])
+	stats = client.stats
+	assert stats.requests == 3
+	assert stats.rows == 7
+	assert stats.bytes_sent == sum(len(p["raw"]) for p in server.posts)
+	assert 0 < stats.max_latency_s <= stats.seconds
+	assert stats.mean_latency_s == pytest.approx(stats.seconds / 3)
+	assert stats.as_dict()["rows_per_second"] == pytest.approx(7 / stats.seconds)
+
+
+def test_http_errors_carry_the_response_text(server):
+	server.status = 409
+	client = SupabaseClient(server.url, "key")
+	with pytest.raises(requests.HTTPError, match="duplicate key") as exc:
+		client.insert_rows("co2_intensity", rows(1))
+	assert exc.value.response.status_code == 409
+	assert client.stats.requests == 1
+
+
+def test_disabled_without_url_or_key(server):
+	client = SupabaseClient(None, "key")
+	client.insert_rows("co2_intensity", rows(3))
+	assert server.posts == []
+	assert client.stats.requests == 0